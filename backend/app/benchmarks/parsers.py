@@ -0,0 +1,86 @@
+"""Compare the HTML parser backends of app.scraping.parsers.
+
+Parses saved books.toscrape.com pages, a catalog page and a detail page,
+with each available backend and reports pages parsed per second and the
+peak memory allocated while parsing one page. The memory is measured with
+tracemalloc, so what libxml2 allocates when lxml is the BeautifulSoup
+tree builder is not counted; selectolax allocates through Python and is.
+
+    python -m app.benchmarks.parsers [--number 200] [--catalog PATH]
+        [--book PATH]
+"""
+import argparse
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.scraping.fetchers import HTML_PARSER
+from app.scraping.parsers import (
+    HTMLParser,
+    PARSER_BACKENDS,
+    parse_book_detail,
+    parse_catalog,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def available_backends() -> List[str]:
+    return [
+        backend for backend in PARSER_BACKENDS
+        if backend != "selectolax" or HTMLParser is not None
+    ]
+
+
+def peak_kb(parse: Callable[[], object]) -> float:
+    # Leave out one-off allocations such as compiled selectors
+    parse()
+    tracemalloc.start()
+    try:
+        parse()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def measure(html: str, parse: Callable, backend: str, number: int) -> Dict:
+    seconds = timeit.timeit(lambda: parse(html, backend), number=number)
+    return {
+        "pages_per_sec": number / seconds,
+        "peak_kb": peak_kb(lambda: parse(html, backend)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200,
+                        help="parses per measurement")
+    parser.add_argument("--catalog", type=Path,
+                        default=FIXTURES / "catalog_page.html",
+                        help="saved catalog page")
+    parser.add_argument("--book", type=Path,
+                        default=FIXTURES / "book_page.html",
+                        help="saved book detail page")
+    args = parser.parse_args()
+
+    pages = [
+        ("catalog", args.catalog.read_text(encoding="utf-8"), parse_catalog),
+        ("book", args.book.read_text(encoding="utf-8"), parse_book_detail),
+    ]
+    print(f"BeautifulSoup tree builder: {HTML_PARSER}")
+    print(f"{'page':<9}{'backend':<12}{'pages/s':>10}{'peak KB':>10}")
+    for name, html, parse in pages:
+        for backend in available_backends():
+            result = measure(html, parse, backend, args.number)
+            print(
+                f"{name:<9}{backend:<12}{result['pages_per_sec']:>10,.0f}"
+                f"{result['peak_kb']:>10.1f}"
+            )
+    missing = set(PARSER_BACKENDS) - set(available_backends())
+    for backend in sorted(missing):
+        print(f"{backend}: skipped, not installed (pip install {backend})")
+
+
+if __name__ == "__main__":
+    main()
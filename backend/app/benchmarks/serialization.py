@@ -0,0 +1,68 @@
+"""Compare the Pydantic and the fast serialization paths of /books.
+
+The Pydantic path validates every book as models.Book, dumps the
+response model and encodes it with the stdlib json module, as
+flask-restful does. The fast path shapes plain dicts and encodes them
+with app.serialization.dumps (orjson when installed).
+
+    python -m app.benchmarks.serialization [--number 200]
+"""
+import argparse
+import json
+import timeit
+from typing import Dict, List
+
+from app.benchmarks.storage_encoding import sample_books
+from app.models import Book, PaginatedBooksResponse
+from app.serialization import book_payload, dumps
+
+PAGE_SIZES = (100, 1000)
+
+
+def with_ids(books: List[Dict]) -> List[Dict]:
+    return [dict(book, id=str(i)) for i, book in enumerate(books)]
+
+
+def pydantic_page(books: List[Dict]) -> bytes:
+    response = PaginatedBooksResponse(
+        message="Success", total_books=len(books), page=1,
+        page_size=len(books), data=[Book(**book) for book in books],
+    )
+    return json.dumps(response.model_dump()).encode("utf-8")
+
+
+def fast_page(books: List[Dict]) -> bytes:
+    return dumps({
+        "message": "Success",
+        "total_books": len(books),
+        "page": 1,
+        "page_size": len(books),
+        "data": [book_payload(book) for book in books],
+        "next_cursor": None,
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200,
+                        help="responses serialized per measurement")
+    args = parser.parse_args()
+
+    print(
+        f"{'page size':<10}{'pydantic ms':>14}{'fast ms':>10}"
+        f"{'speedup':>10}"
+    )
+    for size in PAGE_SIZES:
+        books = with_ids(sample_books(size))
+        slow = timeit.timeit(
+            lambda: pydantic_page(books), number=args.number
+        )
+        fast = timeit.timeit(lambda: fast_page(books), number=args.number)
+        print(
+            f"{size:<10}{slow * 1000 / args.number:>14.3f}"
+            f"{fast * 1000 / args.number:>10.3f}{slow / fast:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
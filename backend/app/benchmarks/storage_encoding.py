@@ -0,0 +1,136 @@
+"""Compare the book storage encodings of app.redis_storage.
+
+Reports the stored size and decode throughput per encoding. With --redis
+it also writes the books under a scratch prefix and reports Redis'
+MEMORY USAGE per key, then removes them.
+
+    python -m app.benchmarks.storage_encoding [--books 1000] [--redis]
+"""
+import argparse
+import random
+import timeit
+from typing import Dict, List
+
+from app.redis_storage import (
+    BOOK_ENCODINGS,
+    decode_book,
+    decode_book_hash,
+    encode_book,
+    get_redis,
+)
+
+CATEGORIES = [
+    "Poetry", "Historical Fiction", "Mystery", "Young Adult",
+    "Science Fiction", "Childrens", "Nonfiction", "Sequential Art",
+]
+SCRATCH_PREFIX = "bench:book:"
+
+
+def sample_books(count: int, seed: int = 42) -> List[Dict]:
+    rng = random.Random(seed)
+    books = []
+    for i in range(count):
+        slug = f"sample-book-title-number-{i}_{1000 + i}"
+        books.append({
+            "url": f"https://books.toscrape.com/catalogue/{slug}/index.html",
+            "title": f"Sample Book Title Number {i}: A Novel",
+            "price": f"{rng.uniform(10, 20):.2f}",
+            "category": rng.choice(CATEGORIES),
+            "image_url": (
+                "https://books.toscrape.com/media/cache/"
+                f"{rng.getrandbits(128):032x}.jpg"
+            ),
+        })
+    return books
+
+
+def as_hash_fields(book: Dict) -> Dict[bytes, bytes]:
+    return {
+        name.encode("utf-8"): str(value).encode("utf-8")
+        for name, value in book.items() if value is not None
+    }
+
+
+def measure(books: List[Dict], encoding: str, number: int) -> Dict:
+    if encoding == "hash":
+        stored = [as_hash_fields(book) for book in books]
+        size = sum(
+            len(name) + len(value)
+            for fields in stored for name, value in fields.items()
+        )
+
+        def decode_all():
+            for fields in stored:
+                decode_book_hash(fields)
+    else:
+        stored = [encode_book(book, encoding) for book in books]
+        stored = [
+            value.encode("utf-8") if isinstance(value, str) else value
+            for value in stored
+        ]
+        size = sum(len(value) for value in stored)
+
+        def decode_all():
+            for value in stored:
+                decode_book(value)
+
+    seconds = timeit.timeit(decode_all, number=number)
+    return {
+        "bytes_per_book": size / len(books),
+        "decodes_per_sec": len(books) * number / seconds,
+    }
+
+
+def redis_memory_per_book(books: List[Dict], encoding: str) -> float:
+    r = get_redis()
+    keys = [f"{SCRATCH_PREFIX}{encoding}:{i}" for i in range(len(books))]
+    pipe = r.pipeline(transaction=False)
+    for key, book in zip(keys, books):
+        if encoding == "hash":
+            pipe.hset(key, mapping={
+                name: value for name, value in book.items()
+                if value is not None
+            })
+        else:
+            pipe.set(key, encode_book(book, encoding))
+    pipe.execute()
+    try:
+        for key in keys:
+            pipe.memory_usage(key)
+        return sum(pipe.execute()) / len(keys)
+    finally:
+        r.delete(*keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=20,
+                        help="decode passes over all books")
+    parser.add_argument("--redis", action="store_true",
+                        help="also measure MEMORY USAGE in Redis")
+    args = parser.parse_args()
+
+    books = sample_books(args.books)
+    header = f"{'encoding':<14}{'bytes/book':>12}{'decodes/s':>14}"
+    if args.redis:
+        header += f"{'redis bytes/book':>18}"
+    print(header)
+
+    for encoding in BOOK_ENCODINGS:
+        try:
+            result = measure(books, encoding, args.number)
+        except RuntimeError as e:
+            print(f"{encoding:<14}skipped: {e}")
+            continue
+        line = (
+            f"{encoding:<14}{result['bytes_per_book']:>12.1f}"
+            f"{result['decodes_per_sec']:>14,.0f}"
+        )
+        if args.redis:
+            line += f"{redis_memory_per_book(books, encoding):>18.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
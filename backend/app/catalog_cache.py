@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+import redis
+from dotenv import load_dotenv
+
+from app.redis_storage import (
+    CATALOG_CHANNEL,
+    BookIdsPage,
+    get_books_map,
+    get_catalog_version,
+    get_redis,
+    query_book_ids,
+)
+
+load_dotenv()
+
+
+class CatalogCache:
+    """Read-through, per-process cache of decoded books and /books queries.
+
+    Entries stay valid until a new catalog version is announced on
+    CATALOG_CHANNEL. Loads that started before an invalidation are not
+    stored, so a slow read can never put an old version back in the cache.
+    """
+
+    def __init__(self, max_books: int = 10000, max_queries: int = 1000):
+        self.max_books = max_books
+        self.max_queries = max_queries
+        self.version: Optional[int] = None
+        self._books: Dict[str, Dict] = {}
+        self._queries: "OrderedDict[Hashable, BookIdsPage]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    # --- Invalidation ---
+    def invalidate(self, version: Optional[int] = None) -> None:
+        with self._lock:
+            self._books.clear()
+            self._queries.clear()
+            self._generation += 1
+            self.version = version
+        logging.info(f"Catalog cache invalidated (version {version}).")
+
+    def start_listener(self, retry_delay: float = 5) -> None:
+        if self._listener is not None:
+            return
+        self._listener = threading.Thread(
+            target=self._listen, args=(retry_delay,),
+            name="catalog-cache-listener", daemon=True
+        )
+        self._listener.start()
+
+    def _listen(self, retry_delay: float) -> None:
+        while True:
+            try:
+                r = get_redis()
+                pubsub = r.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CATALOG_CHANNEL)
+                # Announcements made while we were not subscribed are lost
+                self.invalidate(get_catalog_version(r))
+                for message in pubsub.listen():
+                    self.invalidate(int(message["data"]))
+            except redis.RedisError as e:
+                logging.warning(f"Catalog cache listener error: {e}")
+                time.sleep(retry_delay)
+
+    # --- Reads ---
+    def query_book_ids(self, r: redis.Redis, **query) -> BookIdsPage:
+        key = tuple(sorted(query.items()))
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+            generation = self._generation
+
+        ids_page = query_book_ids(r, **query)
+
+        with self._lock:
+            if generation == self._generation:
+                self._queries[key] = ids_page
+                if len(self._queries) > self.max_queries:
+                    self._queries.popitem(last=False)
+        return ids_page
+
+    def get_books_by_ids(self, r: redis.Redis, ids: List[str]) -> List[Dict]:
+        with self._lock:
+            books = {
+                book_id: self._books[book_id]
+                for book_id in ids if book_id in self._books
+            }
+            generation = self._generation
+
+        missing = [book_id for book_id in ids if book_id not in books]
+        if missing:
+            loaded = get_books_map(r, missing)
+            books.update(loaded)
+            with self._lock:
+                room = self.max_books - len(self._books)
+                if generation == self._generation and room > 0:
+                    self._books.update(list(loaded.items())[:room])
+
+        return [books[book_id] for book_id in ids if book_id in books]
+
+
+_catalog_cache: Optional[CatalogCache] = None
+_catalog_cache_lock = threading.Lock()
+
+
+def get_catalog_cache() -> Optional[CatalogCache]:
+    """Return this process's cache, or None unless CATALOG_CACHE_ENABLED."""
+    global _catalog_cache
+    if os.getenv("CATALOG_CACHE_ENABLED", "false").lower() != "true":
+        return None
+    if _catalog_cache is None:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                cache = CatalogCache()
+                cache.start_listener()
+                _catalog_cache = cache
+    return _catalog_cache
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import redis
+
+# --- Keys ---
+HEADLINES_KEY_PREFIX = "hn:page:"
+REFRESH_LOCK_PREFIX = "hn:refreshing:"
+SCORES_KEY_PREFIX = "hn:scores:"
+STORIES_KEY = "hn:stories"
+LAST_SEEN_KEY = "hn:last_seen"
+TRENDING_KEY = "hn:trending"
+
+# Pages scraped by the periodic refresh, see tasks.refresh_headlines_task
+DEFAULT_REFRESH_PAGES = 3
+# Seconds after which a snapshot is served but refreshed in the background
+DEFAULT_STALE_AFTER = 300
+# Pages /headlines accepts in one request (pages=1-5)
+MAX_PAGES_PER_REQUEST = 10
+
+# Score samples older than this many seconds are dropped, and stories not
+# seen on a page for as long leave the trending ranking
+DEFAULT_SCORES_RETENTION = 24 * 3600
+# Seconds of samples the score velocity is computed over
+DEFAULT_TRENDING_WINDOW = 3600
+# Shortest span of samples that gives a meaningful velocity
+MIN_VELOCITY_SPAN = 60
+
+# Upper bound of one background refresh, so a lost task does not block
+# later refreshes of the same page for long
+REFRESH_LOCK_TTL = 120
+
+
+class HeadlinesSnapshot(NamedTuple):
+    stories: List[Dict]
+    fetched_at: float
+
+
+def get_refresh_pages() -> int:
+    return int(os.getenv("HN_REFRESH_PAGES", DEFAULT_REFRESH_PAGES))
+
+
+def get_stale_after() -> int:
+    return int(os.getenv("HN_STALE_AFTER", DEFAULT_STALE_AFTER))
+
+
+def get_scores_retention() -> int:
+    return int(os.getenv("HN_SCORES_RETENTION", DEFAULT_SCORES_RETENTION))
+
+
+def get_trending_window() -> int:
+    return int(os.getenv("HN_TRENDING_WINDOW", DEFAULT_TRENDING_WINDOW))
+
+
+def headlines_key(page: int) -> str:
+    return f"{HEADLINES_KEY_PREFIX}{page}"
+
+
+def story_id_from_url(url: str) -> str:
+    return hashlib.md5(url.encode('utf-8')).hexdigest()
+
+
+def scores_key(story_id: str) -> str:
+    return f"{SCORES_KEY_PREFIX}{story_id}"
+
+
+def save_headlines(
+    r: redis.Redis, page: int, stories: List[Dict],
+    fetched_at: Optional[float] = None
+) -> HeadlinesSnapshot:
+    """Store the stories of one page with the time they were scraped, and
+    record their scores for the trending ranking."""
+    snapshot = HeadlinesSnapshot(stories, fetched_at or time.time())
+    r.set(headlines_key(page), json.dumps(snapshot._asdict()))
+    record_scores(r, stories, snapshot.fetched_at)
+    return snapshot
+
+
+def record_scores(r: redis.Redis, stories: List[Dict], now: float) -> None:
+    """Add a (time, score) sample per story and update its velocity.
+
+    Samples live in one sorted set per story, scored by time, and are
+    trimmed to HN_SCORES_RETENTION. The velocity in points per hour over
+    the last HN_TRENDING_WINDOW seconds is kept in ``hn:trending``, so
+    /headlines/trending is a single ZREVRANGE. Stories that were not on
+    the pages during the window leave the ranking.
+    """
+    if not stories:
+        return
+    retention = get_scores_retention()
+    window = get_trending_window()
+    ids = [story_id_from_url(story["url"]) for story in stories]
+
+    pipe = r.pipeline(transaction=False)
+    for story_id, story in zip(ids, stories):
+        key = scores_key(story_id)
+        # Members must be unique, so the time is part of the sample
+        pipe.zadd(key, {f"{now}:{story['score']}": now})
+        pipe.zremrangebyscore(key, "-inf", now - retention)
+        pipe.expire(key, retention)
+        pipe.hset(STORIES_KEY, story_id, json.dumps(story))
+        pipe.zadd(LAST_SEEN_KEY, {story_id: now})
+    for story_id in ids:
+        pipe.zrangebyscore(
+            scores_key(story_id), now - window, "+inf", withscores=True
+        )
+    samples = pipe.execute()[-len(ids):]
+
+    velocities = {}
+    unranked = []
+    for story_id, story_samples in zip(ids, samples):
+        velocity = score_velocity(story_samples)
+        if velocity is not None:
+            velocities[story_id] = velocity
+        else:
+            unranked.append(story_id)
+
+    pipe = r.pipeline(transaction=False)
+    if velocities:
+        pipe.zadd(TRENDING_KEY, velocities)
+    # A story not seen on the pages within the window is no longer
+    # rising, whatever its last velocity; after the retention it is
+    # forgotten altogether
+    unseen = r.zrangebyscore(
+        LAST_SEEN_KEY, "-inf", now - window, withscores=True
+    )
+    unranked.extend(story_id for story_id, _ in unseen)
+    expired = [
+        story_id for story_id, seen_at in unseen
+        if seen_at <= now - retention
+    ]
+    if unranked:
+        pipe.zrem(TRENDING_KEY, *unranked)
+    if expired:
+        pipe.zrem(LAST_SEEN_KEY, *expired)
+        pipe.hdel(STORIES_KEY, *expired)
+    pipe.execute()
+
+
+def score_velocity(samples: List) -> Optional[float]:
+    """Points per hour between the first and last (member, time) sample,
+    or None when they are too close together."""
+    if len(samples) < 2:
+        return None
+    (first, first_at), (last, last_at) = samples[0], samples[-1]
+    span = last_at - first_at
+    if span < MIN_VELOCITY_SPAN:
+        return None
+    gained = _sample_score(last) - _sample_score(first)
+    return gained * 3600 / span
+
+
+def _sample_score(member) -> int:
+    if isinstance(member, bytes):
+        member = member.decode('utf-8')
+    return int(member.rsplit(":", 1)[1])
+
+
+def get_trending(r: redis.Redis, limit: int) -> List[Dict]:
+    """Return the stories with the highest score velocity first."""
+    ranked = r.zrevrange(TRENDING_KEY, 0, limit - 1, withscores=True)
+    if not ranked:
+        return []
+    stories = r.hmget(STORIES_KEY, [story_id for story_id, _ in ranked])
+    return [
+        dict(json.loads(story), velocity=round(velocity, 2))
+        for (_, velocity), story in zip(ranked, stories) if story
+    ]
+
+
+def get_many_headlines(
+    r: redis.Redis, pages: List[int]
+) -> Dict[int, Optional[HeadlinesSnapshot]]:
+    """Read the snapshots of several pages in one round trip."""
+    snapshots = r.mget([headlines_key(page) for page in pages])
+    return {
+        page: HeadlinesSnapshot(**json.loads(snapshot)) if snapshot else None
+        for page, snapshot in zip(pages, snapshots)
+    }
+
+
+def parse_pages(value: str) -> List[int]:
+    """Parse a page number or an inclusive range such as ``1-5``."""
+    first, _, last = value.partition("-")
+    try:
+        pages = list(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise ValueError(f"Invalid pages {value!r}, expected e.g. 1-5")
+    if not pages or pages[0] < 1:
+        raise ValueError(f"Invalid pages {value!r}, expected e.g. 1-5")
+    if len(pages) > MAX_PAGES_PER_REQUEST:
+        raise ValueError(
+            f"At most {MAX_PAGES_PER_REQUEST} pages per request"
+        )
+    return pages
+
+
+def merge_stories(pages: List[List[Dict]]) -> List[Dict]:
+    """Concatenate pages in order, keeping the first copy of a story that
+    moved across a page boundary between scrapes."""
+    seen = set()
+    stories = []
+    for page in pages:
+        for story in page:
+            if story["url"] not in seen:
+                seen.add(story["url"])
+                stories.append(story)
+    return stories
+
+
+def is_stale(
+    snapshot: HeadlinesSnapshot, now: Optional[float] = None
+) -> bool:
+    now = time.time() if now is None else now
+    return now - snapshot.fetched_at > get_stale_after()
+
+
+def claim_refresh(r: redis.Redis, page: int) -> bool:
+    """Return True for the one caller that should refresh the page.
+
+    Concurrent requests seeing the same stale snapshot would otherwise each
+    queue a scrape. The claim expires on its own and is released when the
+    refresh stores the page.
+    """
+    return bool(r.set(
+        f"{REFRESH_LOCK_PREFIX}{page}", 1, nx=True, ex=REFRESH_LOCK_TTL
+    ))
+
+
+def release_refresh(r: redis.Redis, page: int) -> None:
+    r.delete(f"{REFRESH_LOCK_PREFIX}{page}")
@@ -0,0 +1,25 @@
+import hashlib
+import json
+
+from flask import Response, request
+from werkzeug.http import quote_etag
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def etag_matches(etag: str) -> bool:
+    return request.if_none_match.contains(etag)
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": quote_etag(etag)}
@@ -1,21 +1,40 @@
 import json
 import logging
-import os
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 
-import redis
 import requests
 from dotenv import load_dotenv
-from flask import Flask, request
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
 from flask_restful import Api, Resource
 from flasgger import Swagger
 
 from app.loggin_config import setup_logging
-from app.scraping.scrape_hn import get_hackernews_top_stories
-from app.tasks import scrape_books_task
+from app.scraping.checkpoints import CrawlCheckpoint, new_run_id
+from app.scraping.scrape_hn import (
+    get_hackernews_top_stories,
+    scrape_time_budget,
+)
+from app.tasks import refresh_headlines_task, scrape_books_task
+from app import hn_storage, redis_storage
+from app.catalog_cache import get_catalog_cache
+from app.singleflight import SingleFlight
+from app.http_cache import etag_headers, etag_matches, make_etag, not_modified
+from app.serialization import (
+    book_payload,
+    fast_serialization_enabled,
+    json_response,
+    story_payload,
+)
+from app.redis_storage import InvalidQuery, get_redis
 from app.models import PaginatedBooksResponse
+from app.models import CatalogFacetsResponse
+from app.models import BooksByIdResponse
 from app.models import HackerNewsResponse
 from app.models import HackerNewsStory
+from app.models import TrendingResponse
 
 # --- Config logging ---
 setup_logging("app")
@@ -32,6 +51,24 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 # Start Swagger
 swagger = Swagger(app)
 
+# Coalesces concurrent scrapes of the same Hacker News page. The lock is
+# held, and waited for, as long as the slowest scrape may take, plus a
+# few seconds to store its result
+HEADLINES_FLIGHT_TTL = math.ceil(scrape_time_budget()) + 5
+headlines_flight = SingleFlight(
+    lock_ttl=HEADLINES_FLIGHT_TTL, wait_timeout=HEADLINES_FLIGHT_TTL
+)
+
+# Default and upper bound of /headlines/trending?limit=
+DEFAULT_TRENDING_LIMIT = 10
+MAX_TRENDING_LIMIT = 100
+
+# Hacker News pages scraped at once by a /headlines request
+HEADLINES_FETCH_WORKERS = 4
+
+# Upper bound of /books/by-id, fetched with a single MGET
+MAX_BOOK_IDS_PER_LOOKUP = redis_storage.READ_BATCH_SIZE
+
 
 class HelloWorld(Resource):
     def get(self):
@@ -73,10 +110,26 @@ class HelloWorld(Resource):
                   "path": "/headlines",
                   "description": "Get HN headlines with optional pagination."
                   },
+                {
+                  "path": "/headlines/trending",
+                  "description": "HN stories gaining points fastest."
+                  },
                 {
                   "path": "/books",
                   "description": "Retrieve books information."
                   },
+                {
+                  "path": "/books/facets",
+                  "description": "Category counts and price statistics."
+                  },
+                {
+                  "path": "/books/export",
+                  "description": "Stream the whole catalog as NDJSON."
+                  },
+                {
+                  "path": "/books/by-id",
+                  "description": "Fetch specific books by ID."
+                  },
                 {
                   "path": "/status/<task_id>",
                   "description": "Check the status of a specific task."
@@ -97,7 +150,15 @@ class Init(Resource):
     def post(self):
         """
         Starts the book scraping task.
+
+        Each run checkpoints its progress under its run ID; an interrupted
+        run is continued by passing its ID as resume.
         ---
+        parameters:
+          - name: resume
+            in: query
+            type: string
+            description: ID of the run to resume instead of starting a new one
         responses:
           200:
             description: Starts the book scraping task
@@ -110,6 +171,11 @@ class Init(Resource):
                 task_id:
                   type: string
                   example: some_task_id
+                run_id:
+                  type: string
+                  example: 3f2b9c0e8d6a4b1f9e7c5a3d2b1f0e9c
+          404:
+            description: No checkpoint for the run to resume
           500:
             description: Error starting the task
             schema:
@@ -119,11 +185,17 @@ class Init(Resource):
                   type: string
                   example: Error starting the task!
         """
+        run_id = request.args.get("resume")
         try:
-            task = scrape_books_task.delay()
+            if run_id is None:
+                run_id = new_run_id()
+            elif not CrawlCheckpoint.exists(get_redis(), run_id):
+                return {"message": f"No scraping run {run_id} to resume"}, 404
+            task = scrape_books_task.delay(run_id=run_id)
             return {
                 "message": "Books Scraping Started!",
                 "task_id": task.id,
+                "run_id": run_id,
             }
         except Exception:
             return {
@@ -135,6 +207,10 @@ class Headlines(Resource):
     def get(self):
         """
         Get Hacker News headlines with optional pagination.
+
+        Served from the snapshot stored by the periodic refresh task. A
+        stale snapshot is still served while it is refreshed in the
+        background.
         ---
         parameters:
           - name: page
@@ -142,6 +218,16 @@ class Headlines(Resource):
             type: integer
             default: 1
             description: Page number for pagination
+          - name: pages
+            in: query
+            type: string
+            description: >
+              Range of pages merged into one list, e.g. 1-5 (at most 10).
+              Takes precedence over page
+          - name: If-None-Match
+            in: header
+            type: string
+            description: ETag of a previous response
         responses:
           200:
             description: List of Hacker News top stories
@@ -162,6 +248,10 @@ class Headlines(Resource):
                       url:
                         type: string
                         example: https://news.ycombinator.com/item?id=1234567
+          304:
+            description: Headlines unchanged since the given ETag
+          400:
+            description: Invalid pages
           500:
             description: Error retrieving headlines
             schema:
@@ -171,14 +261,28 @@ class Headlines(Resource):
                   type: string
                   example: Error getting the news
         """
-        page = request.args.get("page", 1)
+        page = request.args.get("page", 1, type=int)
+        try:
+            pages = hn_storage.parse_pages(
+                request.args.get("pages", str(page))
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
         try:
-            stories = get_hackernews_top_stories(page)
+            stories = load_headlines(get_redis(), pages)
+            etag = make_etag(stories)
+            if etag_matches(etag):
+                return not_modified(etag)
+            if fast_serialization_enabled():
+                return json_response({
+                    "message": "Success!",
+                    "data": [story_payload(story) for story in stories],
+                }, headers=etag_headers(etag))
             response = HackerNewsResponse(
                 message="Success!",
                 data=[HackerNewsStory(**story) for story in stories]
             )
-            return response.model_dump()  # Actualizado a model_dump()
+            return response.model_dump(), 200, etag_headers(etag)
         except Exception as e:
             logging.error(f"Error getting the news {e}")
             return {
@@ -186,6 +290,128 @@ class Headlines(Resource):
             }, 500
 
 
+def scrape_headlines(r, page: int) -> List[Dict]:
+    stories = get_hackernews_top_stories(page)
+    hn_storage.save_headlines(r, page, stories)
+    return stories
+
+
+def scrape_headlines_once(r, page: int) -> List[Dict]:
+    """Scrape a page not in Redis yet, once for all concurrent requests.
+
+    A request that gives up waiting for another one's scrape serves the
+    page if that scrape stored it by then, and fails otherwise; it never
+    scrapes the page too.
+    """
+    try:
+        return headlines_flight.do(
+            hn_storage.headlines_key(page),
+            lambda: scrape_headlines(r, page), r
+        )
+    except TimeoutError:
+        snapshot = hn_storage.get_many_headlines(r, [page])[page]
+        if snapshot is None:
+            raise
+        return snapshot.stories
+
+
+def load_headlines(r, pages: List[int]) -> List[Dict]:
+    """Return the stories of the given pages merged in page order.
+
+    Stored pages are read in one round trip and stale ones are refreshed
+    in the background. Only pages never stored are scraped here, in
+    parallel.
+    """
+    snapshots = hn_storage.get_many_headlines(r, pages)
+    missing = [page for page in pages if snapshots[page] is None]
+    stale = [
+        page for page in pages
+        if snapshots[page] is not None
+        and hn_storage.is_stale(snapshots[page])
+        and hn_storage.claim_refresh(r, page)
+    ]
+    if stale:
+        queue_headlines_refresh(stale)
+
+    scraped = {}
+    if len(missing) == 1:
+        scraped[missing[0]] = scrape_headlines_once(r, missing[0])
+    elif missing:
+        workers = min(HEADLINES_FETCH_WORKERS, len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(
+                lambda page: scrape_headlines_once(r, page), missing
+            )
+            scraped = dict(zip(missing, results))
+
+    return hn_storage.merge_stories([
+        scraped[page] if page in scraped else snapshots[page].stories
+        for page in pages
+    ])
+
+
+def queue_headlines_refresh(pages: List[int]) -> None:
+    """Refresh stale pages in the worker; the stale pages are served
+    meanwhile."""
+    try:
+        refresh_headlines_task.delay(pages)
+    except Exception as e:
+        logging.warning(f"Could not queue the headlines refresh: {e}")
+
+
+class TrendingHeadlines(Resource):
+    def get(self):
+        """
+        Hacker News stories ranked by how fast their score is rising.
+        ---
+        parameters:
+          - name: limit
+            in: query
+            type: integer
+            default: 10
+            description: Number of stories returned (at most 100)
+        responses:
+          200:
+            description: >
+              Stories by score velocity in points per hour, computed from
+              the scores recorded at each scrape. Stories need two scrapes
+              at least a minute apart to be ranked.
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: Success!
+                data:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      title:
+                        type: string
+                      url:
+                        type: string
+                      score:
+                        type: integer
+                      velocity:
+                        type: number
+                        example: 42.5
+          500:
+            description: Error retrieving trending headlines
+        """
+        limit = request.args.get("limit", DEFAULT_TRENDING_LIMIT, type=int)
+        limit = max(1, min(limit, MAX_TRENDING_LIMIT))
+        try:
+            stories = hn_storage.get_trending(get_redis(), limit)
+            response = TrendingResponse(message="Success!", data=stories)
+            return response.model_dump()
+        except Exception as e:
+            logging.error(f"Error getting the trending news {e}")
+            return {
+                "message": "Error getting the trending news",
+            }, 500
+
+
 class Books(Resource):
     def get(self):
         """
@@ -209,7 +435,33 @@ class Books(Resource):
           - name: category
             in: query
             type: string
-            description: Filter books by category
+            description: Filter books by category (case-insensitive)
+          - name: min_price
+            in: query
+            type: number
+            description: Only books costing at least this much
+          - name: max_price
+            in: query
+            type: number
+            description: Only books costing at most this much
+          - name: sort
+            in: query
+            type: string
+            enum: [price, -price, title]
+            description: >
+              Sort by ascending price, descending price or title.
+              Defaults to catalog order.
+          - name: cursor
+            in: query
+            type: string
+            description: >
+              Opaque cursor from a previous response's next_cursor.
+              When given, the page starts after that book and page is
+              ignored.
+          - name: If-None-Match
+            in: header
+            type: string
+            description: ETag of a previous response
         responses:
           200:
             description: Paginated list of books
@@ -228,6 +480,9 @@ class Books(Resource):
                 page_size:
                   type: integer
                   example: 10
+                next_cursor:
+                  type: string
+                  description: Cursor for the next page, null on the last one
                 data:
                   type: array
                   items:
@@ -242,6 +497,10 @@ class Books(Resource):
                       category:
                         type: string
                         example: Fiction
+          304:
+            description: Catalog unchanged since the given ETag
+          400:
+            description: Invalid cursor or sort
           500:
             description: Error retrieving books
             schema:
@@ -255,40 +514,253 @@ class Books(Resource):
         limit = int(request.args.get("limit", 10))
         search = request.args.get("search", "").lower()
         category = request.args.get("category", "").lower()
+        cursor = request.args.get("cursor")
+        min_price = request.args.get("min_price", type=float)
+        max_price = request.args.get("max_price", type=float)
+        sort = request.args.get("sort", "")
 
         try:
-            redis_host = os.getenv("REDIS_HOST", "redis")
-            redis_port = int(os.getenv("REDIS_PORT", 6379))
-            redis_db = int(os.getenv("REDIS_DB", 0))
-            r = redis.Redis(host=redis_host, port=redis_port, db=redis_db)
+            r = get_redis()
+            # The per-process cache mirrors the redis_storage read helpers
+            cache = get_catalog_cache()
+            reader = cache or redis_storage
+
+            version = cache.version if cache else None
+            if version is None:
+                version = redis_storage.get_catalog_version(r)
+            etag = make_etag(version, sorted(request.args.items(multi=True)))
+            if etag_matches(etag):
+                return not_modified(etag)
+
+            try:
+                ids_page = reader.query_book_ids(
+                    r,
+                    search=search,
+                    category=category,
+                    min_price=min_price,
+                    max_price=max_price,
+                    sort=sort,
+                    start=(page - 1) * limit,
+                    limit=limit,
+                    cursor=cursor,
+                )
+            except InvalidQuery as e:
+                return {"message": str(e)}, 400
+            paginated_books = reader.get_books_by_ids(r, ids_page.ids)
+
+            if fast_serialization_enabled():
+                return json_response({
+                    "message": "Success",
+                    "total_books": ids_page.total,
+                    "page": page,
+                    "page_size": limit,
+                    "data": [book_payload(book) for book in paginated_books],
+                    "next_cursor": ids_page.next_cursor,
+                }, headers=etag_headers(etag))
+            response = PaginatedBooksResponse(
+                message="Success",
+                total_books=ids_page.total,
+                page=page,
+                page_size=limit,
+                data=paginated_books,
+                next_cursor=ids_page.next_cursor
+            )
+            return response.model_dump(), 200, etag_headers(etag)
 
-            keys = r.keys("book:*")
-            books = []
+        except Exception as e:
+            logging.error(f"Error retrieving books from Redis: {e}")
+            return {
+                "message": "Error retrieving books from Redis",
+            }, 500
 
-            for key in keys:
-                data = r.get(key)
-                if data:
-                    book = json.loads(data)
 
-                    if search and search not in book["title"].lower():
-                        continue
-                    if category and category not in book["category"].lower():
-                        continue
+class BooksFacets(Resource):
+    def get(self):
+        """
+        Per-category counts and price statistics of the catalog.
+        ---
+        responses:
+          200:
+            description: >
+              Facets computed when the last scrape was stored. Price
+              statistics are null while the catalog is empty.
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: Success
+                total_books:
+                  type: integer
+                  example: 100
+                price:
+                  type: object
+                  properties:
+                    min:
+                      type: number
+                    max:
+                      type: number
+                    mean:
+                      type: number
+                    p25:
+                      type: number
+                    p50:
+                      type: number
+                    p75:
+                      type: number
+                    p90:
+                      type: number
+                categories:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      name:
+                        type: string
+                        example: Poetry
+                      count:
+                        type: integer
+                        example: 7
+                      price:
+                        type: object
+                updated_at:
+                  type: string
+                  example: "2025-04-20T10:00:00+00:00"
+          304:
+            description: Facets unchanged since the given ETag
+          500:
+            description: Error retrieving facets
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: Error retrieving facets from Redis
+        """
+        try:
+            facets = redis_storage.get_catalog_facets(get_redis()) or {
+                "total_books": 0,
+                "categories": [],
+            }
+            etag = make_etag(facets)
+            if etag_matches(etag):
+                return not_modified(etag)
+            response = CatalogFacetsResponse(message="Success", **facets)
+            return response.model_dump(), 200, etag_headers(etag)
+        except Exception as e:
+            logging.error(f"Error retrieving facets from Redis: {e}")
+            return {
+                "message": "Error retrieving facets from Redis",
+            }, 500
 
-                    books.append(book)
 
-            start = (page - 1) * limit
-            end = start + limit
-            paginated_books = books[start:end]
-            response = PaginatedBooksResponse(
+class BooksById(Resource):
+    def get(self):
+        """
+        Fetch specific books by ID, in request order.
+        ---
+        parameters:
+          - name: ids
+            in: query
+            type: string
+            required: true
+            description: >
+              Comma-separated book IDs (the "id" of listed books),
+              at most 500
+        responses:
+          200:
+            description: Books found, in request order, and unknown IDs
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: Success
+                data:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      id:
+                        type: string
+                        example: 0b3cce16f0fdff416633451ebd101534
+                      title:
+                        type: string
+                        example: Book Title
+                missing:
+                  type: array
+                  items:
+                    type: string
+          400:
+            description: No IDs or too many IDs
+          500:
+            description: Error retrieving books
+        """
+        ids = [
+            book_id.strip()
+            for value in request.args.getlist("ids")
+            for book_id in value.split(",") if book_id.strip()
+        ]
+        return self.lookup(ids)
+
+    def post(self):
+        """
+        Fetch specific books by ID, for lists too long for a query string.
+        ---
+        parameters:
+          - name: body
+            in: body
+            required: true
+            schema:
+              type: object
+              properties:
+                ids:
+                  type: array
+                  items:
+                    type: string
+        responses:
+          200:
+            description: Same response as GET /books/by-id
+          400:
+            description: No IDs or too many IDs
+          500:
+            description: Error retrieving books
+        """
+        body = request.get_json(silent=True) or {}
+        ids = body.get("ids") if isinstance(body, dict) else None
+        if not isinstance(ids, list) or not all(
+            isinstance(book_id, str) for book_id in ids
+        ):
+            return {"message": "Body must be {\"ids\": [...]}"}, 400
+        return self.lookup(ids)
+
+    def lookup(self, ids):
+        if not ids:
+            return {"message": "No ids given"}, 400
+        if len(ids) > MAX_BOOK_IDS_PER_LOOKUP:
+            return {
+                "message": (
+                    f"At most {MAX_BOOK_IDS_PER_LOOKUP} ids per request"
+                ),
+            }, 400
+        try:
+            r = get_redis()
+            reader = get_catalog_cache() or redis_storage
+            books = reader.get_books_by_ids(r, ids)
+            found = {book["id"] for book in books}
+            missing = [book_id for book_id in ids if book_id not in found]
+            if fast_serialization_enabled():
+                return json_response({
+                    "message": "Success",
+                    "data": [book_payload(book) for book in books],
+                    "missing": missing,
+                })
+            response = BooksByIdResponse(
                 message="Success",
-                total_books=len(books),
-                page=page,
-                page_size=limit,
-                data=paginated_books
+                data=books,
+                missing=missing
             )
-            return response.model_dump()  # Actualizado a model_dump()
-
+            return response.model_dump()
         except Exception as e:
             logging.error(f"Error retrieving books from Redis: {e}")
             return {
@@ -296,6 +768,48 @@ class Books(Resource):
             }, 500
 
 
+class BooksExport(Resource):
+    def get(self):
+        """
+        Stream the whole catalog as newline-delimited JSON.
+        ---
+        produces:
+          - application/x-ndjson
+        responses:
+          200:
+            description: One JSON book per line, streamed as it is read
+          500:
+            description: Error starting the export
+            schema:
+              type: object
+              properties:
+                message:
+                  type: string
+                  example: Error exporting books from Redis
+        """
+        try:
+            r = get_redis()
+            r.ping()
+        except Exception as e:
+            logging.error(f"Error exporting books from Redis: {e}")
+            return {
+                "message": "Error exporting books from Redis",
+            }, 500
+
+        def generate():
+            try:
+                for book in redis_storage.iter_books(r):
+                    yield json.dumps(book, ensure_ascii=False) + "\n"
+            except Exception as e:
+                # Headers are already sent, so the stream just ends early
+                logging.error(f"Books export interrupted: {e}")
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+        )
+
+
 class TaskStatus(Resource):
     def get(self, task_id):
         """
@@ -406,7 +920,11 @@ class StartInitialBooksScrape(Resource):
 api.add_resource(HelloWorld, "/")
 api.add_resource(Init, "/init")
 api.add_resource(Headlines, "/headlines")
+api.add_resource(TrendingHeadlines, "/headlines/trending")
 api.add_resource(Books, "/books")
+api.add_resource(BooksFacets, "/books/facets")
+api.add_resource(BooksExport, "/books/export")
+api.add_resource(BooksById, "/books/by-id")
 api.add_resource(TaskStatus, "/status/<string:task_id>")
 api.add_resource(StartInitialBooksScrape, "/start-initial-books-scrape")
 
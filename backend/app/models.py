@@ -3,6 +3,7 @@ from typing import Optional, List
 
 
 class Book(BaseModel):
+    id: Optional[str] = None
     title: str
     price: float = Field(..., ge=0)
     category: str
@@ -16,6 +17,37 @@ class PaginatedBooksResponse(BaseModel):
     page: int
     page_size: int
     data: List[Book]
+    next_cursor: Optional[str] = None
+
+
+class BooksByIdResponse(BaseModel):
+    message: str
+    data: List[Book]
+    missing: List[str]
+
+
+class PriceStats(BaseModel):
+    min: float
+    max: float
+    mean: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+
+
+class CategoryFacet(BaseModel):
+    name: str
+    count: int
+    price: Optional[PriceStats] = None
+
+
+class CatalogFacetsResponse(BaseModel):
+    message: str
+    total_books: int
+    price: Optional[PriceStats] = None
+    categories: List[CategoryFacet]
+    updated_at: Optional[str] = None
 
 
 class HackerNewsStory(BaseModel):
@@ -29,6 +61,15 @@ class HackerNewsResponse(BaseModel):
     data: List[HackerNewsStory]
 
 
+class TrendingStory(HackerNewsStory):
+    velocity: float
+
+
+class TrendingResponse(BaseModel):
+    message: str
+    data: List[TrendingStory]
+
+
 class ScrapedBook(BaseModel):
     url: str
     title: str
@@ -37,11 +78,6 @@ class ScrapedBook(BaseModel):
     image_url: Optional[str] = None
 
 
-class ScrapingResult(BaseModel):
-    total_books: int
-    books: List[ScrapedBook]
-
-
 class HNStory(BaseModel):
     title: str
     url: HttpUrl
@@ -1,26 +1,681 @@
+import base64
 import hashlib
 import os
 import json
-from typing import Dict, List
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import (
+    Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+)
 from dotenv import load_dotenv
 import redis
 import logging
 
+# Optional compact encodings, see BOOK_ENCODINGS
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+# --- Keys ---
+BOOK_KEY_PREFIX = "book:"
+CATEGORY_INDEX_PREFIX = "books:category:"
+PRICE_INDEX_KEY = "books:by_price"
+TOTAL_BOOKS_KEY = "books:total"
+TRIGRAM_INDEX_PREFIX = "books:trigram:"
+TITLES_KEY = "books:titles"
+ORDER_KEY = "books:order"
+ORDER_SEQ_KEY = "books:order:seq"
+TITLE_ORDER_KEY = "books:by_title"
+FACETS_KEY = "books:facets"
+CATALOG_VERSION_KEY = "books:version"
+# Temporary sorted sets holding the matches of one filtered /books query
+QUERY_KEY_PREFIX = "books:query:"
+
+# Pub/sub channel announcing a new catalog version
+CATALOG_CHANNEL = "books:updates"
+
+# Length of the n-grams in the title search index
+NGRAM_SIZE = 3
+
+# Price percentiles reported by /books/facets
+FACET_PERCENTILES = (25, 50, 75, 90)
+
+# Commands per pipeline flush / keys per MGET
+WRITE_BATCH_SIZE = 500
+READ_BATCH_SIZE = 500
+# Books a BookSink collects before writing them, during a crawl
+SINK_BATCH_SIZE = 50
+# Seconds a query's temporary sets live should deleting them fail
+QUERY_KEY_TTL = 30
+
+# How book documents are stored, selected with BOOKS_STORAGE_ENCODING:
+# "json" strings, Redis "hash"es, "msgpack" or zstd-compressed msgpack
+BOOK_ENCODINGS = ("json", "hash", "msgpack", "msgpack+zstd")
+DEFAULT_BOOK_ENCODING = "json"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# zstd (de)compressors are reused, but are not safe to share across threads
+_zstd = threading.local()
+
+_pool: Optional[redis.ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+# --- Connection ---
+def get_redis() -> redis.Redis:
+    """Return a client backed by the process-wide connection pool.
+
+    The pool is created on first use, so each API or Celery worker process
+    gets its own (redis-py also resets it after a fork).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                load_dotenv()
+                _pool = redis.ConnectionPool(
+                    host=os.getenv("REDIS_HOST", "redis"),
+                    port=int(os.getenv("REDIS_PORT", 6379)),
+                    db=int(os.getenv("REDIS_DB", 0)),
+                )
+    return redis.Redis(connection_pool=_pool)
+
+
+def book_id_from_url(url: str) -> str:
+    return hashlib.md5(url.encode('utf-8')).hexdigest()
+
+
+def book_key(book_id: str) -> str:
+    return f"{BOOK_KEY_PREFIX}{book_id}"
+
+
+def category_index_key(category: str) -> str:
+    return f"{CATEGORY_INDEX_PREFIX}{category.strip().lower()}"
+
+
+def trigram_index_key(gram: str) -> str:
+    return f"{TRIGRAM_INDEX_PREFIX}{gram}"
+
+
+def title_ngrams(text: str, size: int = NGRAM_SIZE) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+# --- Encoding ---
+def get_book_encoding() -> str:
+    encoding = os.getenv("BOOKS_STORAGE_ENCODING", DEFAULT_BOOK_ENCODING)
+    if encoding not in BOOK_ENCODINGS:
+        raise ValueError(
+            f"Unknown BOOKS_STORAGE_ENCODING {encoding!r}, "
+            f"expected one of {', '.join(BOOK_ENCODINGS)}"
+        )
+    return encoding
+
+
+def encode_book(book: Dict, encoding: str = DEFAULT_BOOK_ENCODING):
+    """Serialize a book for SET; the "hash" encoding is written by HSET."""
+    if encoding == "json":
+        return json.dumps(book, ensure_ascii=False)
+    if msgpack is None:
+        raise RuntimeError(f"The {encoding} encoding requires msgpack")
+    packed = msgpack.packb(book)
+    if encoding == "msgpack+zstd":
+        if zstandard is None:
+            raise RuntimeError(f"The {encoding} encoding requires zstandard")
+        if not hasattr(_zstd, "compressor"):
+            _zstd.compressor = zstandard.ZstdCompressor()
+        return _zstd.compressor.compress(packed)
+    return packed
+
+
+def decode_book(data: bytes) -> Dict:
+    """Decode a stored book whatever string encoding it was written with."""
+    if data[:4] == ZSTD_MAGIC:
+        if not hasattr(_zstd, "decompressor"):
+            _zstd.decompressor = zstandard.ZstdDecompressor()
+        data = _zstd.decompressor.decompress(data)
+    elif data[:1] == b"{":
+        return json.loads(data)
+    return msgpack.unpackb(data)
+
+
+def decode_book_hash(fields: Dict[bytes, bytes]) -> Dict:
+    return {_decode(name): _decode(value) for name, value in fields.items()}
+
+
+class BookSink:
+    """Store books as they are scraped, one pipeline per batch.
+
+    Every flush also updates the total and the catalog version, so /books
+    shows the progress of a long crawl and the API caches drop what they
+    hold. Closing flushes the rest, ranks the titles for sort=title and
+    computes the facets, which both read the whole catalog; until then
+    the new books sort after the ranked ones. Used as a context manager,
+    the books added so far are stored even when the crawl fails.
+    """
+
+    def __init__(
+        self, r: Optional[redis.Redis] = None,
+        batch_size: Optional[int] = None,
+        on_write: Optional[Callable[[List[Dict]], None]] = None
+    ):
+        self.r = r or get_redis()
+        self.encoding = get_book_encoding()
+        self.batch_size = batch_size or SINK_BATCH_SIZE
+        # Called with each batch once it is stored
+        self.on_write = on_write
+        self.written = 0
+        self._pending: List[Dict] = []
+
+    def __enter__(self) -> "BookSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, book: Dict) -> None:
+        self._pending.append(book)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        self._write_pending()
+        self._update_total()
+        publish_catalog_version(self.r)
+
+    def close(self) -> None:
+        self._write_pending()
+        # Nothing written, nothing for the API processes to reload
+        if self.written:
+            self._update_total()
+            rebuild_title_order(self.r)
+            refresh_catalog_facets(self.r)
+            publish_catalog_version(self.r)
+        logging.info(f"Stored {self.written} books into Redis.")
+
+    def _write_pending(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        r = self.r
+        # Reserve one catalog position per book; NX below keeps the
+        # position of books that were already stored
+        first_seq = int(r.incrby(ORDER_SEQ_KEY, len(batch))) - len(batch)
+        # A book stored again may have changed its category or title,
+        # so the postings of the stored version are dropped first
+        previous = get_books_map(
+            r, [book_id_from_url(book['url']) for book in batch]
+        )
+
+        pipe = r.pipeline(transaction=False)
+        for seq, book in enumerate(batch, start=first_seq + 1):
+            book_id = book_id_from_url(book['url'])
+            redis_key = book_key(book_id)
+            if book_id in previous:
+                _drop_stale_postings(pipe, book_id, previous[book_id], book)
+            previous[book_id] = book
+            if self.encoding == "hash":
+                # HSET on a key written with another encoding would fail
+                pipe.delete(redis_key)
+                pipe.hset(redis_key, mapping={
+                    field: value for field, value in book.items()
+                    if value is not None
+                })
+            else:
+                pipe.set(redis_key, encode_book(book, self.encoding))
+
+            # Secondary indexes, so /books never scans the keyspace
+            if book.get('category'):
+                pipe.sadd(category_index_key(book['category']), book_id)
+            pipe.zadd(PRICE_INDEX_KEY, {book_id: float(book['price'])})
+            pipe.zadd(ORDER_KEY, {book_id: seq}, nx=True)
+            # Sorts after the ranked titles until close() ranks it
+            pipe.zadd(TITLE_ORDER_KEY, {book_id: float("inf")}, nx=True)
+
+            # Title search: n-gram postings plus the title to verify hits
+            title = book['title'].lower()
+            pipe.hset(TITLES_KEY, book_id, title)
+            for gram in title_ngrams(title):
+                pipe.sadd(trigram_index_key(gram), book_id)
+        pipe.execute()
+        self.written += len(batch)
+        if self.on_write:
+            self.on_write(batch)
+
+    def _update_total(self) -> None:
+        # Every stored book has a price entry, so the index size is the total
+        self.r.set(TOTAL_BOOKS_KEY, self.r.zcard(PRICE_INDEX_KEY))
+
+
+def _drop_stale_postings(pipe, book_id: str, stored: Dict, book: Dict) -> None:
+    """Remove a book from the category and n-gram sets of its stored
+    version that the new version is no longer in."""
+    old_category = stored.get('category')
+    if old_category and (
+        not book.get('category')
+        or category_index_key(old_category)
+        != category_index_key(book['category'])
+    ):
+        pipe.srem(category_index_key(old_category), book_id)
+    stale_grams = (
+        title_ngrams(stored.get('title') or "")
+        - title_ngrams(book['title'])
+    )
+    for gram in stale_grams:
+        pipe.srem(trigram_index_key(gram), book_id)
+
 
 def save_books_into_redis_database(books_data: List[Dict]) -> None:
     try:
-        load_dotenv()
-        REDIS_HOST = os.getenv("REDIS_HOST", "redis")
-        REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-        REDIS_DB = int(os.getenv("REDIS_DB", 0))
-        r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
-
+        sink = BookSink(batch_size=WRITE_BATCH_SIZE)
         for book in books_data:
-            book_id = hashlib.md5(book['url'].encode('utf-8')).hexdigest()
-            redis_key = f"book:{book_id}"
-            r.set(redis_key, json.dumps(book, ensure_ascii=False))
-
-        logging.info(f"Stored {len(books_data)} books into Redis.")
+            sink.add(book)
+        sink.close()
     except Exception as e:
         logging.error(f"Failed to store data in Redis: {e}")
         raise
+
+
+def rebuild_title_order(r: redis.Redis) -> None:
+    """Score every book by the rank of its title, for sort=title."""
+    titles = sorted(
+        (_decode(title), _decode(book_id))
+        for book_id, title in r.hgetall(TITLES_KEY).items()
+    )
+    for start in range(0, len(titles), WRITE_BATCH_SIZE):
+        batch = titles[start:start + WRITE_BATCH_SIZE]
+        r.zadd(TITLE_ORDER_KEY, {
+            book_id: rank
+            for rank, (_, book_id) in enumerate(batch, start=start)
+        })
+
+
+def refresh_catalog_facets(r: redis.Redis) -> Dict:
+    """Compute per-category counts and price statistics in one pass over
+    the catalog and store them as a single document."""
+    prices: Dict[str, List[float]] = {}
+    all_prices: List[float] = []
+    ids = get_book_ids(r)
+    for start in range(0, len(ids), READ_BATCH_SIZE):
+        batch = ids[start:start + READ_BATCH_SIZE]
+        for book in get_books_map(r, batch).values():
+            price = float(book['price'])
+            all_prices.append(price)
+            category = book.get('category') or "Unknown"
+            prices.setdefault(category, []).append(price)
+
+    facets = {
+        "total_books": len(all_prices),
+        "price": price_stats(all_prices),
+        "categories": [
+            {
+                "name": name,
+                "count": len(category_prices),
+                "price": price_stats(category_prices),
+            }
+            for name, category_prices in sorted(
+                prices.items(), key=lambda item: (-len(item[1]), item[0])
+            )
+        ],
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    r.set(FACETS_KEY, json.dumps(facets, ensure_ascii=False))
+    return facets
+
+
+def price_stats(prices: List[float]) -> Optional[Dict]:
+    if not prices:
+        return None
+    prices = sorted(prices)
+    stats = {
+        "min": prices[0],
+        "max": prices[-1],
+        "mean": round(sum(prices) / len(prices), 2),
+    }
+    for percentile in FACET_PERCENTILES:
+        # Linear interpolation between the closest ranks
+        rank = (len(prices) - 1) * percentile / 100
+        lower = int(rank)
+        upper = min(lower + 1, len(prices) - 1)
+        value = prices[lower] + (prices[upper] - prices[lower]) * (
+            rank - lower
+        )
+        stats[f"p{percentile}"] = round(value, 2)
+    return stats
+
+
+def publish_catalog_version(r: redis.Redis) -> int:
+    """Bump the catalog version and announce it to the API processes."""
+    version = r.incr(CATALOG_VERSION_KEY)
+    r.publish(CATALOG_CHANNEL, version)
+    return version
+
+
+# --- Read helpers ---
+def get_catalog_version(r: redis.Redis) -> int:
+    version = r.get(CATALOG_VERSION_KEY)
+    return int(version) if version else 0
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+class InvalidCursor(InvalidQuery):
+    pass
+
+
+class BookIdsPage(NamedTuple):
+    ids: List[str]
+    total: int
+    next_cursor: Optional[str]
+
+
+# /books sort parameter -> (index holding the sort key, descending)
+BOOK_SORTS = {
+    "": (ORDER_KEY, False),
+    "price": (PRICE_INDEX_KEY, False),
+    "-price": (PRICE_INDEX_KEY, True),
+    "title": (TITLE_ORDER_KEY, False),
+}
+
+
+def encode_cursor(position: float, book_id: str, sort: str = "") -> str:
+    raw = json.dumps([sort, position, book_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str = "") -> Tuple[float, str]:
+    """Inverse of encode_cursor; raises InvalidCursor for malformed input
+    or a cursor that was issued for another sort order."""
+    try:
+        cursor_sort, position, book_id = json.loads(
+            base64.urlsafe_b64decode(cursor)
+        )
+        position = float(position)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if cursor_sort != sort:
+        raise InvalidCursor("Invalid cursor")
+    return position, str(book_id)
+
+
+def get_catalog_facets(r: redis.Redis) -> Optional[Dict]:
+    facets = r.get(FACETS_KEY)
+    return json.loads(facets) if facets else None
+
+
+def get_total_books(r: redis.Redis) -> int:
+    total = r.get(TOTAL_BOOKS_KEY)
+    return int(total) if total else 0
+
+
+def get_book_ids(
+    r: redis.Redis, category: Optional[str] = None
+) -> List[str]:
+    """Return the IDs of the stored books, optionally for one category."""
+    if category:
+        ids = r.smembers(category_index_key(category))
+        return sorted(_decode(book_id) for book_id in ids)
+    return [_decode(book_id) for book_id in r.zrange(ORDER_KEY, 0, -1)]
+
+
+def search_book_ids(
+    r: redis.Redis, search: str, category: Optional[str] = None
+) -> List[str]:
+    """Return the IDs of books whose title contains ``search``, sorted.
+
+    Candidates come from intersecting the n-gram sets of the search term
+    (and the category set, if any); they are then checked against the
+    stored titles, so no book document is fetched to answer the filter.
+    Terms shorter than an n-gram fall back to checking every title.
+    """
+    search = search.lower()
+    grams = title_ngrams(search)
+    if grams:
+        keys = [trigram_index_key(gram) for gram in sorted(grams)]
+        if category:
+            keys.append(category_index_key(category))
+        ids = [_decode(book_id) for book_id in r.sinter(keys)]
+    else:
+        ids = get_book_ids(r, category)
+
+    if not ids:
+        return []
+    titles = r.hmget(TITLES_KEY, ids)
+    return sorted(
+        book_id for book_id, title in zip(ids, titles)
+        if title and search in _decode(title)
+    )
+
+
+def query_book_ids(
+    r: redis.Redis,
+    search: str = "",
+    category: str = "",
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: str = "",
+    start: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+) -> BookIdsPage:
+    """Return one page of book IDs, in catalog (ingestion) order by default.
+
+    ``sort`` is one of BOOK_SORTS. With ``cursor`` the page starts right
+    after the book it points at and ``start`` is ignored. Pages that only
+    need one index (no search or category, and no price range unless
+    sorting by price) are read from it by rank; otherwise the matches are
+    first stored by Redis in a temporary sorted set scored like the sort
+    index, which is then read by rank the same way. ``next_cursor`` is
+    None on the last page.
+    """
+    if sort not in BOOK_SORTS:
+        raise InvalidQuery(f"Unknown sort: {sort}")
+    order_key, descending = BOOK_SORTS[sort]
+    after = decode_cursor(cursor, sort) if cursor else None
+    price_range = min_price is not None or max_price is not None
+    low = "-inf" if min_price is None else min_price
+    high = "+inf" if max_price is None else max_price
+
+    if search or category or (price_range and order_key != PRICE_INDEX_KEY):
+        keys = _store_matches(r, search, category, order_key, low, high)
+        if keys is None:
+            return BookIdsPage(ids=[], total=0, next_cursor=None)
+        try:
+            # The price range is already applied unless sorting by price
+            items, total = _read_index_window(
+                r, keys[0], descending, low, high,
+                price_range and order_key == PRICE_INDEX_KEY,
+                start, limit + 1, after
+            )
+        finally:
+            r.delete(*keys)
+    else:
+        items, total = _read_index_window(
+            r, order_key, descending, low, high, price_range,
+            start, limit + 1, after
+        )
+
+    page = items[:limit]
+    next_cursor = None
+    if len(items) > limit and page:
+        next_cursor = encode_cursor(*page[-1], sort=sort)
+    return BookIdsPage(
+        ids=[book_id for _, book_id in page],
+        total=total,
+        next_cursor=next_cursor,
+    )
+
+
+def _store_matches(
+    r: redis.Redis, search: str, category: str, order_key: str, low, high
+) -> Optional[List[str]]:
+    """Store the books matching the filters in a temporary sorted set
+    scored by ``order_key``, and return its key followed by the helper
+    key, or None when the search matches nothing.
+
+    Intersections run in Redis, so no ID list is sorted in Python; only
+    search hits are checked against their titles first.
+    """
+    query_key = f"{QUERY_KEY_PREFIX}{uuid.uuid4().hex}"
+    ids_key = f"{query_key}:ids"
+    pipe = r.pipeline(transaction=False)
+    if search:
+        ids = search_book_ids(r, search, category)
+        if not ids:
+            return None
+        pipe.sadd(ids_key, *ids)
+        filter_key = ids_key
+    elif category:
+        filter_key = category_index_key(category)
+    else:
+        filter_key = None
+
+    if order_key != PRICE_INDEX_KEY and (low != "-inf" or high != "+inf"):
+        if filter_key is None:
+            pipe.zrangestore(
+                ids_key, PRICE_INDEX_KEY, low, high, byscore=True
+            )
+        else:
+            pipe.zinterstore(ids_key, {filter_key: 0, PRICE_INDEX_KEY: 1})
+            if low != "-inf":
+                pipe.zremrangebyscore(ids_key, "-inf", f"({low}")
+            if high != "+inf":
+                pipe.zremrangebyscore(ids_key, f"({high}", "+inf")
+        filter_key = ids_key
+
+    pipe.zinterstore(query_key, {filter_key: 0, order_key: 1})
+    pipe.expire(query_key, QUERY_KEY_TTL)
+    pipe.expire(ids_key, QUERY_KEY_TTL)
+    pipe.execute()
+    return [query_key, ids_key]
+
+
+def _read_index_window(
+    r: redis.Redis,
+    order_key: str,
+    descending: bool,
+    low,
+    high,
+    price_range: bool,
+    start: int,
+    count: int,
+    after: Optional[Tuple[float, str]],
+) -> Tuple[List[Tuple[float, str]], int]:
+    """Read up to ``count`` items of one sorted set by rank.
+
+    Only ranks whose score lies in [low, high] are visible; they form a
+    contiguous window of the index, so every step is O(log n).
+    """
+    first = 0
+    if not price_range:
+        if order_key == ORDER_KEY:
+            last = get_total_books(r)
+        else:
+            last = r.zcard(order_key)
+    elif descending:
+        if high != "+inf":
+            first = r.zcount(order_key, f"({high}", "+inf")
+        last = r.zcount(order_key, low, "+inf")
+    else:
+        if low != "-inf":
+            first = r.zcount(order_key, "-inf", f"({low}")
+        last = r.zcount(order_key, "-inf", high)
+
+    if after:
+        position, book_id = after
+        if descending:
+            rank = r.zrevrank(order_key, book_id)
+        else:
+            rank = r.zrank(order_key, book_id)
+        if rank is None:
+            # The book is gone: resume at the first one with its score
+            if descending:
+                rank = r.zcount(order_key, f"({position}", "+inf") - 1
+            else:
+                rank = r.zcount(order_key, "-inf", f"({position}") - 1
+        begin = max(rank + 1, first)
+    else:
+        begin = first + start
+
+    end = min(begin + count, last)
+    items = []
+    if end > begin:
+        items = r.zrange(
+            order_key, begin, end - 1, desc=descending, withscores=True
+        )
+    return (
+        [(position, _decode(book_id)) for book_id, position in items],
+        max(last - first, 0),
+    )
+
+
+def get_books_map(r: redis.Redis, ids: List[str]) -> Dict[str, Dict]:
+    """Fetch books with one MGET per batch, keyed by book ID.
+
+    Each book carries its ID under "id". MGET returns nothing for books
+    stored as hashes, so those are read with one pipelined HGETALL round
+    trip per batch. IDs without a stored book are left out.
+    """
+    books = {}
+    for start in range(0, len(ids), READ_BATCH_SIZE):
+        batch = ids[start:start + READ_BATCH_SIZE]
+        values = r.mget([book_key(book_id) for book_id in batch])
+        not_strings = []
+        for book_id, data in zip(batch, values):
+            if data:
+                books[book_id] = {**decode_book(data), "id": book_id}
+            else:
+                not_strings.append(book_id)
+
+        if not_strings:
+            pipe = r.pipeline(transaction=False)
+            for book_id in not_strings:
+                pipe.hgetall(book_key(book_id))
+            for book_id, fields in zip(not_strings, pipe.execute()):
+                if fields:
+                    books[book_id] = {
+                        **decode_book_hash(fields), "id": book_id
+                    }
+    return books
+
+
+def iter_books(
+    r: redis.Redis, batch_size: Optional[int] = None
+) -> Iterator[Dict]:
+    """Yield every stored book, walking the keyspace with SCAN.
+
+    Keys are fetched one batch at a time, so memory use does not depend
+    on the catalog size. Like SCAN itself, a book written or rehashed
+    during the walk may be yielded twice.
+    """
+    batch_size = batch_size or READ_BATCH_SIZE
+    batch = []
+    for key in r.scan_iter(match=f"{BOOK_KEY_PREFIX}*", count=batch_size):
+        batch.append(_decode(key)[len(BOOK_KEY_PREFIX):])
+        if len(batch) >= batch_size:
+            yield from get_books_map(r, batch).values()
+            batch = []
+    if batch:
+        yield from get_books_map(r, batch).values()
+
+
+def get_books_by_ids(r: redis.Redis, ids: List[str]) -> List[Dict]:
+    """Fetch books in ``ids`` order, skipping IDs without a stored book."""
+    books = get_books_map(r, ids)
+    return [books[book_id] for book_id in ids if book_id in books]
+
+
+def _decode(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
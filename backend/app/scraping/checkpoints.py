@@ -0,0 +1,115 @@
+import time
+import uuid
+from typing import Dict, FrozenSet, Iterable, Optional, Set
+
+import redis
+
+# --- Keys ---
+RUN_KEY_PREFIX = "scrape:run:"
+
+# Seconds a run can be resumed after its last checkpoint
+CHECKPOINT_TTL = 7 * 24 * 3600
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def run_key(run_id: str) -> str:
+    return f"{RUN_KEY_PREFIX}{run_id}"
+
+
+def visited_key(run_id: str) -> str:
+    return f"{RUN_KEY_PREFIX}{run_id}:visited"
+
+
+class CrawlCheckpoint:
+    """Progress of a book scraping run, kept in Redis under its run ID.
+
+    ``last_page`` is the end of the first run of catalog pages whose books
+    are all stored, so a resumed run also retries pages that failed, and
+    ``visited`` the detail pages collected so far, including those of pages
+    that are not complete. Progress is recorded in memory as the crawl goes
+    and written by ``save``. A book visited with ``stored=False`` is only
+    saved, and its page only counted, once ``store`` reports it written,
+    so ``save`` can be called at any time.
+    """
+
+    def __init__(self, r: redis.Redis, run_id: str):
+        self.r = r
+        self.run_id = run_id
+        self.last_page = 0
+        self.page_count: Optional[int] = None
+        self.visited: Set[str] = set()
+        self._unsaved: Set[str] = set()
+        # Visited books not written yet, and per completed page those it
+        # waits for
+        self._unstored: Set[str] = set()
+        self._completed: Dict[int, FrozenSet[str]] = {}
+
+    @classmethod
+    def load(cls, r: redis.Redis, run_id: str) -> "CrawlCheckpoint":
+        """Return the run's checkpoint, empty for a new run."""
+        checkpoint = cls(r, run_id)
+        fields = r.hgetall(run_key(run_id))
+        if fields:
+            fields = {
+                name.decode('utf-8'): value.decode('utf-8')
+                for name, value in fields.items()
+            }
+            checkpoint.last_page = int(fields.get("last_page", 0))
+            checkpoint.page_count = int(fields.get("page_count", 0)) or None
+            checkpoint.visited = {
+                url.decode('utf-8')
+                for url in r.smembers(visited_key(run_id))
+            }
+        return checkpoint
+
+    @staticmethod
+    def exists(r: redis.Redis, run_id: str) -> bool:
+        return bool(r.exists(run_key(run_id)))
+
+    @property
+    def collected(self) -> int:
+        return len(self.visited)
+
+    def visit(self, url: str, stored: bool = True) -> None:
+        if url not in self.visited:
+            self.visited.add(url)
+            (self._unsaved if stored else self._unstored).add(url)
+
+    def store(self, urls: Iterable[str]) -> None:
+        """Record that books visited with ``stored=False`` are written."""
+        for url in urls:
+            if url in self._unstored:
+                self._unstored.discard(url)
+                self._unsaved.add(url)
+        self._advance()
+
+    def complete_page(self, page: int) -> None:
+        # Whatever is still unstored may include the page's own books
+        self._completed[page] = frozenset(self._unstored)
+        self._advance()
+
+    def _advance(self) -> None:
+        while True:
+            waiting = self._completed.get(self.last_page + 1)
+            if waiting is None or waiting & self._unstored:
+                return
+            self.last_page += 1
+
+    def save(self, status: str = "running") -> None:
+        pipe = self.r.pipeline(transaction=False)
+        if self._unsaved:
+            pipe.sadd(visited_key(self.run_id), *self._unsaved)
+            pipe.expire(visited_key(self.run_id), CHECKPOINT_TTL)
+        pipe.hset(run_key(self.run_id), mapping={
+            "last_page": self.last_page,
+            "page_count": self.page_count or 0,
+            "collected": self.collected - len(self._unstored),
+            "status": status,
+            "updated_at": time.time(),
+        })
+        pipe.expire(run_key(self.run_id), CHECKPOINT_TTL)
+        pipe.execute()
+        self._unsaved = set()
@@ -0,0 +1,226 @@
+"""Headless Chrome drivers kept warm between scrapes.
+
+Starting Chrome takes seconds, more than rendering a page, so each process
+keeps a pool of drivers that are checked out for a page and checked back
+in afterwards. A driver that stops answering is replaced when checked out,
+and one that rendered SELENIUM_MAX_PAGES pages or uses more than
+SELENIUM_MAX_RSS_MB of memory (measured when ``psutil`` is installed) is
+quit when checked in, so memory stays bounded.
+"""
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from app.utils import build_chrome_options
+
+# Chrome's memory is only measured when psutil is installed
+try:
+    import psutil
+except ImportError:  # pragma: no cover - depends on the environment
+    psutil = None
+
+# Drivers per process, pages a driver renders before it is replaced, and
+# the memory of Chrome and its children above which it is replaced early
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 100
+DEFAULT_MAX_RSS_MB = 1024
+# Seconds to wait for a driver when they are all checked out, and for a
+# page to load before driver.get gives up (Chrome waits 300 by default)
+CHECKOUT_TIMEOUT = 60
+PAGE_LOAD_TIMEOUT = 30
+
+_pool: Optional["DriverPool"] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool_size() -> int:
+    return int(os.getenv("SELENIUM_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+
+def get_max_pages() -> int:
+    return int(os.getenv("SELENIUM_MAX_PAGES", DEFAULT_MAX_PAGES))
+
+
+def get_max_rss_mb() -> int:
+    return int(os.getenv("SELENIUM_MAX_RSS_MB", DEFAULT_MAX_RSS_MB))
+
+
+def create_driver() -> webdriver.Chrome:
+    driver = webdriver.Chrome(options=build_chrome_options())
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+def driver_rss(driver) -> Optional[int]:
+    """Bytes of memory used by the driver's browser processes, or None when
+    they cannot be measured."""
+    if psutil is None:
+        return None
+    try:
+        process = psutil.Process(driver.service.process.pid)
+        processes = [process, *process.children(recursive=True)]
+        return sum(p.memory_info().rss for p in processes)
+    except (AttributeError, psutil.Error):
+        return None
+
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class DriverPool:
+    """A bounded pool of drivers, safe to share between threads."""
+
+    def __init__(
+        self, size: Optional[int] = None, max_pages: Optional[int] = None,
+        max_rss_mb: Optional[int] = None,
+        factory: Callable[[], webdriver.Chrome] = create_driver
+    ):
+        self.size = size or get_pool_size()
+        self.max_pages = max_pages or get_max_pages()
+        self.max_rss = (max_rss_mb or get_max_rss_mb()) * 1024 * 1024
+        self.factory = factory
+        self._idle: List[PooledDriver] = []
+        # Drivers alive, idle or checked out
+        self._count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def warm(self) -> None:
+        """Start drivers until the pool is full, so the first scrapes do
+        not wait for Chrome."""
+        started = []
+        with self._cond:
+            missing = self.size - self._count
+            self._count += missing
+        try:
+            for _ in range(missing):
+                started.append(PooledDriver(self.factory()))
+        finally:
+            with self._cond:
+                self._count -= missing - len(started)
+                self._idle.extend(started)
+                self._cond.notify_all()
+        logging.info(f"Started {len(started)} browsers.")
+
+    def checkout(self, timeout: float = CHECKOUT_TIMEOUT) -> PooledDriver:
+        """Take a healthy driver, starting one while the pool is not full
+        and waiting for one to be checked in otherwise."""
+        while True:
+            with self._cond:
+                entry = self._take(timeout)
+            if entry is None:
+                return self._start()
+            if self._healthy(entry):
+                return entry
+            logging.warning("Replacing a browser that stopped responding.")
+            self._discard(entry)
+
+    def _take(self, timeout: float) -> Optional[PooledDriver]:
+        """Return an idle driver, or None after reserving room for a new
+        one. Called with the condition held."""
+        while True:
+            if self._closed:
+                raise RuntimeError("The driver pool is closed")
+            if self._idle:
+                return self._idle.pop()
+            if self._count < self.size:
+                self._count += 1
+                return None
+            if not self._cond.wait(timeout):
+                raise TimeoutError(
+                    f"No browser available after {timeout} seconds"
+                )
+
+    def _start(self) -> PooledDriver:
+        try:
+            return PooledDriver(self.factory())
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+
+    def checkin(self, entry: PooledDriver) -> None:
+        entry.pages += 1
+        if self._closed or self._worn_out(entry):
+            self._discard(entry)
+            return
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(
+        self, timeout: float = CHECKOUT_TIMEOUT
+    ) -> Iterator[webdriver.Chrome]:
+        entry = self.checkout(timeout)
+        try:
+            yield entry.driver
+        finally:
+            self.checkin(entry)
+
+    @staticmethod
+    def _healthy(entry: PooledDriver) -> bool:
+        try:
+            return entry.driver.execute_script("return 1") == 1
+        except WebDriverException:
+            return False
+
+    def _worn_out(self, entry: PooledDriver) -> bool:
+        if entry.pages >= self.max_pages:
+            logging.info(f"Recycling a browser after {entry.pages} pages.")
+            return True
+        rss = driver_rss(entry.driver)
+        if rss is not None and rss > self.max_rss:
+            logging.info(
+                f"Recycling a browser using {rss // (1024 * 1024)} MB."
+            )
+            return True
+        return False
+
+    def _discard(self, entry: PooledDriver) -> None:
+        try:
+            entry.driver.quit()
+        except Exception as e:
+            logging.warning(f"Failed to close a browser: {e}")
+        with self._cond:
+            self._count -= 1
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Quit the idle drivers; those checked out are quit when they are
+        checked in."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._discard(entry)
+        logging.info("Browsers closed.")
+
+
+def get_driver_pool() -> DriverPool:
+    """Return the pool shared by every Selenium fetcher of the process."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = DriverPool()
+                atexit.register(close_driver_pool)
+    return _pool
+
+
+def close_driver_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,245 @@
+"""Page fetchers used by the scrapers.
+
+Both engines expose ``get_html(url, ready_selector=None)``, ``get_page`` for
+conditional requests and ``close()``, so the scrapers only parse HTML and do
+not care how it was fetched.
+``get_html`` may be called from several threads, and requests to each host
+are paced by the process-wide adaptive rate limiter:
+
+- ``http``: a process-wide pooled ``requests.Session``. The default, as
+  Hacker News and books.toscrape.com are static HTML.
+- ``selenium``: headless Chrome drivers from the process-wide pool, kept
+  for pages that need JavaScript.
+
+The engine is chosen with the SCRAPER_ENGINE environment variable.
+"""
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from app.scraping.driver_pool import (
+    CHECKOUT_TIMEOUT,
+    PAGE_LOAD_TIMEOUT,
+    DriverPool,
+    get_driver_pool,
+)
+from app.scraping.rate_limit import (
+    MIN_RATE,
+    AdaptiveRateLimiter,
+    get_rate_limiter,
+)
+
+# lxml parses several times faster than html.parser when installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:  # pragma: no cover - depends on the environment
+    HTML_PARSER = "html.parser"
+
+
+SCRAPER_ENGINES = ("http", "selenium")
+DEFAULT_SCRAPER_ENGINE = "http"
+
+# Seconds to wait for a response, and for Chrome to render a page
+REQUEST_TIMEOUT = 10
+SELENIUM_PAGE_TIMEOUT = 10
+NOT_FOUND_XPATH = "//h1[contains(text(), '404 Not Found')]"
+# Connections kept open per host
+HTTP_POOL_SIZE = 10
+USER_AGENT = "Mozilla/5.0 (compatible; PrintAI-scraper/0.1)"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class PageNotFound(ValueError):
+    pass
+
+
+class FetchedPage(NamedTuple):
+    html: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def get_scraper_engine() -> str:
+    engine = os.getenv("SCRAPER_ENGINE", DEFAULT_SCRAPER_ENGINE).lower()
+    if engine not in SCRAPER_ENGINES:
+        raise ValueError(
+            f"Unknown SCRAPER_ENGINE {engine!r}, "
+            f"expected one of {', '.join(SCRAPER_ENGINES)}"
+        )
+    return engine
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide session, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_SIZE,
+                    pool_maxsize=HTTP_POOL_SIZE,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = USER_AGENT
+                _session = session
+    return _session
+
+
+def parse_html(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        # Missing, or given as an HTTP date
+        return None
+
+
+class HttpFetcher:
+    def __init__(
+        self, session: Optional[requests.Session] = None,
+        limiter: Optional[AdaptiveRateLimiter] = None
+    ):
+        self.session = session or get_http_session()
+        self.limiter = limiter or get_rate_limiter()
+
+    def get_html(self, url: str, ready_selector: Optional[str] = None) -> str:
+        return self.get_page(url, ready_selector).html
+
+    def get_page(
+        self, url: str, ready_selector: Optional[str] = None,
+        etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchedPage:
+        """Fetch a page, conditionally when validators of a previous
+        response are given; ``html`` is None when the server answers 304.
+        The whole document is in the response, so ``ready_selector`` is not
+        waited for."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        host = urlparse(url).netloc
+        self.limiter.acquire(host)
+        started = time.monotonic()
+        try:
+            response = self.session.get(
+                url, headers=headers, timeout=REQUEST_TIMEOUT
+            )
+        except requests.RequestException:
+            self.limiter.backoff(host)
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            self.limiter.backoff(host, retry_after_seconds(response))
+            response.raise_for_status()
+        self.limiter.success(host, time.monotonic() - started)
+        if response.status_code == 404:
+            raise PageNotFound(f"{url} not found.")
+        response.raise_for_status()
+        return FetchedPage(
+            None if response.status_code == 304 else response.text,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+    def close(self) -> None:
+        # The session is shared by the process and stays open
+        pass
+
+
+class SeleniumFetcher:
+    def __init__(
+        self, timeout: float = SELENIUM_PAGE_TIMEOUT,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        pool: Optional[DriverPool] = None
+    ):
+        self.timeout = timeout
+        self.limiter = limiter or get_rate_limiter()
+        # Each page is rendered by a driver checked out of the pool, so
+        # several threads render pages at once
+        self.pool = pool or get_driver_pool()
+
+    def get_page(
+        self, url: str, ready_selector: Optional[str] = None,
+        etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchedPage:
+        # A browser cannot send conditional requests; the validators are
+        # ignored and the page is always returned
+        return FetchedPage(self.get_html(url, ready_selector), None, None)
+
+    def get_html(self, url: str, ready_selector: Optional[str] = None) -> str:
+        """Load the page and wait until it is ready: the document has
+        loaded and, when given, ``ready_selector`` or a 404 heading is
+        present."""
+        host = urlparse(url).netloc
+        with self.pool.driver() as driver:
+            self.limiter.acquire(host)
+            started = time.monotonic()
+            try:
+                driver.get(url)
+                WebDriverWait(driver, self.timeout).until(
+                    self._ready(ready_selector)
+                )
+            except WebDriverException:
+                self.limiter.backoff(host)
+                raise
+            self.limiter.success(host, time.monotonic() - started)
+            not_found = driver.find_elements(By.XPATH, NOT_FOUND_XPATH)
+            if not_found:
+                raise PageNotFound(f"{url} not found.")
+            return driver.page_source
+
+    @staticmethod
+    def _ready(ready_selector: Optional[str]):
+        def ready(driver) -> bool:
+            state = driver.execute_script("return document.readyState")
+            if state != "complete":
+                return False
+            if ready_selector is None:
+                return True
+            return bool(
+                driver.find_elements(By.CSS_SELECTOR, ready_selector)
+                or driver.find_elements(By.XPATH, NOT_FOUND_XPATH)
+            )
+        return ready
+
+    def close(self) -> None:
+        # The drivers stay warm in the pool for the next scrape
+        pass
+
+
+def fetch_time_budget(engine: Optional[str] = None) -> float:
+    """Seconds one ``get_html`` call may take at worst: the longest pause
+    of the rate limiter, then the request or, with Selenium, the browser
+    checkout, the page load and the wait for the ready selector."""
+    engine = engine or get_scraper_engine()
+    pause = 1 / MIN_RATE
+    if engine == "selenium":
+        return (
+            CHECKOUT_TIMEOUT + pause + PAGE_LOAD_TIMEOUT
+            + SELENIUM_PAGE_TIMEOUT
+        )
+    return pause + REQUEST_TIMEOUT
+
+
+def create_fetcher(engine: Optional[str] = None):
+    engine = engine or get_scraper_engine()
+    if engine == "selenium":
+        return SeleniumFetcher()
+    return HttpFetcher()
@@ -0,0 +1,137 @@
+"""What previous scrapes saw, so a re-scrape only pays for what changed.
+
+For every detail page the validators of the last response (ETag and
+Last-Modified) and a hash of its HTML are kept in Redis. The next run
+sends them as a conditional request; a 304, or a page whose hash did not
+change, is neither parsed nor written again. The metadata of a page that
+did change is only saved once its book is stored, see ``defer``.
+"""
+import hashlib
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import redis
+
+from app.redis_storage import book_id_from_url, get_books_map
+from app.scraping.fetchers import FetchedPage
+
+# --- Keys ---
+PAGE_META_PREFIX = "scrape:page:"
+
+# Fields compared to tell whether a scraped book differs from the stored one
+BOOK_FIELDS = ("url", "title", "price", "category", "image_url")
+
+
+class PageMeta(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+
+
+def page_meta_key(url: str) -> str:
+    return f"{PAGE_META_PREFIX}{book_id_from_url(url)}"
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha1(html.encode('utf-8')).hexdigest()
+
+
+class PageHistory:
+    def __init__(self, r: redis.Redis):
+        self.r = r
+        # Metadata of changed pages whose book is not stored yet
+        self._deferred: Dict[str, PageMeta] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[PageMeta]:
+        fields = self.r.hgetall(page_meta_key(url))
+        if not fields:
+            return None
+        fields = {
+            name.decode('utf-8'): value.decode('utf-8')
+            for name, value in fields.items()
+        }
+        return PageMeta(
+            fields.get("etag"),
+            fields.get("last_modified"),
+            fields.get("content_hash", ""),
+        )
+
+    def save(self, url: str, meta: PageMeta) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        _queue_save(pipe, url, meta)
+        pipe.execute()
+
+    def defer(self, url: str, meta: PageMeta) -> None:
+        """Keep the metadata until ``commit``. Saved before the book, it
+        would make a run that dies in between skip the change for good."""
+        with self._lock:
+            self._deferred[url] = meta
+
+    def commit(self, urls: Iterable[str]) -> None:
+        """Save the deferred metadata of pages whose books are stored."""
+        with self._lock:
+            metas = [
+                (url, self._deferred.pop(url))
+                for url in urls if url in self._deferred
+            ]
+        if not metas:
+            return
+        pipe = self.r.pipeline(transaction=False)
+        for url, meta in metas:
+            _queue_save(pipe, url, meta)
+        pipe.execute()
+
+    def known_book(self, url: str) -> Optional[Dict]:
+        book_id = book_id_from_url(url)
+        return get_books_map(self.r, [book_id]).get(book_id)
+
+    def changed_books(self, books: List[Dict]) -> List[Dict]:
+        """Return the books that differ from, or are missing in, Redis."""
+        stored = get_books_map(
+            self.r, [book_id_from_url(book["url"]) for book in books]
+        )
+        return [
+            book for book in books
+            if not _same_book(book, stored.get(book_id_from_url(book["url"])))
+        ]
+
+
+def _queue_save(pipe, url: str, meta: PageMeta) -> None:
+    key = page_meta_key(url)
+    pipe.delete(key)
+    pipe.hset(key, mapping={
+        name: value for name, value in meta._asdict().items()
+        if value is not None
+    })
+
+
+def _same_book(book: Dict, stored: Optional[Dict]) -> bool:
+    if stored is None:
+        return False
+    return all(book.get(field) == stored.get(field) for field in BOOK_FIELDS)
+
+
+def fetch_if_changed(
+    fetcher, url: str, previous: Optional[PageMeta],
+    ready_selector: Optional[str] = None
+) -> Tuple[Optional[str], PageMeta]:
+    """Fetch a page, returning None as HTML when it did not change since
+    ``previous`` was recorded, along with the metadata to record now."""
+    if previous is None:
+        page: FetchedPage = fetcher.get_page(url, ready_selector)
+    else:
+        page = fetcher.get_page(
+            url, ready_selector, previous.etag, previous.last_modified
+        )
+    if page.html is None:
+        # 304: the server kept the validators, or did not resend them
+        return None, PageMeta(
+            page.etag or previous.etag,
+            page.last_modified or previous.last_modified,
+            previous.content_hash,
+        )
+    meta = PageMeta(page.etag, page.last_modified, content_hash(page.html))
+    if previous is not None and meta.content_hash == previous.content_hash:
+        return None, meta
+    return page.html, meta
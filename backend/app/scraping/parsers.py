@@ -0,0 +1,155 @@
+"""Parsing of the books.toscrape.com pages the book scraper reads.
+
+The scraper only needs a few nodes of each page: the ``article.product_pod``
+entries and the pager of a catalog page, and the breadcrumb and cover of a
+detail page. The backend that extracts them is chosen with the
+BOOKS_PARSER environment variable:
+
+- ``selectolax``: the fastest, used by default when ``selectolax`` is
+  installed.
+- ``strainer``: BeautifulSoup building only the nodes above (SoupStrainer),
+  with lxml when installed. The default otherwise.
+- ``soup``: BeautifulSoup building the whole document.
+
+Compare them with ``python -m app.benchmarks.parsers``.
+"""
+import logging
+import os
+import re
+from typing import List, NamedTuple, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from app.scraping.fetchers import HTML_PARSER
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # pragma: no cover - depends on the environment
+    HTMLParser = None
+
+PARSER_BACKENDS = ("selectolax", "strainer", "soup")
+PAGE_COUNT_PATTERN = re.compile(r"of\s+(\d+)")
+
+
+def _has_class(*names: str):
+    # Under parse_only the class attribute is matched as the raw string
+    return lambda value: bool(value and set(value.split()) & set(names))
+
+
+CATALOG_STRAINER = SoupStrainer(
+    ["article", "ul"], class_=_has_class("product_pod", "pager")
+)
+DETAIL_STRAINER = SoupStrainer(
+    ["ul", "div"], class_=_has_class("breadcrumb", "item")
+)
+
+
+class ListedBook(NamedTuple):
+    title: str
+    # Without the currency sign, e.g. "51.77"
+    price: str
+    # Relative to the catalogue, e.g. "a-light-in-the-attic_1000/index.html"
+    href: str
+
+
+class CatalogPage(NamedTuple):
+    books: List[ListedBook]
+    page_count: int
+
+
+class BookDetail(NamedTuple):
+    category: str
+    # Relative to the page, e.g. "../../media/cache/fe/72/fe72.jpg"
+    image_src: str
+
+
+def default_parser_backend() -> str:
+    return "selectolax" if HTMLParser is not None else "strainer"
+
+
+def get_parser_backend() -> str:
+    backend = os.getenv("BOOKS_PARSER", default_parser_backend()).lower()
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(
+            f"Unknown BOOKS_PARSER {backend!r}, "
+            f"expected one of {', '.join(PARSER_BACKENDS)}"
+        )
+    if backend == "selectolax" and HTMLParser is None:
+        raise ValueError(
+            "BOOKS_PARSER is selectolax but it is not installed "
+            "(pip install selectolax)"
+        )
+    return backend
+
+
+def parse_page_count(text: str) -> int:
+    """Read the page count from the pager ("Page 1 of 50")."""
+    match = PAGE_COUNT_PATTERN.search(text)
+    return int(match.group(1)) if match else 1
+
+
+def parse_catalog(html: str, backend: Optional[str] = None) -> CatalogPage:
+    """Return the books listed on a catalog page and the page count. A
+    book whose entry is malformed is logged and left out."""
+    backend = backend or get_parser_backend()
+    if backend == "selectolax":
+        return _selectolax_catalog(html)
+    strainer = CATALOG_STRAINER if backend == "strainer" else None
+    return _soup_catalog(BeautifulSoup(html, HTML_PARSER, parse_only=strainer))
+
+
+def parse_book_detail(
+    html: str, backend: Optional[str] = None
+) -> BookDetail:
+    """Return the category and cover of a detail page, raising ValueError
+    when the page has neither."""
+    backend = backend or get_parser_backend()
+    if backend == "selectolax":
+        tree = HTMLParser(html)
+        crumbs = tree.css("ul.breadcrumb li a")
+        cover = tree.css_first("div.item.active img")
+        category = crumbs[-1].text(strip=True) if crumbs else None
+        src = cover.attributes.get("src") if cover is not None else None
+    else:
+        strainer = DETAIL_STRAINER if backend == "strainer" else None
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=strainer)
+        crumbs = soup.select("ul.breadcrumb li a")
+        cover = soup.select_one("div.item.active img")
+        category = crumbs[-1].text.strip() if crumbs else None
+        src = cover.get("src") if cover is not None else None
+    if not category or not src:
+        raise ValueError("Not a book detail page")
+    return BookDetail(category, src)
+
+
+def _soup_catalog(soup: BeautifulSoup) -> CatalogPage:
+    books = []
+    for article in soup.select("article.product_pod"):
+        try:
+            link = article.h3.a
+            price = article.select_one(".price_color").text.strip()[1:]
+            books.append(ListedBook(link['title'], price, link['href']))
+        except (AttributeError, KeyError, TypeError) as e:
+            logging.warning(f"Failed to process a book: {e}")
+    current = soup.select_one("ul.pager li.current")
+    return CatalogPage(
+        books, parse_page_count(current.text if current else "")
+    )
+
+
+def _selectolax_catalog(html: str) -> CatalogPage:
+    tree = HTMLParser(html)
+    books = []
+    for article in tree.css("article.product_pod"):
+        link = article.css_first("h3 a")
+        price = article.css_first(".price_color")
+        title = link.attributes.get("title") if link is not None else None
+        href = link.attributes.get("href") if link is not None else None
+        if title is None or href is None or price is None:
+            logging.warning("Failed to process a book: incomplete entry")
+            continue
+        books.append(ListedBook(title, price.text(strip=True)[1:], href))
+    current = tree.css_first("ul.pager li.current")
+    return CatalogPage(
+        books, parse_page_count(current.text() if current is not None else "")
+    )
@@ -0,0 +1,101 @@
+import threading
+import time
+from typing import Dict, Optional
+
+# Requests per second allowed per host: the starting point and the bounds
+# the limiter adapts within
+INITIAL_RATE = 4.0
+MIN_RATE = 0.5
+MAX_RATE = 16.0
+# Requests that may go out back to back after an idle period
+BURST = 2
+# Added to the rate after each fast response, and the factor it is
+# multiplied by after an error or a 429
+RATE_INCREASE = 0.5
+RATE_DECREASE = 0.5
+# Responses faster than this many seconds count as fast
+FAST_RESPONSE = 0.5
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+
+class AdaptiveRateLimiter:
+    """Token bucket per host whose rate adapts to the server.
+
+    The rate grows additively while responses are fast and is halved on
+    errors or 429s, which also honour Retry-After. Safe to share between
+    threads.
+    """
+
+    def __init__(
+        self, rate: float = INITIAL_RATE, min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE, burst: int = BURST
+    ):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(
+                self.initial_rate, self.burst
+            )
+        now = time.monotonic()
+        bucket.tokens = min(
+            self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate
+        )
+        bucket.updated = now
+        return bucket
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            return self._bucket(host).rate
+
+    def acquire(self, host: str) -> None:
+        """Block until a request to the host is allowed."""
+        while True:
+            with self._lock:
+                bucket = self._bucket(host)
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return
+                wait = (1 - bucket.tokens) / bucket.rate
+            time.sleep(wait)
+
+    def success(self, host: str, elapsed: float) -> None:
+        if elapsed > FAST_RESPONSE:
+            return
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.rate = min(self.max_rate, bucket.rate + RATE_INCREASE)
+
+    def backoff(self, host: str, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.rate = max(self.min_rate, bucket.rate * RATE_DECREASE)
+            # Owe the tokens of the pause, so the next request waits it out
+            pause = retry_after or 0
+            bucket.tokens = min(bucket.tokens, 0) - pause * bucket.rate
+
+
+_limiter: Optional[AdaptiveRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Return the limiter shared by every fetcher of the process."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveRateLimiter()
+    return _limiter
@@ -1,132 +1,283 @@
-import time
 import logging
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Optional, Set, Tuple
 
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
+import requests
 from selenium.common.exceptions import TimeoutException
 
-from app.utils import retry, build_chrome_options
-from app.redis_storage import save_books_into_redis_database
+from app.utils import retry
+from app.scraping.fetchers import PageNotFound, create_fetcher
+from app.redis_storage import BookSink, get_redis
+from app.scraping.checkpoints import CrawlCheckpoint, new_run_id
+from app.scraping.page_history import PageHistory, fetch_if_changed
+from app.scraping.parsers import (
+    CatalogPage,
+    parse_book_detail,
+    parse_catalog,
+)
 from app.loggin_config import setup_logging
-from app.models import ScrapedBook, ScrapingResult
+from app.models import ScrapedBook
 
 
 # --- Constants ---
 BASE_URL = "https://books.toscrape.com/catalogue/page-{}.html"
 DETAIL_URL_PREFIX = "https://books.toscrape.com/catalogue/"
 IMAGE_BASE_URL = "https://books.toscrape.com/"
+# Elements a rendered page is waited for, see fetchers.SeleniumFetcher
+CATALOG_READY_SELECTOR = "article.product_pod"
+DETAIL_READY_SELECTOR = "div.item.active img"
+# Detail pages and catalog pages fetched at once
+DETAIL_FETCH_WORKERS = 8
+LISTING_FETCH_WORKERS = 4
 
 
-def get_catalog_page(driver, page: int) -> BeautifulSoup:
+def get_catalog_page(fetcher, page: int) -> CatalogPage:
     try:
-        driver.get(BASE_URL.format(page))
-        time.sleep(2)
-        not_found = driver.find_elements(
-            By.XPATH, "//h1[contains(text(), '404 Not Found')]"
-        )
-        if not_found:
-            raise ValueError(f"Page {page} not found.")
-        return BeautifulSoup(driver.page_source, 'html.parser')
-    except TimeoutException as e:
+        return parse_catalog(fetcher.get_html(
+            BASE_URL.format(page), ready_selector=CATALOG_READY_SELECTOR
+        ))
+    except PageNotFound:
+        raise PageNotFound(f"Page {page} not found.")
+    except (TimeoutException, requests.Timeout) as e:
         logging.warning(f"Timeout on page {page}")
         raise e
 
 
+def get_cheap_books(
+    catalog: CatalogPage, visited: Optional[Set[str]] = None
+) -> List[Tuple[str, str, str]]:
+    """Return (title, price, detail URL) of the books priced up to 20,
+    leaving out the detail URLs in ``visited``."""
+    candidates = []
+    for book in catalog.books:
+        try:
+            if float(book.price) > 20:
+                continue
+        except ValueError as e:
+            logging.warning(f"Failed to process a book: {e}")
+            continue
+        book_url = DETAIL_URL_PREFIX + book.href
+        if visited and book_url in visited:
+            continue
+        candidates.append((book.title, book.price, book_url))
+    return candidates
+
+
+def fetch_book_details(
+    fetcher, title: str, price_str: str, full_url: str,
+    history: Optional[PageHistory] = None
+) -> Optional[ScrapedBook]:
+    """Build a book from its detail page.
+
+    With a history, the page is fetched conditionally; when it did not
+    change, the category and cover of the stored book are reused without
+    parsing it again. The metadata of a changed page is deferred until
+    the caller has stored its book, see PageHistory.commit.
+    """
+    try:
+        if history is None:
+            html = fetcher.get_html(
+                full_url, ready_selector=DETAIL_READY_SELECTOR
+            )
+        else:
+            known = history.known_book(full_url)
+            previous = history.get(full_url) if known else None
+            html, meta = fetch_if_changed(
+                fetcher, full_url, previous, DETAIL_READY_SELECTOR
+            )
+            if html is None:
+                # Same content, so the stored book is already up to date
+                if meta != previous:
+                    history.save(full_url, meta)
+                return ScrapedBook(
+                    url=full_url,
+                    title=title,
+                    price=price_str,
+                    category=known["category"],
+                    image_url=known.get("image_url")
+                )
+
+        detail = parse_book_detail(html)
+        cover_url = IMAGE_BASE_URL + detail.image_src.replace("../", "")
+        if history is not None:
+            history.defer(full_url, meta)
+
+        return ScrapedBook(
+            url=full_url,
+            title=title,
+            price=price_str,
+            category=detail.category,
+            image_url=cover_url
+        )
+    except Exception as e:
+        logging.warning(f"Failed to process a book: {e}")
+        return None
+
+
 def extract_books_from_page(
-    soup: BeautifulSoup, driver, remaining: int
+    catalog: CatalogPage, fetcher, remaining: int,
+    history: Optional[PageHistory] = None,
+    visited: Optional[Set[str]] = None
 ) -> List[ScrapedBook]:
+    """Fetch the detail pages of the page's cheap books concurrently.
+
+    Detail pages are fetched in waves of at most ``remaining`` books, so no
+    more pages are requested than books are needed; a wave only refills
+    the books that failed. Books keep their catalog order, and those in
+    ``visited`` (already collected by the run) are skipped.
+    """
     books = []
-    articles = soup.select("article.product_pod")
+    candidates = iter(get_cheap_books(catalog, visited))
 
-    for article in articles:
-        try:
-            title = article.h3.a['title']
-            price_str = article.select_one(".price_color").text.strip()[1:]
-            price = float(price_str)
+    with ThreadPoolExecutor(max_workers=DETAIL_FETCH_WORKERS) as pool:
+        while len(books) < remaining:
+            wave = list(islice(candidates, remaining - len(books)))
+            if not wave:
+                break
+            results = pool.map(
+                lambda candidate: fetch_book_details(
+                    fetcher, *candidate, history=history
+                ),
+                wave
+            )
+            books.extend(book for book in results if book is not None)
 
-            if price > 20:
-                continue
+    return books
 
-            book_url = article.h3.a['href']
-            full_url = DETAIL_URL_PREFIX + book_url
-            driver.get(full_url)
-            time.sleep(1)
-
-            book_soup = BeautifulSoup(driver.page_source, 'html.parser')
-            category = book_soup.select(
-                "ul.breadcrumb li a"
-            )[-1].text.strip()
-            img_relative_url = book_soup.select_one(
-                "div.item.active img"
-            )['src']
-            cover_url = IMAGE_BASE_URL + img_relative_url.replace("../", "")
-
-            book = ScrapedBook(
-                url=full_url,
-                title=title,
-                price=price_str,
-                category=category,
-                image_url=cover_url
-            )
-            books.append(book)
 
-            if len(books) >= remaining:
-                break
+def get_listing_pages(
+    fetcher, pages: List[int]
+) -> List[Optional[CatalogPage]]:
+    """Fetch catalog pages concurrently, in the given order. A page that
+    fails is logged and returned as None, so the others are still used."""
+    def fetch(page: int) -> Optional[CatalogPage]:
+        try:
+            return get_catalog_page(fetcher, page)
         except Exception as e:
-            logging.warning(f"Failed to process a book: {e}")
+            logging.warning(f"Skipping page {page} due to error: {e}")
+            return None
 
-    return books
+    if not pages:
+        return []
+    workers = min(LISTING_FETCH_WORKERS, len(pages))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fetch, pages))
 
 
 # --- Main Scraping Function ---
+def scrape_books(limit: int = 100, run_id: Optional[str] = None) -> str:
+    """Scrape up to ``limit`` cheap books and return the run ID.
+
+    Progress is checkpointed under the run ID, so passing the ID of an
+    interrupted run resumes it instead of starting over. Retries of a
+    failed attempt resume the same run.
+    """
+    run_id = run_id or new_run_id()
+    logging.info(f"Starting book scraping run {run_id}...")
+    crawl_books(run_id, limit)
+    return run_id
+
+
 @retry(max_attempts=3)
-def scrape_books(limit: int = 100) -> None:
-    logging.info("Starting book scraping...")
-    driver = None
-    all_books = []
+def crawl_books(run_id: str, limit: int) -> None:
+    fetcher = None
 
     try:
-        options = build_chrome_options()
-        driver = webdriver.Chrome(options=options)
-        page = 1
-
-        while len(all_books) < limit:
-            logging.info(f"Scraping page {page}...")
-            try:
-                soup = get_catalog_page(driver, page)
-                books = extract_books_from_page(
-                    soup, driver, limit - len(all_books)
-                )
-                if not books:
-                    break
-                all_books.extend(books)
-                page += 1
-            except Exception as e:
-                logging.warning(
-                    f"Skipping page {page} due to error: {e}"
-                )
-                break
+        fetcher = create_fetcher()
+        r = get_redis()
+        history = PageHistory(r)
+        checkpoint = CrawlCheckpoint.load(r, run_id)
+        listing = []
+        if checkpoint.page_count is None:
+            # The first page is needed to know how many there are
+            first_page = get_catalog_page(fetcher, 1)
+            checkpoint.page_count = first_page.page_count
+            listing = [(1, first_page)]
+        else:
+            logging.info(
+                f"Resuming run {run_id} after page {checkpoint.last_page}, "
+                f"{checkpoint.collected} books already collected"
+            )
+        logging.info(f"The catalog has {checkpoint.page_count} pages")
+        pages = iter(range(
+            checkpoint.last_page + len(listing) + 1,
+            checkpoint.page_count + 1
+        ))
+
+        def stored(batch):
+            urls = [book["url"] for book in batch]
+            history.commit(urls)
+            checkpoint.store(urls)
+            checkpoint.save()
+
+        # Books are stored in batches as they are scraped, and the page
+        # history and checkpoint record them once they are; whatever was
+        # collected is kept even if the crawl fails later
+        status = "failed"
+        try:
+            with BookSink(r, on_write=stored) as sink:
+                while True:
+                    for page, catalog in listing:
+                        if catalog is None or checkpoint.collected >= limit:
+                            continue
+                        logging.info(f"Scraping page {page}...")
+                        try:
+                            books = extract_books_from_page(
+                                catalog, fetcher,
+                                limit - checkpoint.collected,
+                                history, checkpoint.visited
+                            )
+                        except Exception as e:
+                            logging.warning(
+                                f"Skipping page {page} due to error: {e}"
+                            )
+                            continue
+                        books = [book.model_dump() for book in books]
+                        changed = {
+                            book["url"]
+                            for book in history.changed_books(books)
+                        }
+                        for book in books:
+                            # Visited first, the sink may store it at once
+                            checkpoint.visit(
+                                book["url"], stored=book["url"] not in changed
+                            )
+                            if book["url"] in changed:
+                                sink.add(book)
+                        # The other books are already stored as they are
+                        history.commit(
+                            book["url"] for book in books
+                            if book["url"] not in changed
+                        )
+                        checkpoint.complete_page(page)
+                        # Books still in the sink are left out, so every
+                        # page is checkpointed without flushing it
+                        checkpoint.save()
+                    if checkpoint.collected >= limit:
+                        break
+                    window = list(islice(pages, LISTING_FETCH_WORKERS))
+                    if not window:
+                        break
+                    listing = list(
+                        zip(window, get_listing_pages(fetcher, window))
+                    )
+            status = "done"
+        finally:
+            # The sink is closed, so every visited book is stored
+            checkpoint.save(status)
 
         logging.info(
-            f"Scraping complete. Total books collected: {len(all_books)}"
+            f"Scraping complete. Total books collected: "
+            f"{checkpoint.collected}, new or changed: {sink.written}"
         )
-        result = ScrapingResult(
-            total_books=len(all_books),
-            books=all_books
-        )
-        save_books_into_redis_database(
-            [book.model_dump() for book in result.books]
-            )
 
     except Exception as e:
         logging.error(f"Unexpected error during scraping: {e}")
         raise
     finally:
-        if driver:
-            driver.quit()
-        logging.info("Browser closed.")
+        if fetcher:
+            fetcher.close()
 
 
 # --- Entry Point ---
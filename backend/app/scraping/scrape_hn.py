@@ -1,80 +1,82 @@
 import logging
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
 from selenium.common.exceptions import WebDriverException
 from app.loggin_config import setup_logging
+from app.scraping.fetchers import (
+    create_fetcher,
+    fetch_time_budget,
+    parse_html,
+)
 from app.utils import retry
 
+BASE_URL = "https://news.ycombinator.com/?p={}"
+# Rendered on every page, even past the last story
+READY_SELECTOR = "#hnmain"
+# Attempts of a scrape and seconds between them
+SCRAPE_ATTEMPTS = 3
+RETRY_DELAY = 2
+
+
+def scrape_time_budget(engine: Optional[str] = None) -> float:
+    """Seconds get_hackernews_top_stories may take at worst, when every
+    attempt times out."""
+    return (
+        SCRAPE_ATTEMPTS * fetch_time_budget(engine)
+        + (SCRAPE_ATTEMPTS - 1) * RETRY_DELAY
+    )
+
+
+def parse_stories(html: str, page_url: str) -> List[Dict]:
+    soup = parse_html(html)
+    items = soup.select('tr.athing')
+    subtexts = soup.select('td.subtext')
+
+    stories = []
+    for i in range(len(items)):
+        title_elem = items[i].select_one('span.titleline a')
+        score_elem = (
+            subtexts[i].select_one('span.score')
+            if i < len(subtexts) else None
+        )
+        if title_elem is None or score_elem is None:
+            logging.debug(f"Skipping item {i} due to missing elements.")
+            continue
+
+        stories.append({
+            "title": title_elem.get_text(),
+            # Ask HN and job posts link relative to the site
+            "url": urljoin(page_url, title_elem.get('href', '')),
+            "score": int(score_elem.get_text().split()[0])
+        })
+    return stories
+
 
 # ------------------- Main Scraper Function -------------------
-@retry(max_attempts=3)
+@retry(max_attempts=SCRAPE_ATTEMPTS, delay=RETRY_DELAY)
 def get_hackernews_top_stories(page=1):
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
-
-    BASE_URL = "https://news.ycombinator.com/?p={}"
-    driver = None
+    page_url = BASE_URL.format(page)
+    fetcher = None
 
     try:
-        # Using webdriver-manager to manage automatically chromedriver
-        driver = webdriver.Chrome(options=options)
+        fetcher = create_fetcher()
 
         logging.info("Starting Hacker News Scraping ...")
 
         try:
-            driver.get(BASE_URL.format(page))
+            html = fetcher.get_html(page_url, ready_selector=READY_SELECTOR)
         except Exception:
             raise ConnectionError()
 
-        time.sleep(2)
-
-        stories = []
-        items = driver.find_elements(By.CSS_SELECTOR, 'tr.athing')
-        subtexts = driver.find_elements(By.CSS_SELECTOR, 'td.subtext')
-
-        for i in range(len(items)):
-            try:
-                title_elem = items[i].find_element(
-                    By.CSS_SELECTOR, 'span.titleline a'
-                )
-                title = title_elem.text
-                url = title_elem.get_attribute('href')
-                score_elem = subtexts[i].find_element(
-                    By.CSS_SELECTOR, 'span.score'
-                )
-                score = int(score_elem.text.split()[0])
-            except (NoSuchElementException, IndexError):
-                logging.debug(f"Skipping item {i} due to missing elements.")
-                continue
-
-            stories.append({
-                "title": title,
-                "url": url,
-                "score": score
-            })
-
-        try:
-            more_link = driver.find_element(By.LINK_TEXT, "More")
-            more_link.click()
-            time.sleep(2)
-        except NoSuchElementException:
-            logging.info("No more pages to scrape.")
-
-        return stories
+        return parse_stories(html, page_url)
 
     except WebDriverException as e:
         logging.critical(f"Failed to start WebDriver: {e}")
         raise
     except ConnectionError:
         raise ConnectionError(
-            f"Connection Error: Error reaching {BASE_URL.format(page)}. "
+            f"Connection Error: Error reaching {page_url}. "
             "Check the internet connection"
         )
     except Exception as e:
@@ -82,9 +84,9 @@ def get_hackernews_top_stories(page=1):
         raise
 
     finally:
-        if driver:
-            driver.quit()
-            logging.info("Scraping finished and browser closed.")
+        if fetcher:
+            fetcher.close()
+            logging.info("Scraping finished.")
 
 
 # ------------------- Execution -------------------
@@ -0,0 +1,57 @@
+import json
+import os
+from typing import Dict, Optional
+
+from flask import Response
+
+# orjson is optional; the stdlib encoder produces the same JSON, slower
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def fast_serialization_enabled() -> bool:
+    return os.getenv("FAST_SERIALIZATION", "true").lower() == "true"
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def json_response(
+    payload, status: int = 200, headers: Optional[Dict] = None
+) -> Response:
+    """Encode once and hand the bytes to Flask, skipping flask-restful's
+    own JSON representation."""
+    return Response(
+        dumps(payload), status=status, headers=headers,
+        mimetype="application/json"
+    )
+
+
+def book_payload(book: Dict) -> Dict:
+    """Shape a stored book like models.Book without validating it again.
+
+    Books are validated as ScrapedBook when scraped; only the price has
+    to be converted, as Book does.
+    """
+    return {
+        "id": book.get("id"),
+        "title": book["title"],
+        "price": float(book["price"]),
+        "category": book["category"],
+        "url": book["url"],
+        "image_url": book.get("image_url"),
+    }
+
+
+def story_payload(story: Dict) -> Dict:
+    """Shape a scraped story like models.HackerNewsStory."""
+    return {
+        "title": story["title"],
+        "url": story["url"],
+        "score": story["score"],
+    }
@@ -0,0 +1,92 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+import redis
+from redis.exceptions import LockError
+
+# --- Keys ---
+LOCK_KEY_PREFIX = "singleflight:lock:"
+RESULT_KEY_PREFIX = "singleflight:result:"
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into a single call.
+
+    Callers in the same process wait on the first caller's Future. Given a
+    Redis client, callers in other processes wait on a short Redis lock and
+    read the winner's result from a shared key, so results must be JSON
+    serializable. A result is reused for ``result_ttl`` seconds. The lock
+    must outlive the slowest call, ``lock_ttl``, and a caller that waits
+    longer than ``wait_timeout`` gets a TimeoutError rather than making
+    the call too.
+    """
+
+    def __init__(
+        self, lock_ttl: int = 30, result_ttl: int = 10,
+        wait_timeout: float = 30, poll_interval: float = 0.1
+    ):
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(
+        self, key: str, fn: Callable[[], Any],
+        r: Optional[redis.Redis] = None
+    ) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+
+        try:
+            if r is None:
+                result = fn()
+            else:
+                result = self._do_shared(key, fn, r)
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def _do_shared(self, key: str, fn: Callable[[], Any], r: redis.Redis):
+        result_key = f"{RESULT_KEY_PREFIX}{key}"
+        lock = r.lock(f"{LOCK_KEY_PREFIX}{key}", timeout=self.lock_ttl)
+        deadline = time.monotonic() + self.wait_timeout
+
+        while time.monotonic() < deadline:
+            # Read before locking: the winner stores its result and then
+            # releases the lock, which must not start another call
+            result = r.get(result_key)
+            if result is not None:
+                return json.loads(result)
+            if lock.acquire(blocking=False):
+                try:
+                    result = fn()
+                    r.set(result_key, json.dumps(result), ex=self.result_ttl)
+                    return result
+                finally:
+                    try:
+                        lock.release()
+                    except LockError:
+                        # Expired while fn ran; someone else may hold it now
+                        pass
+            time.sleep(self.poll_interval)
+
+        logging.warning(f"Gave up waiting for {key}")
+        raise TimeoutError(
+            f"No result for {key} after {self.wait_timeout} seconds"
+        )
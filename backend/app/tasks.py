@@ -1,9 +1,16 @@
+import logging
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from dotenv import load_dotenv
 
+from app import hn_storage
+from app.redis_storage import get_redis
+from app.scraping.driver_pool import close_driver_pool, get_driver_pool
+from app.scraping.fetchers import get_scraper_engine
 from app.scraping.scrape_books import scrape_books
+from app.scraping.scrape_hn import get_hackernews_top_stories
 
 # Cargar variables de entorno
 load_dotenv()
@@ -18,11 +25,60 @@ celery = Celery(
     backend=f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}",
 )
 
+# Keep the Hacker News snapshots warm, run with `celery -A app.tasks beat`
+celery.conf.beat_schedule = {
+    "refresh-headlines": {
+        "task": "app.tasks.refresh_headlines_task",
+        "schedule": float(
+            os.getenv("HN_REFRESH_INTERVAL", hn_storage.DEFAULT_STALE_AFTER)
+        ),
+    },
+}
+
+
+@worker_process_init.connect
+def warm_driver_pool(**kwargs):
+    """Start the browsers of a worker process before its first task."""
+    if get_scraper_engine() == "selenium":
+        try:
+            get_driver_pool().warm()
+        except Exception as e:
+            logging.warning(f"Failed to start browsers: {e}")
+
+
+@worker_process_shutdown.connect
+def shutdown_driver_pool(**kwargs):
+    close_driver_pool()
+
 
 @celery.task
-def scrape_books_task():
+def scrape_books_task(run_id=None):
+    """Scrape the books into Redis, resuming the run when its ID has a
+    checkpoint."""
     try:
-        scrape_books()
+        scrape_books(run_id=run_id)
         return "Task Finished. Access to the books on /books"
     except Exception:
         return "Error in the task"
+
+
+@celery.task
+def refresh_headlines_task(pages=None):
+    """Scrape Hacker News pages into Redis for /headlines.
+
+    Refreshes the first HN_REFRESH_PAGES pages unless pages are given.
+    A page that fails keeps its previous snapshot.
+    """
+    pages = pages or range(1, hn_storage.get_refresh_pages() + 1)
+    r = get_redis()
+    refreshed = []
+    for page in pages:
+        try:
+            stories = get_hackernews_top_stories(page)
+            hn_storage.save_headlines(r, page, stories)
+            refreshed.append(page)
+        except Exception as e:
+            logging.error(f"Error refreshing headlines page {page}: {e}")
+        finally:
+            hn_storage.release_refresh(r, page)
+    return refreshed
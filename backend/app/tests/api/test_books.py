@@ -2,6 +2,8 @@ import json
 import pytest
 from unittest.mock import patch, MagicMock
 from app.main import app
+from app.catalog_cache import CatalogCache
+from app.redis_storage import encode_cursor
 
 
 @pytest.fixture
@@ -10,52 +12,68 @@ def client():
         yield client
 
 
-@patch('app.main.redis.Redis')
+def stored_query(mock_r):
+    """The temporary sorted set the last filtered query was read from."""
+    pipe = mock_r.pipeline.return_value
+    return pipe.zinterstore.call_args[0][0]
+
+
+def book_json(key, price="12.00"):
+    return json.dumps({
+        "url": f"https://example.com/{key}",
+        "title": key,
+        "price": price,
+        "category": "fiction",
+    }).encode('utf-8')
+
+
+@patch('app.main.get_redis')
 def test_books_success(mock_redis, client):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    mock_r.keys.return_value = [b'book:1']
-    mock_r.get.return_value = json.dumps({
-        "url": "https://example.com/book1",
-        "title": "Python 101",
-        "price": "19.99",
-        "category": "programming",
-        "image_url": "https://example.com/book1.jpg"
-    }).encode('utf-8')
+    mock_r.get.return_value = b'1'
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "Python 101",
+            "price": "19.99",
+            "category": "programming",
+            "image_url": "https://example.com/book1.jpg"
+        }).encode('utf-8')
+    ]
+    mock_r.zrange.return_value = [(b'1', 1.0)]
 
     response = client.get('/books')
     assert response.status_code == 200
     data = response.get_json()
     assert "data" in data
     assert data["total_books"] == 1
+    assert data["next_cursor"] is None
+    mock_r.keys.assert_not_called()
 
 
-@patch('app.main.redis.Redis', side_effect=Exception("connection error"))
+@patch('app.main.get_redis', side_effect=Exception("connection error"))
 def test_books_redis_failure(mock_redis, client):
     response = client.get('/books')
     assert response.status_code == 500
     assert "Error retrieving books" in response.get_json()["message"]
 
 
-@patch('app.main.redis.Redis')
+@patch('app.main.get_redis')
 def test_books_search_filter(mock_redis, client):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    mock_r.keys.return_value = [b'book:1', b'book:2']
-    mock_r.get.side_effect = [
+    mock_r.sinter.return_value = {b'1'}
+    mock_r.hmget.return_value = [b'python for beginners']
+    mock_r.zcard.return_value = 1
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+    mock_r.mget.return_value = [
         json.dumps({
             "url": "https://example.com/book1",
             "title": "Python for Beginners",
             "price": "15.99",
             "category": "programming",
             "image_url": "https://example.com/book1.jpg"
-        }).encode('utf-8'),
-        json.dumps({
-            "url": "https://example.com/book2",
-            "title": "Cooking Tips",
-            "price": "20.00",
-            "category": "cooking",
-            "image_url": "https://example.com/book2.jpg"
         }).encode('utf-8')
     ]
 
@@ -64,64 +82,160 @@ def test_books_search_filter(mock_redis, client):
     data = response.get_json()
     assert len(data['data']) == 1
     assert data['data'][0]['title'] == "Python for Beginners"
+    mock_r.sinter.assert_called_once_with([
+        "books:trigram:hon",
+        "books:trigram:pyt",
+        "books:trigram:tho",
+        "books:trigram:yth",
+    ])
+    # The verified hits are ordered and paged by Redis
+    query_key = stored_query(mock_r)
+    pipe = mock_r.pipeline.return_value
+    pipe.sadd.assert_called_once_with(f"{query_key}:ids", "1")
+    pipe.zinterstore.assert_called_once_with(
+        query_key, {f"{query_key}:ids": 0, "books:order": 1}
+    )
+    mock_r.zrange.assert_called_once_with(
+        query_key, 0, 0, desc=False, withscores=True
+    )
+    mock_r.delete.assert_called_once_with(query_key, f"{query_key}:ids")
+
 
+@patch('app.main.get_redis')
+def test_books_search_discards_ngram_false_positives(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    # Both titles contain every trigram of "abcd", only one contains "abcd"
+    mock_r.sinter.return_value = {b'1', b'2'}
+    mock_r.hmget.side_effect = lambda key, ids: [
+        {"1": b'abcd', "2": b'abc bcd'}[book_id] for book_id in ids
+    ]
+    mock_r.zcard.return_value = 1
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "abcd",
+            "price": "5.00",
+            "category": "fiction",
+        }).encode('utf-8')
+    ]
 
-@patch('app.main.redis.Redis')
+    response = client.get('/books?search=abcd')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_books'] == 1
+    mock_r.mget.assert_called_once_with(["book:1"])
+    mock_r.pipeline.return_value.sadd.assert_called_once_with(
+        f"{stored_query(mock_r)}:ids", "1"
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_short_search_with_category(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.smembers.return_value = {b'1', b'2'}
+    mock_r.hmget.return_value = [b'go in action', b'rust']
+    mock_r.zcard.return_value = 1
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "Go in Action",
+            "price": "5.00",
+            "category": "programming",
+        }).encode('utf-8')
+    ]
+
+    response = client.get('/books?search=go&category=programming')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_books'] == 1
+    mock_r.sinter.assert_not_called()
+    mock_r.smembers.assert_called_once_with("books:category:programming")
+
+
+@patch('app.main.get_redis')
 def test_books_category_filter(mock_redis, client):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    mock_r.keys.return_value = [b'book:1']
-    mock_r.get.return_value = json.dumps({
-        "url": "https://example.com/book1",
-        "title": "Python Advanced",
-        "price": "25.99",
-        "category": "programming",
-        "image_url": "https://example.com/book1.jpg"
-    }).encode('utf-8')
+    mock_r.zcard.return_value = 1
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "Python Advanced",
+            "price": "25.99",
+            "category": "programming",
+            "image_url": "https://example.com/book1.jpg"
+        }).encode('utf-8')
+    ]
 
-    response = client.get('/books?category=programming')
+    response = client.get('/books?category=Programming')
     assert response.status_code == 200
     data = response.get_json()
     assert data['total_books'] == 1
     assert data['data'][0]['category'] == "programming"
+    mock_r.smembers.assert_not_called()
+    mock_r.pipeline.return_value.zinterstore.assert_called_once_with(
+        stored_query(mock_r), {"books:category:programming": 0,
+                               "books:order": 1}
+    )
 
 
-@patch('app.main.redis.Redis')
+@patch('app.main.get_redis')
 def test_books_pagination(mock_redis, client):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    # 15 libros falsos
-    mock_r.keys.return_value = [f'book:{i}'.encode('utf-8') for i in range(15)]
-    mock_r.get.side_effect = [
+    # 15 libros falsos, the index hands back the page plus one lookahead
+    mock_r.zrange.return_value = [
+        (str(i).encode('utf-8'), float(i)) for i in range(5, 11)
+    ]
+    mock_r.get.return_value = b'15'
+    mock_r.mget.return_value = [
         json.dumps({
             "url": f"https://example.com/book{i}",
             "title": f"Book {i}",
             "price": "9.99",
             "category": "fiction",
             "image_url": f"https://example.com/book{i}.jpg"
-        }).encode('utf-8') for i in range(15)
+        }).encode('utf-8') for i in range(5, 10)
     ]
 
     response = client.get('/books?page=2&limit=5')
     assert response.status_code == 200
     data = response.get_json()
     assert data['page'] == 2
+    assert data['total_books'] == 15
     assert len(data['data']) == 5
     assert data['data'][0]['title'] == "Book 5"
+    assert data['next_cursor'] is not None
+    mock_r.zrange.assert_called_once_with(
+        "books:order", 5, 10, desc=False, withscores=True
+    )
+    mock_r.mget.assert_called_once_with(
+        [f"book:{i}" for i in range(5, 10)]
+    )
 
 
-@patch('app.main.redis.Redis')
+@patch('app.main.get_redis')
 def test_books_malicious_input(mock_redis, client):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    mock_r.keys.return_value = [b'book:1']
-    mock_r.get.return_value = json.dumps({
-        "url": "https://example.com/book1",
-        "title": "<script>alert('XSS')</script>",
-        "price": "9.99",
-        "category": "programming",
-        "image_url": "https://example.com/book1.jpg"
-    }).encode('utf-8')
+    mock_r.sinter.return_value = {b'1'}
+    mock_r.hmget.return_value = [b"<script>alert('xss')</script>"]
+    mock_r.zcard.return_value = 1
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "<script>alert('XSS')</script>",
+            "price": "9.99",
+            "category": "programming",
+            "image_url": "https://example.com/book1.jpg"
+        }).encode('utf-8')
+    ]
 
     response = client.get('/books?search=<script>')
     assert response.status_code == 200
@@ -129,21 +243,384 @@ def test_books_malicious_input(mock_redis, client):
     assert data['total_books'] == 1
 
 
-@patch('app.main.redis.Redis')
+@patch('app.main.get_redis')
 def test_books_no_match(mock_redis, client):
     mock_r = MagicMock()
     mock_redis.return_value = mock_r
-    mock_r.keys.return_value = [b'book:1']
-    mock_r.get.return_value = json.dumps({
-        "url": "https://example.com/book1",
-        "title": "Python Programming",
-        "price": "29.99",
-        "category": "programming",
-        "image_url": "https://example.com/book1.jpg"
-    }).encode('utf-8')
+    mock_r.sinter.return_value = set()
 
     response = client.get('/books?search=java')
     assert response.status_code == 200
     data = response.get_json()
     assert data['total_books'] == 0
     assert data['data'] == []
+    mock_r.hmget.assert_not_called()
+    mock_r.pipeline.return_value.execute.assert_not_called()
+
+
+@patch('app.main.get_redis')
+def test_books_empty_catalog(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = None
+    mock_r.zrange.return_value = []
+
+    response = client.get('/books')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_books'] == 0
+    assert data['data'] == []
+
+
+@patch('app.redis_storage.READ_BATCH_SIZE', 2)
+@patch('app.main.get_redis')
+def test_books_fetched_in_mget_batches(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = b'3'
+    mock_r.zrange.return_value = [(b'1', 1.0), (b'2', 2.0), (b'3', 3.0)]
+    mock_r.mget.side_effect = lambda keys: [
+        json.dumps({
+            "url": f"https://example.com/{key}",
+            "title": key,
+            "price": "9.99",
+            "category": "fiction",
+        }).encode('utf-8') for key in keys
+    ]
+
+    response = client.get('/books')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [book['title'] for book in data['data']] == [
+        "book:1", "book:2", "book:3"
+    ]
+    assert mock_r.mget.call_count == 2
+    mock_r.get.assert_any_call("books:total")
+
+
+@patch('app.main.get_redis')
+def test_books_cursor_walks_order_index(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = b'3'
+    mock_r.zrank.return_value = 1
+    mock_r.zrange.return_value = [(b'3', 3.0)]
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book3",
+            "title": "Book 3",
+            "price": "9.99",
+            "category": "fiction",
+        }).encode('utf-8')
+    ]
+    cursor = encode_cursor(2.0, "2")
+
+    response = client.get(f'/books?limit=2&cursor={cursor}')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['data'][0]['title'] == "Book 3"
+    assert data['next_cursor'] is None
+    mock_r.zrank.assert_called_once_with("books:order", "2")
+    # Only the one book left after the cursor is read
+    mock_r.zrange.assert_called_once_with(
+        "books:order", 2, 2, desc=False, withscores=True
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_cursor_with_category(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    # Catalog order is c, a, b
+    mock_r.zcard.return_value = 3
+    mock_r.zrange.return_value = [(b'c', 1.0), (b'a', 2.0), (b'b', 3.0)]
+    mock_r.mget.side_effect = lambda keys: [book_json(key) for key in keys]
+
+    first = client.get('/books?category=fiction&limit=2').get_json()
+    assert [book['title'] for book in first['data']] == ["book:c", "book:a"]
+    assert first['total_books'] == 3
+    mock_r.zrange.assert_called_once_with(
+        stored_query(mock_r), 0, 2, desc=False, withscores=True
+    )
+
+    mock_r.zrange.reset_mock()
+    mock_r.zrange.return_value = [(b'b', 3.0)]
+    mock_r.zrank.return_value = 1
+    cursor = first['next_cursor']
+    second = client.get(
+        f'/books?category=fiction&limit=2&cursor={cursor}'
+    ).get_json()
+    assert [book['title'] for book in second['data']] == ["book:b"]
+    assert second['next_cursor'] is None
+    query_key = stored_query(mock_r)
+    mock_r.zrank.assert_called_once_with(query_key, "a")
+    mock_r.zrange.assert_called_once_with(
+        query_key, 2, 2, desc=False, withscores=True
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_category_sorted_by_price(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    # 1 book of the category cheaper than 10, 3 up to 20
+    mock_r.zcount.side_effect = [1, 3]
+    mock_r.zrange.return_value = [(b'b', 12.0), (b'c', 14.0)]
+    mock_r.mget.side_effect = lambda keys: [book_json(key) for key in keys]
+
+    response = client.get(
+        '/books?category=fiction&sort=price&min_price=10&max_price=20'
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_books'] == 2
+    assert [book['title'] for book in data['data']] == ["book:b", "book:c"]
+    # The category is scored by price in Redis, then read by rank
+    query_key = stored_query(mock_r)
+    pipe = mock_r.pipeline.return_value
+    pipe.zinterstore.assert_called_once_with(
+        query_key, {"books:category:fiction": 0, "books:by_price": 1}
+    )
+    mock_r.zcount.assert_any_call(query_key, "-inf", "(10.0")
+    mock_r.zrange.assert_called_once_with(
+        query_key, 1, 2, desc=False, withscores=True
+    )
+    mock_r.smembers.assert_not_called()
+    mock_r.zmscore.assert_not_called()
+
+
+@patch('app.main.get_redis')
+def test_books_price_range_in_catalog_order(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.zcard.return_value = 1
+    mock_r.zrange.return_value = [(b'a', 4.0)]
+    mock_r.mget.side_effect = lambda keys: [book_json(key) for key in keys]
+
+    response = client.get('/books?max_price=15')
+    assert response.status_code == 200
+    assert response.get_json()['total_books'] == 1
+    query_key = stored_query(mock_r)
+    pipe = mock_r.pipeline.return_value
+    pipe.zrangestore.assert_called_once_with(
+        f"{query_key}:ids", "books:by_price", "-inf", 15.0, byscore=True
+    )
+    pipe.zinterstore.assert_called_once_with(
+        query_key, {f"{query_key}:ids": 0, "books:order": 1}
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_invalid_cursor(mock_redis, client):
+    response = client.get('/books?cursor=not-a-cursor')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == "Invalid cursor"
+
+
+@patch('app.main.get_catalog_cache')
+@patch('app.main.get_redis')
+def test_books_served_from_catalog_cache(mock_redis, mock_cache, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_cache.return_value = CatalogCache()
+    mock_r.get.return_value = b'1'
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "Python 101",
+            "price": "19.99",
+            "category": "programming",
+        }).encode('utf-8')
+    ]
+
+    for _ in range(3):
+        response = client.get('/books')
+        assert response.status_code == 200
+        assert response.get_json()['data'][0]['title'] == "Python 101"
+
+    mock_r.zrange.assert_called_once()
+    mock_r.mget.assert_called_once()
+
+
+@patch('app.main.get_redis')
+def test_books_etag_not_modified(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = b'1'
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "Python 101",
+            "price": "19.99",
+            "category": "programming",
+        }).encode('utf-8')
+    ]
+
+    first = client.get('/books?page=1&limit=100')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert etag
+
+    mock_r.reset_mock()
+    second = client.get(
+        '/books?limit=100&page=1', headers={"If-None-Match": etag}
+    )
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+    mock_r.mget.assert_not_called()
+    mock_r.zrange.assert_not_called()
+
+
+@patch('app.main.get_redis')
+def test_books_etag_changes_with_catalog_version(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = b'1'
+    mock_r.zrange.return_value = []
+    etag = client.get('/books').headers['ETag']
+
+    mock_r.get.return_value = b'2'
+    response = client.get('/books', headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+@patch('app.main.get_redis')
+def test_books_price_range_sorted_by_price(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = b'1'
+    # 4 books cheaper than 10, 7 up to 15
+    mock_r.zcount.side_effect = [4, 7]
+    mock_r.zrange.return_value = [(b'5', 11.0), (b'6', 12.5), (b'7', 14.0)]
+    mock_r.mget.side_effect = lambda keys: [
+        json.dumps({
+            "url": f"https://example.com/{key}",
+            "title": key,
+            "price": "12.00",
+            "category": "fiction",
+        }).encode('utf-8') for key in keys
+    ]
+
+    response = client.get(
+        '/books?min_price=10&max_price=15&sort=price&limit=2&page=1'
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_books'] == 3
+    assert [book['title'] for book in data['data']] == ["book:5", "book:6"]
+    assert data['next_cursor'] is not None
+    mock_r.zcount.assert_any_call("books:by_price", "-inf", "(10.0")
+    mock_r.zcount.assert_any_call("books:by_price", "-inf", 15.0)
+    mock_r.zrange.assert_called_once_with(
+        "books:by_price", 4, 6, desc=False, withscores=True
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_sorted_by_price_descending(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = b'1'
+    mock_r.zcard.return_value = 2
+    mock_r.zrange.return_value = [(b'2', 19.0), (b'1', 11.0)]
+    mock_r.mget.side_effect = lambda keys: [
+        json.dumps({
+            "url": f"https://example.com/{key}",
+            "title": key,
+            "price": "12.00",
+            "category": "fiction",
+        }).encode('utf-8') for key in keys
+    ]
+
+    response = client.get('/books?sort=-price')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [book['title'] for book in data['data']] == ["book:2", "book:1"]
+    mock_r.zrange.assert_called_once_with(
+        "books:by_price", 0, 1, desc=True, withscores=True
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_category_sorted_by_title_with_price_range(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.zcard.return_value = 2
+    mock_r.zrange.return_value = [(b'c', 1.0), (b'b', 2.0)]
+    mock_r.mget.side_effect = lambda keys: [book_json(key) for key in keys]
+
+    response = client.get('/books?category=fiction&min_price=10&sort=title')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['total_books'] == 2
+    assert [book['title'] for book in data['data']] == ["book:c", "book:b"]
+
+    query_key = stored_query(mock_r)
+    ids_key = f"{query_key}:ids"
+    pipe = mock_r.pipeline.return_value
+    # The category is narrowed to the price range, then scored by title
+    pipe.zinterstore.assert_any_call(
+        ids_key, {"books:category:fiction": 0, "books:by_price": 1}
+    )
+    pipe.zremrangebyscore.assert_called_once_with(ids_key, "-inf", "(10.0")
+    pipe.zinterstore.assert_any_call(
+        query_key, {ids_key: 0, "books:by_title": 1}
+    )
+    mock_r.zrange.assert_called_once_with(
+        query_key, 0, 1, desc=False, withscores=True
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_unknown_sort(mock_redis, client):
+    response = client.get('/books?sort=author')
+    assert response.status_code == 400
+    assert "Unknown sort" in response.get_json()['message']
+
+
+@patch('app.main.get_redis')
+def test_books_cursor_from_other_sort(mock_redis, client):
+    cursor = encode_cursor(2.0, "2", sort="price")
+    response = client.get(f'/books?sort=title&cursor={cursor}')
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("fast", ["true", "false"])
+@patch('app.main.get_redis')
+def test_books_fast_serialization_matches_pydantic(mock_redis, client, fast):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = b'1'
+    mock_r.mget.return_value = [
+        json.dumps({
+            "url": "https://example.com/book1",
+            "title": "Python 101",
+            "price": "19.99",
+            "category": "programming",
+        }).encode('utf-8')
+    ]
+    mock_r.zrange.return_value = [(b'1', 1.0)]
+
+    with patch.dict("os.environ", {"FAST_SERIALIZATION": fast}):
+        response = client.get('/books')
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "message": "Success",
+        "total_books": 1,
+        "page": 1,
+        "page_size": 10,
+        "data": [{
+            "id": "1",
+            "title": "Python 101",
+            "price": 19.99,
+            "category": "programming",
+            "url": "https://example.com/book1",
+            "image_url": None,
+        }],
+        "next_cursor": None,
+    }
+    assert response.headers["ETag"]
@@ -0,0 +1,82 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+
+def stored_books(keys):
+    return [
+        None if key == "book:unknown" else json.dumps({
+            "url": f"https://example.com/{key}",
+            "title": key,
+            "price": "9.99",
+            "category": "fiction",
+        }).encode('utf-8') for key in keys
+    ]
+
+
+@patch('app.main.get_redis')
+def test_books_by_id_get(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.mget.side_effect = stored_books
+    mock_r.pipeline.return_value.execute.return_value = [{}]
+
+    response = client.get('/books/by-id?ids=b,unknown,a')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [book["id"] for book in data["data"]] == ["b", "a"]
+    assert data["data"][0]["title"] == "book:b"
+    assert data["missing"] == ["unknown"]
+    mock_r.mget.assert_called_once_with(
+        ["book:b", "book:unknown", "book:a"]
+    )
+
+
+@patch('app.main.get_redis')
+def test_books_by_id_post(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.mget.side_effect = stored_books
+    ids = [str(i) for i in range(300)]
+
+    response = client.post('/books/by-id', json={"ids": ids})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [book["id"] for book in data["data"]] == ids
+    assert data["missing"] == []
+    mock_r.mget.assert_called_once()
+
+
+@patch('app.main.get_redis')
+def test_books_by_id_too_many(mock_redis, client):
+    response = client.post(
+        '/books/by-id', json={"ids": [str(i) for i in range(501)]}
+    )
+    assert response.status_code == 400
+    mock_redis.assert_not_called()
+
+
+@pytest.mark.parametrize("body", [None, {"ids": "abc"}, {"ids": [1, 2]}])
+@patch('app.main.get_redis')
+def test_books_by_id_bad_body(mock_redis, client, body):
+    response = client.post('/books/by-id', json=body)
+    assert response.status_code == 400
+
+
+def test_books_by_id_no_ids(client):
+    response = client.get('/books/by-id')
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "No ids given"
+
+
+@patch('app.main.get_redis', side_effect=Exception("connection error"))
+def test_books_by_id_redis_failure(mock_redis, client):
+    response = client.get('/books/by-id?ids=a')
+    assert response.status_code == 500
@@ -0,0 +1,62 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+
+def stored_books(keys):
+    return [
+        json.dumps({
+            "url": f"https://example.com/{key}",
+            "title": key,
+            "price": "9.99",
+            "category": "fiction",
+        }).encode('utf-8') for key in keys
+    ]
+
+
+@patch('app.redis_storage.READ_BATCH_SIZE', 2)
+@patch('app.main.get_redis')
+def test_books_export_streams_ndjson(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.scan_iter.return_value = iter([b'book:1', b'book:2', b'book:3'])
+    mock_r.mget.side_effect = stored_books
+
+    response = client.get('/books/export')
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["title"] for line in lines] == [
+        "book:1", "book:2", "book:3"
+    ]
+    mock_r.scan_iter.assert_called_once_with(match="book:*", count=2)
+    # One MGET per SCAN batch
+    assert mock_r.mget.call_count == 2
+
+
+@patch('app.main.get_redis')
+def test_books_export_empty_catalog(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.scan_iter.return_value = iter([])
+
+    response = client.get('/books/export')
+    assert response.status_code == 200
+    assert response.get_data() == b''
+    mock_r.mget.assert_not_called()
+
+
+@patch('app.main.get_redis')
+def test_books_export_redis_failure(mock_redis, client):
+    mock_redis.return_value.ping.side_effect = Exception("connection error")
+
+    response = client.get('/books/export')
+    assert response.status_code == 500
+    assert "Error exporting books" in response.get_json()["message"]
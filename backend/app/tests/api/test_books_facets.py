@@ -0,0 +1,88 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+
+facets = {
+    "total_books": 3,
+    "price": {
+        "min": 10.0, "max": 20.0, "mean": 15.0,
+        "p25": 12.5, "p50": 15.0, "p75": 17.5, "p90": 19.0,
+    },
+    "categories": [
+        {
+            "name": "Poetry",
+            "count": 2,
+            "price": {
+                "min": 10.0, "max": 20.0, "mean": 15.0,
+                "p25": 12.5, "p50": 15.0, "p75": 17.5, "p90": 19.0,
+            },
+        },
+        {
+            "name": "Travel",
+            "count": 1,
+            "price": {
+                "min": 15.0, "max": 15.0, "mean": 15.0,
+                "p25": 15.0, "p50": 15.0, "p75": 15.0, "p90": 15.0,
+            },
+        },
+    ],
+    "updated_at": "2025-04-20T10:00:00+00:00",
+}
+
+
+@patch('app.main.get_redis')
+def test_books_facets_success(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = json.dumps(facets).encode('utf-8')
+
+    response = client.get('/books/facets')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["message"] == "Success"
+    assert data["total_books"] == 3
+    assert data["categories"][0]["name"] == "Poetry"
+    assert data["categories"][0]["price"]["p50"] == 15.0
+    # One small document, no scan of the books
+    mock_r.get.assert_called_once_with("books:facets")
+    mock_r.mget.assert_not_called()
+
+
+@patch('app.main.get_redis')
+def test_books_facets_empty_catalog(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = None
+
+    response = client.get('/books/facets')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["total_books"] == 0
+    assert data["categories"] == []
+    assert data["price"] is None
+
+
+@patch('app.main.get_redis')
+def test_books_facets_not_modified(mock_redis, client):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_r.get.return_value = json.dumps(facets).encode('utf-8')
+
+    etag = client.get('/books/facets').headers['ETag']
+    response = client.get('/books/facets', headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+@patch('app.main.get_redis', side_effect=Exception("connection error"))
+def test_books_facets_redis_failure(mock_redis, client):
+    response = client.get('/books/facets')
+    assert response.status_code == 500
+    assert "Error retrieving facets" in response.get_json()["message"]
@@ -1,6 +1,9 @@
+import json
+import time
 import pytest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from app.main import app
+from app.singleflight import SingleFlight
 
 
 @pytest.fixture
@@ -9,6 +12,17 @@ def client():
         yield client
 
 
+@pytest.fixture(autouse=True)
+def mock_r():
+    """Redis without stored headlines, so every request scrapes."""
+    with patch('app.main.get_redis') as mock_redis:
+        mock_r = MagicMock()
+        mock_r.get.return_value = None
+        mock_r.mget.side_effect = lambda keys: [None] * len(keys)
+        mock_redis.return_value = mock_r
+        yield mock_r
+
+
 # News mock
 mock_news = [
     {"title": "Noticia 1", "url": "https://example.com/1", "score": 120},
@@ -54,3 +68,160 @@ def test_headlines_custom_page(mock_get_hn, client):
     assert "title" in data["data"][0]
     assert "url" in data["data"][0]
     assert "score" in data["data"][0]
+
+
+@patch('app.main.get_hackernews_top_stories')
+def test_headlines_etag_not_modified(mock_get_hn, client):
+    mock_get_hn.return_value = mock_news
+
+    first = client.get('/headlines')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+
+    second = client.get('/headlines', headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.data == b''
+
+    mock_get_hn.return_value = mock_news[:1]
+    third = client.get('/headlines', headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers['ETag'] != etag
+
+
+def snapshot(stories, age):
+    return json.dumps({
+        "stories": stories, "fetched_at": time.time() - age
+    }).encode('utf-8')
+
+
+@patch('app.main.refresh_headlines_task')
+@patch('app.main.get_hackernews_top_stories')
+def test_headlines_served_from_fresh_snapshot(
+    mock_get_hn, mock_task, mock_r, client
+):
+    mock_r.mget.side_effect = None
+    mock_r.mget.return_value = [snapshot(mock_news, age=10)]
+
+    response = client.get('/headlines?page=2')
+    assert response.status_code == 200
+    assert response.get_json()["data"] == mock_news
+    mock_r.mget.assert_called_once_with(["hn:page:2"])
+    mock_get_hn.assert_not_called()
+    mock_task.delay.assert_not_called()
+
+
+@patch('app.main.refresh_headlines_task')
+@patch('app.main.get_hackernews_top_stories')
+def test_headlines_stale_snapshot_refreshed_in_background(
+    mock_get_hn, mock_task, mock_r, client
+):
+    mock_r.mget.side_effect = None
+    mock_r.mget.return_value = [snapshot(mock_news, age=3600)]
+    mock_r.set.return_value = True
+
+    response = client.get('/headlines')
+    assert response.status_code == 200
+    assert response.get_json()["data"] == mock_news
+    mock_get_hn.assert_not_called()
+    mock_task.delay.assert_called_once_with([1])
+
+    # Another request while the refresh is pending does not queue again
+    mock_r.set.return_value = None
+    client.get('/headlines')
+    mock_task.delay.assert_called_once()
+
+
+@patch('app.main.get_hackernews_top_stories')
+def test_headlines_cold_cache_stores_snapshot(mock_get_hn, mock_r, client):
+    mock_get_hn.return_value = mock_news
+
+    response = client.get('/headlines')
+    assert response.status_code == 200
+    mock_get_hn.assert_called_once_with(1)
+    stored = {
+        call[0][0]: json.loads(call[0][1])
+        for call in mock_r.set.call_args_list
+    }
+    assert stored["hn:page:1"]["stories"] == mock_news
+
+
+@patch('app.main.get_hackernews_top_stories')
+def test_headlines_cold_cache_waits_for_other_worker(
+    mock_get_hn, mock_r, client
+):
+    # Another API worker holds the scrape lock and stores its result
+    mock_r.lock.return_value.acquire.return_value = False
+    mock_r.get.side_effect = lambda key: (
+        json.dumps(mock_news).encode('utf-8')
+        if key == "singleflight:result:hn:page:1" else None
+    )
+
+    response = client.get('/headlines')
+    assert response.status_code == 200
+    assert response.get_json()["data"] == mock_news
+    mock_get_hn.assert_not_called()
+
+
+@patch('app.main.headlines_flight', SingleFlight(wait_timeout=0))
+@patch('app.main.get_hackernews_top_stories')
+def test_headlines_wait_timeout_does_not_scrape(mock_get_hn, mock_r, client):
+    # Another API worker holds the scrape lock for too long
+    mock_r.lock.return_value.acquire.return_value = False
+
+    response = client.get('/headlines')
+    assert response.status_code == 500
+    mock_get_hn.assert_not_called()
+
+    # Unless it stored the page meanwhile
+    mock_r.mget.side_effect = [[None], [snapshot(mock_news, age=0)]]
+    response = client.get('/headlines')
+    assert response.status_code == 200
+    assert response.get_json()["data"] == mock_news
+    mock_get_hn.assert_not_called()
+
+
+@patch('app.main.refresh_headlines_task')
+@patch('app.main.get_hackernews_top_stories')
+def test_headlines_page_range_merged(mock_get_hn, mock_task, mock_r, client):
+    # Page 1 is stored, pages 2 and 3 are scraped in parallel; a story
+    # that moved from page 1 to page 2 is listed once
+    mock_r.mget.side_effect = None
+    mock_r.mget.return_value = [snapshot(mock_news[:2], age=10), None, None]
+    mock_get_hn.side_effect = lambda page: {
+        2: [mock_news[1], mock_news[2]],
+        3: [{"title": "Noticia 4", "url": "https://example.com/4",
+             "score": 5}],
+    }[page]
+
+    response = client.get('/headlines?pages=1-3')
+    assert response.status_code == 200
+    assert [story["url"] for story in response.get_json()["data"]] == [
+        "https://example.com/1",
+        "https://example.com/2",
+        "https://example.com/3",
+        "https://example.com/4",
+    ]
+    mock_r.mget.assert_called_once_with(
+        ["hn:page:1", "hn:page:2", "hn:page:3"]
+    )
+    assert sorted(call[0][0] for call in mock_get_hn.call_args_list) == [2, 3]
+    mock_task.delay.assert_not_called()
+
+
+@pytest.mark.parametrize("pages", ["a-b", "0-2", "3-1", "1-11"])
+def test_headlines_invalid_pages(pages, mock_r, client):
+    response = client.get(f'/headlines?pages={pages}')
+    assert response.status_code == 400
+    mock_r.mget.assert_not_called()
+
+
+def test_headlines_trending(mock_r, client):
+    mock_r.zrevrange.return_value = [(b'a', 60.0)]
+    mock_r.hmget.return_value = [json.dumps(mock_news[0])]
+
+    response = client.get('/headlines/trending?limit=500')
+    assert response.status_code == 200
+    assert response.get_json()["data"] == [dict(mock_news[0], velocity=60.0)]
+    mock_r.zrevrange.assert_called_once_with(
+        "hn:trending", 0, 99, withscores=True
+    )
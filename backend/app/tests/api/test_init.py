@@ -27,3 +27,37 @@ def test_init_failure(mock_scrape_task, client):
     assert response.status_code == 500
     data = response.get_json()
     assert "Error" in data["message"]
+
+
+@patch('app.main.get_redis')
+@patch('app.tasks.scrape_books_task.delay')
+def test_init_new_run(mock_scrape_task, mock_get_redis, client):
+    mock_scrape_task.return_value.id = "1234"
+    response = client.post('/init')
+    run_id = response.get_json()["run_id"]
+    assert run_id
+    mock_scrape_task.assert_called_once_with(run_id=run_id)
+    mock_get_redis.assert_not_called()
+
+
+@patch('app.main.get_redis')
+@patch('app.tasks.scrape_books_task.delay')
+def test_init_resume(mock_scrape_task, mock_get_redis, client):
+    mock_get_redis.return_value.exists.return_value = 1
+    mock_scrape_task.return_value.id = "1234"
+    response = client.post('/init?resume=run')
+    assert response.status_code == 200
+    assert response.get_json()["run_id"] == "run"
+    mock_get_redis.return_value.exists.assert_called_once_with(
+        "scrape:run:run"
+    )
+    mock_scrape_task.assert_called_once_with(run_id="run")
+
+
+@patch('app.main.get_redis')
+@patch('app.tasks.scrape_books_task.delay')
+def test_init_resume_unknown_run(mock_scrape_task, mock_get_redis, client):
+    mock_get_redis.return_value.exists.return_value = 0
+    response = client.post('/init?resume=missing')
+    assert response.status_code == 404
+    mock_scrape_task.assert_not_called()
@@ -1,16 +1,10 @@
-import pytest
-from unittest.mock import MagicMock, patch
-from bs4 import BeautifulSoup
+import threading
+import time
+from unittest.mock import MagicMock
+from app.scraping.parsers import parse_catalog
 from app.scraping.scrape_books import extract_books_from_page
 
 
-# Fixture global para evitar que time.sleep ralentice los tests
-@pytest.fixture(autouse=True)
-def no_sleep():
-    with patch("time.sleep", return_value=None):
-        yield
-
-
 # Mocking the helper variables and constants
 BASE_URL = "https://books.toscrape.com/catalogue/page-{}.html"
 DETAIL_URL_PREFIX = "https://books.toscrape.com/catalogue/"
@@ -52,12 +46,11 @@ CATALOG_PAGE_HTML = """
 
 # Test 1: Test successful book extraction
 def test_extract_books_from_page_success():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = BOOK_PAGE_HTML
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.return_value = BOOK_PAGE_HTML
 
-    soup = BeautifulSoup(CATALOG_PAGE_HTML, 'html.parser')
-    books = extract_books_from_page(soup, mock_driver, 1)
+    catalog = parse_catalog(CATALOG_PAGE_HTML)
+    books = extract_books_from_page(catalog, mock_fetcher, 1)
 
     assert len(books) == 1
     assert books[0].title == "Book Title"
@@ -68,12 +61,11 @@ def test_extract_books_from_page_success():
 
 # Test 2: Ensure books with price > 20 are skipped
 def test_extract_books_from_page_price_filter():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = BOOK_PAGE_HTML
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.return_value = BOOK_PAGE_HTML
 
-    soup = BeautifulSoup(CATALOG_PAGE_HTML, 'html.parser')
-    books = extract_books_from_page(soup, mock_driver, 2)
+    catalog = parse_catalog(CATALOG_PAGE_HTML)
+    books = extract_books_from_page(catalog, mock_fetcher, 2)
 
     assert len(books) == 1
     assert books[0].title == "Book Title"
@@ -81,8 +73,7 @@ def test_extract_books_from_page_price_filter():
 
 # Test 3: Handling missing elements or invalid structure
 def test_extract_books_from_page_error_handling():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
+    mock_fetcher = MagicMock()
 
     broken_book_page_html = """
     <html>
@@ -93,7 +84,7 @@ def test_extract_books_from_page_error_handling():
         </body>
     </html>
     """
-    mock_driver.page_source = broken_book_page_html
+    mock_fetcher.get_html.return_value = broken_book_page_html
 
     broken_catalog_html = """
     <html>
@@ -105,38 +96,34 @@ def test_extract_books_from_page_error_handling():
         </body>
     </html>
     """
-    soup = BeautifulSoup(broken_catalog_html, 'html.parser')
-    books = extract_books_from_page(soup, mock_driver, 1)
+    catalog = parse_catalog(broken_catalog_html)
+    books = extract_books_from_page(catalog, mock_fetcher, 1)
 
     assert len(books) == 0
 
 
-# Test 4: Ensure driver.get and time.sleep are called
-def test_extract_books_from_page_driver_get_and_sleep():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = BOOK_PAGE_HTML
+# Test 4: Ensure the detail page is fetched once
+def test_extract_books_from_page_fetches_detail_page():
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.return_value = BOOK_PAGE_HTML
 
-    soup = BeautifulSoup(CATALOG_PAGE_HTML, 'html.parser')
+    catalog = parse_catalog(CATALOG_PAGE_HTML)
 
-    with patch("time.sleep") as mock_sleep:
-        extract_books_from_page(soup, mock_driver, 1)
+    extract_books_from_page(catalog, mock_fetcher, 1)
 
-        mock_driver.get.assert_called_with(
-            "https://books.toscrape.com/catalogue/book/1"
-            )
-        mock_driver.get.assert_called_once()
-        mock_sleep.assert_called_once_with(1)
+    mock_fetcher.get_html.assert_called_once_with(
+        "https://books.toscrape.com/catalogue/book/1",
+        ready_selector="div.item.active img"
+        )
 
 
 # Test 5: Stop when 'remaining' limit is reached
 def test_extract_books_from_page_remaining_limit():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = BOOK_PAGE_HTML
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.return_value = BOOK_PAGE_HTML
 
-    soup = BeautifulSoup(CATALOG_PAGE_HTML, 'html.parser')
-    books = extract_books_from_page(soup, mock_driver, 1)
+    catalog = parse_catalog(CATALOG_PAGE_HTML)
+    books = extract_books_from_page(catalog, mock_fetcher, 1)
 
     assert len(books) == 1
     assert books[0].title == "Book Title"
@@ -144,12 +131,47 @@ def test_extract_books_from_page_remaining_limit():
 
 # Test 6: Handle empty catalog page (no books)
 def test_extract_books_from_page_empty_catalog():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = BOOK_PAGE_HTML
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.return_value = BOOK_PAGE_HTML
 
     empty_catalog_html = "<html><body></body></html>"
-    soup = BeautifulSoup(empty_catalog_html, 'html.parser')
-    books = extract_books_from_page(soup, mock_driver, 1)
+    catalog = parse_catalog(empty_catalog_html)
+    books = extract_books_from_page(catalog, mock_fetcher, 1)
 
     assert len(books) == 0
+
+
+# Test 7: Detail pages are fetched concurrently, in waves of 'remaining'
+def test_extract_books_from_page_concurrent_waves():
+    catalog_html = "".join(
+        f'<article class="product_pod"><h3>'
+        f'<a title="Book {i}" href="book/{i}">Book {i}</a></h3>'
+        f'<p class="price_color">£10.00</p></article>'
+        for i in range(6)
+    )
+    fetched = []
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def get_html(url, ready_selector=None):
+        with lock:
+            fetched.append(url)
+            in_flight.append(url)
+            peak.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.remove(url)
+        # The second book has a broken detail page
+        return "<html></html>" if url.endswith("book/1") else BOOK_PAGE_HTML
+
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.side_effect = get_html
+
+    catalog = parse_catalog(catalog_html)
+    books = extract_books_from_page(catalog, mock_fetcher, 3)
+
+    assert [book.title for book in books] == ["Book 0", "Book 2", "Book 3"]
+    # Three at once, then one more to replace the broken book
+    assert len(fetched) == 4
+    assert max(peak) > 1
@@ -1,77 +1,64 @@
 import pytest
+import requests
 from unittest.mock import MagicMock, patch
 from selenium.common.exceptions import TimeoutException
-from bs4 import BeautifulSoup
+from app.scraping.fetchers import PageNotFound
+from app.scraping.parsers import CatalogPage
 from app.scraping.scrape_books import get_catalog_page, BASE_URL
 
 
-# Fixture para desactivar time.sleep en todos los tests
-@pytest.fixture(autouse=True)
-def no_sleep():
-    with patch("time.sleep", return_value=None):
-        yield
-
-
 def test_get_catalog_page_success():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = "<html><body>Catalog Page</body></html>"
-    mock_driver.find_elements = MagicMock(return_value=[])
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.return_value = (
+        '<html><body><article class="product_pod">'
+        '<h3><a title="Book" href="book/1">Book</a></h3>'
+        '<p class="price_color">£15.99</p></article>'
+        '<ul class="pager"><li class="current">Page 1 of 50</li></ul>'
+        '</body></html>'
+    )
 
-    result = get_catalog_page(mock_driver, 1)
+    result = get_catalog_page(mock_fetcher, 1)
 
-    mock_driver.get.assert_called_with(BASE_URL.format(1))
-    assert isinstance(result, BeautifulSoup)
-    assert "Catalog Page" in result.prettify()
+    mock_fetcher.get_html.assert_called_with(
+        BASE_URL.format(1), ready_selector="article.product_pod"
+    )
+    assert isinstance(result, CatalogPage)
+    assert result.books == [("Book", "15.99", "book/1")]
+    assert result.page_count == 50
 
 
 def test_get_catalog_page_not_found():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = "<html><body>Catalog Page</body></html>"
-    mock_driver.find_elements = MagicMock(return_value=[MagicMock()])
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.side_effect = PageNotFound("gone")
 
     with pytest.raises(ValueError, match="Page 1 not found."):
-        get_catalog_page(mock_driver, 1)
+        get_catalog_page(mock_fetcher, 1)
 
 
-def test_get_catalog_page_timeout():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock(side_effect=TimeoutException)
+@pytest.mark.parametrize("error", [TimeoutException, requests.Timeout])
+def test_get_catalog_page_timeout(error):
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.side_effect = error
 
-    with pytest.raises(TimeoutException):
-        get_catalog_page(mock_driver, 1)
+    with pytest.raises(error):
+        get_catalog_page(mock_fetcher, 1)
 
 
 def test_get_catalog_page_empty_content():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = "<html><body></body></html>"
-    mock_driver.find_elements = MagicMock(return_value=[])
-
-    result = get_catalog_page(mock_driver, 1)
-
-    assert isinstance(result, BeautifulSoup)
-    assert "body" in result.prettify()
-
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.return_value = "<html><body></body></html>"
 
-def test_get_catalog_page_with_sleep_called():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock()
-    mock_driver.page_source = "<html><body>Catalog Page</body></html>"
-    mock_driver.find_elements = MagicMock(return_value=[])
+    result = get_catalog_page(mock_fetcher, 1)
 
-    with patch("time.sleep") as mock_sleep:
-        get_catalog_page(mock_driver, 1)
-        mock_sleep.assert_called_once_with(2)
+    assert result == CatalogPage([], 1)
 
 
 def test_get_catalog_page_logging_timeout():
-    mock_driver = MagicMock()
-    mock_driver.get = MagicMock(side_effect=TimeoutException)
+    mock_fetcher = MagicMock()
+    mock_fetcher.get_html.side_effect = TimeoutException
 
     with patch("logging.warning") as mock_warning:
         with pytest.raises(TimeoutException):
-            get_catalog_page(mock_driver, 1)
+            get_catalog_page(mock_fetcher, 1)
 
         mock_warning.assert_called_once_with("Timeout on page 1")
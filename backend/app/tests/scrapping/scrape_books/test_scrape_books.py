@@ -1,141 +1,377 @@
-from unittest.mock import patch, MagicMock
+import pytest
+from unittest.mock import patch, MagicMock, ANY, call
+from app.models import ScrapedBook
+from app.scraping.parsers import CatalogPage, ListedBook
 from app.scraping.scrape_books import scrape_books
 
 
-# Test 1: Successful scraping flow
-@patch("app.scraping.scrape_books.save_books_into_redis_database")
+def book(n, category="Fiction"):
+    return {
+        "title": f"Book {n}",
+        "url": f"url{n}",
+        "price": "10.99",
+        "category": category,
+        "image_url": None
+    }
+
+
+def scraped(n):
+    return ScrapedBook(**book(n))
+
+
+def listing(page, page_count):
+    """A catalog page listing one book, told apart by its number."""
+    return CatalogPage(
+        [ListedBook(f"Book {page}", "10.00", f"book/{page}")], page_count
+    )
+
+
+def stored(mock_sink):
+    sink = mock_sink.return_value.__enter__.return_value
+    return [c[0][0] for c in sink.add.call_args_list]
+
+
+def storing(mock_sink):
+    """Make the sink write each book as soon as it is added."""
+    sink = mock_sink.return_value.__enter__.return_value
+    sink.add.side_effect = lambda book: (
+        mock_sink.call_args.kwargs["on_write"]([book])
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay():
+    with patch("app.utils.time.sleep", return_value=None):
+        yield
+
+
+def checkpoints(mock_redis):
+    """The mappings of the checkpoints saved during the run."""
+    mock_pipe = mock_redis.pipeline.return_value
+    return [c.kwargs["mapping"] for c in mock_pipe.hset.call_args_list]
+
+
+@pytest.fixture
+def mock_redis():
+    """Redis without checkpoints, so every run starts from scratch."""
+    with patch("app.scraping.scrape_books.get_redis") as mock_get_redis:
+        mock_redis = mock_get_redis.return_value
+        mock_redis.hgetall.return_value = {}
+        yield mock_redis
+
+
+@pytest.fixture(autouse=True)
+def history(mock_redis):
+    """Page history where every scraped book is new."""
+    with patch("app.scraping.scrape_books.PageHistory") as mock_history:
+        history = mock_history.return_value
+        history.changed_books.side_effect = lambda books: books
+        yield history
+
+
+# Test 1: Successful scraping flow, pages fetched after reading the count
+@patch("app.scraping.scrape_books.BookSink")
 @patch("app.scraping.scrape_books.extract_books_from_page")
 @patch("app.scraping.scrape_books.get_catalog_page")
-@patch("app.scraping.scrape_books.webdriver.Chrome")
+@patch("app.scraping.scrape_books.create_fetcher")
 def test_scrape_books_success(
-    mock_chrome,
+    mock_create_fetcher,
     mock_get_catalog,
     mock_extract,
-    mock_save
+    mock_sink,
+    history
 ):
-    mock_driver = MagicMock()
-    mock_chrome.return_value = mock_driver
-    mock_get_catalog.return_value = "soup"
-    mock_extract.side_effect = [
-        [
-            {
-                "title": "Book 1",
-                "url": "url1",
-                "price": "10.99",
-                "category": "Fiction",
-                "image_url": None
-            },
-            {
-                "title": "Book 2",
-                "url": "url2",
-                "price": "12.99",
-                "category": "Fiction",
-                "image_url": None
-            }
-        ],
-        [
-            {
-                "title": "Book 3",
-                "url": "url3",
-                "price": "15.99",
-                "category": "Sci-Fi",
-                "image_url": None
-            }
-        ],
-        []
-    ]
+    mock_fetcher = MagicMock()
+    mock_create_fetcher.return_value = mock_fetcher
+    mock_get_catalog.side_effect = lambda fetcher, page: listing(page, 50)
+    mock_extract.side_effect = [[scraped(1), scraped(2)], [scraped(3)]]
 
     scrape_books(limit=3)
 
-    assert mock_extract.call_count == 2
-    mock_save.assert_called_once_with([
-        {
-            "title": "Book 1",
-            "url": "url1",
-            "price": "10.99",
-            "category": "Fiction",
-            "image_url": None
-        },
-        {
-            "title": "Book 2",
-            "url": "url2",
-            "price": "12.99",
-            "category": "Fiction",
-            "image_url": None
-        },
-        {
-            "title": "Book 3",
-            "url": "url3",
-            "price": "15.99",
-            "category": "Sci-Fi",
-            "image_url": None
-        }
-    ])
-    mock_driver.quit.assert_called_once()
-
-
-# Test 2: Skip a page when an error occurs
-@patch("app.scraping.scrape_books.save_books_into_redis_database")
-@patch(
-    "app.scraping.scrape_books.extract_books_from_page",
-    side_effect=Exception("boom")
-)
+    assert mock_extract.call_args_list == [
+        call(listing(1, 50), mock_fetcher, 3, history, ANY),
+        call(listing(2, 50), mock_fetcher, 1, history, ANY),
+    ]
+    # Page 1, then one window of listing pages; no more once limit is met
+    assert sorted(c[0][1] for c in mock_get_catalog.call_args_list) == [
+        1, 2, 3, 4, 5
+    ]
+    assert stored(mock_sink) == [book(1), book(2), book(3)]
+    mock_sink.return_value.__exit__.assert_called_once()
+    mock_fetcher.close.assert_called_once()
+
+
+# Test 2: A page that fails is skipped, the crawl goes on
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
 @patch("app.scraping.scrape_books.get_catalog_page")
-@patch("app.scraping.scrape_books.webdriver.Chrome")
+@patch("app.scraping.scrape_books.create_fetcher")
 def test_scrape_books_page_error(
-    mock_chrome,
+    mock_create_fetcher,
     mock_get_catalog,
     mock_extract,
-    mock_save
+    mock_sink
 ):
-    mock_driver = MagicMock()
-    mock_chrome.return_value = mock_driver
-    mock_get_catalog.return_value = "soup"
+    mock_fetcher = MagicMock()
+    mock_create_fetcher.return_value = mock_fetcher
+
+    def get_catalog(fetcher, page):
+        if page == 2:
+            raise ValueError("Page 2 not found.")
+        return listing(page, 3)
+
+    mock_get_catalog.side_effect = get_catalog
+    mock_extract.side_effect = [Exception("boom"), [scraped(3)]]
 
     scrape_books(limit=3)
 
-    mock_extract.assert_called_once()
-    mock_save.assert_called_once_with([])
-    mock_driver.quit.assert_called_once()
+    assert [c[0][0] for c in mock_extract.call_args_list] == [
+        listing(1, 3), listing(3, 3)
+    ]
+    assert stored(mock_sink) == [book(3)]
+    mock_fetcher.close.assert_called_once()
 
 
-# Test 4: Break loop when no books are returned
-@patch("app.scraping.scrape_books.save_books_into_redis_database")
-@patch("app.scraping.scrape_books.extract_books_from_page", return_value=[])
+# Test 3: Pages without cheap books do not end the crawl
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
 @patch("app.scraping.scrape_books.get_catalog_page")
-@patch("app.scraping.scrape_books.webdriver.Chrome")
-def test_scrape_books_break_on_empty(
-    mock_chrome,
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_continue_on_empty(
+    mock_create_fetcher,
     mock_get_catalog,
     mock_extract,
-    mock_save
+    mock_sink
 ):
-    mock_driver = MagicMock()
-    mock_chrome.return_value = mock_driver
-    mock_get_catalog.return_value = "soup"
+    mock_create_fetcher.return_value = MagicMock()
+    mock_get_catalog.side_effect = lambda fetcher, page: listing(page, 2)
+    mock_extract.side_effect = [[], [scraped(1)]]
 
     scrape_books(limit=5)
 
-    mock_extract.assert_called_once()
-    mock_save.assert_called_once_with([])
-    mock_driver.quit.assert_called_once()
+    assert mock_extract.call_count == 2
+    assert stored(mock_sink) == [book(1)]
 
 
-# Test 5: Always close the browser (finally block)
-@patch("app.scraping.scrape_books.webdriver.Chrome")
-def test_scrape_books_driver_quit_called(mock_chrome):
-    mock_driver = MagicMock()
-    mock_chrome.return_value = mock_driver
+# Test 4: Only new or changed books are written
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
+@patch("app.scraping.scrape_books.get_catalog_page")
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_unchanged_catalog(
+    mock_create_fetcher,
+    mock_get_catalog,
+    mock_extract,
+    mock_sink,
+    history
+):
+    mock_get_catalog.side_effect = lambda fetcher, page: listing(page, 1)
+    mock_extract.return_value = [scraped(1), scraped(2)]
+    history.changed_books.side_effect = lambda books: books[1:]
+
+    scrape_books(limit=5)
+    assert stored(mock_sink) == [book(2)]
+
+
+# Test 5: Books stored so far are kept when the crawl fails
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
+@patch("app.scraping.scrape_books.get_catalog_page")
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_partial_progress(
+    mock_create_fetcher,
+    mock_get_catalog,
+    mock_extract,
+    mock_sink
+):
+    mock_get_catalog.side_effect = lambda fetcher, page: listing(page, 2)
+    mock_extract.return_value = [scraped(1)]
+
+    with patch(
+        "app.scraping.scrape_books.get_listing_pages",
+        side_effect=RuntimeError("crash")
+    ), pytest.raises(RuntimeError):
+        scrape_books(limit=5)
+
+    # Closed on every attempt, each after adding page 1's book
+    assert stored(mock_sink) == [book(1)] * 3
+    assert mock_sink.return_value.__exit__.call_count == 3
+
+
+# Test 6: Always close the fetcher (finally block)
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_fetcher_closed(mock_create_fetcher):
+    mock_fetcher = MagicMock()
+    mock_create_fetcher.return_value = mock_fetcher
 
     with patch(
         "app.scraping.scrape_books.get_catalog_page",
         side_effect=Exception("error")
     ), patch(
-        "app.scraping.scrape_books.logging.warning"
-    ), patch(
-        "app.scraping.scrape_books.extract_books_from_page"
-    ), patch(
-        "app.scraping.scrape_books.save_books_into_redis_database"
-    ):
+        "app.scraping.scrape_books.BookSink"
+    ) as mock_sink:
+        # Without the first page the page count is unknown
+        with pytest.raises(Exception, match="error"):
+            scrape_books(limit=5)
+        mock_sink.assert_not_called()
+
+    # Once per attempt of the retry decorator
+    assert mock_fetcher.close.call_count == 3
+
+
+# Test 7: Page history is recorded once the books are stored
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
+@patch("app.scraping.scrape_books.get_catalog_page")
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_commits_history_after_write(
+    mock_create_fetcher,
+    mock_get_catalog,
+    mock_extract,
+    mock_sink,
+    history
+):
+    mock_get_catalog.side_effect = lambda fetcher, page: listing(page, 1)
+    mock_extract.return_value = [scraped(1), scraped(2)]
+    history.changed_books.side_effect = lambda books: books[1:]
+
+    scrape_books(limit=5)
+
+    # The unchanged book is already stored, the changed one waits for
+    # its batch to be written
+    assert [list(c[0][0]) for c in history.commit.call_args_list] == [
+        ["url1"]
+    ]
+    on_write = mock_sink.call_args.kwargs["on_write"]
+    on_write([book(2)])
+    assert list(history.commit.call_args[0][0]) == ["url2"]
+
+
+# Test 8: Progress is checkpointed under the run ID
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
+@patch("app.scraping.scrape_books.get_catalog_page")
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_checkpoint(
+    mock_create_fetcher,
+    mock_get_catalog,
+    mock_extract,
+    mock_sink,
+    mock_redis
+):
+    storing(mock_sink)
+    mock_get_catalog.side_effect = lambda fetcher, page: listing(page, 2)
+    mock_extract.side_effect = [[scraped(1)], [scraped(2)]]
+
+    run_id = scrape_books(limit=5, run_id="run")
+
+    assert run_id == "run"
+    mock_redis.hgetall.assert_called_once_with("scrape:run:run")
+    final = checkpoints(mock_redis)[-1]
+    assert final["status"] == "done"
+    assert final["last_page"] == 2
+    assert final["page_count"] == 2
+    assert final["collected"] == 2
+    # Each visit is saved once its book is written
+    assert mock_redis.pipeline.return_value.sadd.call_args_list == [
+        call("scrape:run:run:visited", "url1"),
+        call("scrape:run:run:visited", "url2"),
+    ]
+
+
+# Test 9: Every page is checkpointed, a page once its books are stored
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
+@patch("app.scraping.scrape_books.get_catalog_page")
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_checkpoint_every_page(
+    mock_create_fetcher,
+    mock_get_catalog,
+    mock_extract,
+    mock_sink,
+    mock_redis,
+    history
+):
+    sink = mock_sink.return_value.__enter__.return_value
+    mock_get_catalog.side_effect = lambda fetcher, page: listing(page, 3)
+    mock_extract.side_effect = [[scraped(1)], [scraped(2)], [scraped(3)]]
+    # Page 2's book changed and waits in the sink for its batch
+    history.changed_books.side_effect = [[], [book(2)], []]
+
+    scrape_books(limit=5, run_id="run")
+
+    # The batch is not flushed early, and the checkpoints stop before
+    # page 2 and leave out its book
+    sink.flush.assert_not_called()
+    mock_pipe = mock_redis.pipeline.return_value
+    assert [c["last_page"] for c in checkpoints(mock_redis)] == [1, 1, 1, 1]
+    assert checkpoints(mock_redis)[-1]["collected"] == 2
+    assert all(
+        "url2" not in c[0][1:] for c in mock_pipe.sadd.call_args_list
+    )
+
+    # Once the batch is written, the run is checkpointed past page 3
+    mock_sink.call_args.kwargs["on_write"]([book(2)])
+    assert checkpoints(mock_redis)[-1]["last_page"] == 3
+    mock_pipe.sadd.assert_called_with("scrape:run:run:visited", "url2")
+
+
+# Test 10: A run resumes after its last complete page, skipping the books
+# it already collected
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.extract_books_from_page")
+@patch("app.scraping.scrape_books.get_listing_pages")
+@patch("app.scraping.scrape_books.get_catalog_page")
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_resume(
+    mock_create_fetcher,
+    mock_get_catalog,
+    mock_listing_pages,
+    mock_extract,
+    mock_sink,
+    mock_redis,
+    history
+):
+    mock_fetcher = MagicMock()
+    mock_create_fetcher.return_value = mock_fetcher
+    mock_redis.hgetall.return_value = {
+        b"last_page": b"2", b"page_count": b"3", b"status": b"failed"
+    }
+    mock_redis.smembers.return_value = {b"url1", b"url2"}
+    mock_listing_pages.side_effect = lambda fetcher, pages: [
+        listing(page, 3) for page in pages
+    ]
+    mock_extract.return_value = [scraped(3)]
+    storing(mock_sink)
+
+    scrape_books(limit=4, run_id="run")
+
+    # The page count is known, so page 1 is not fetched again
+    mock_get_catalog.assert_not_called()
+    mock_listing_pages.assert_called_once_with(mock_fetcher, [3])
+    # The run's visited books, which by now include the new one
+    mock_extract.assert_called_once_with(
+        listing(3, 3), mock_fetcher, 2, history, {"url1", "url2", "url3"}
+    )
+    assert stored(mock_sink) == [book(3)]
+    final = checkpoints(mock_redis)[-1]
+    assert final["status"] == "done"
+    assert final["last_page"] == 3
+    assert final["collected"] == 3
+
+
+# Test 11: Retries of a failed attempt resume the same run
+@patch("app.scraping.scrape_books.BookSink")
+@patch("app.scraping.scrape_books.create_fetcher")
+def test_scrape_books_retry_keeps_run(
+    mock_create_fetcher, mock_sink, mock_redis
+):
+    with patch(
+        "app.scraping.scrape_books.get_catalog_page",
+        side_effect=Exception("error")
+    ), pytest.raises(Exception, match="error"):
         scrape_books(limit=5)
-        mock_driver.quit.assert_called_once()
+
+    run_keys = {c[0][0] for c in mock_redis.hgetall.call_args_list}
+    assert mock_redis.hgetall.call_count == 3
+    assert len(run_keys) == 1
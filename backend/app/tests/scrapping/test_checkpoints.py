@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock
+
+from app.scraping.checkpoints import (
+    CHECKPOINT_TTL,
+    CrawlCheckpoint,
+    new_run_id,
+)
+
+
+def test_load_new_run():
+    mock_r = MagicMock()
+    mock_r.hgetall.return_value = {}
+
+    checkpoint = CrawlCheckpoint.load(mock_r, "run")
+
+    mock_r.hgetall.assert_called_once_with("scrape:run:run")
+    assert checkpoint.last_page == 0
+    assert checkpoint.page_count is None
+    assert checkpoint.collected == 0
+    mock_r.smembers.assert_not_called()
+
+
+def test_load_saved_run():
+    mock_r = MagicMock()
+    mock_r.hgetall.return_value = {
+        b"last_page": b"4", b"page_count": b"50", b"status": b"failed"
+    }
+    mock_r.smembers.return_value = {b"url1", b"url2"}
+
+    checkpoint = CrawlCheckpoint.load(mock_r, "run")
+
+    mock_r.smembers.assert_called_once_with("scrape:run:run:visited")
+    assert checkpoint.last_page == 4
+    assert checkpoint.page_count == 50
+    assert checkpoint.visited == {"url1", "url2"}
+    assert checkpoint.collected == 2
+
+
+def test_last_page_stops_at_first_incomplete_page():
+    checkpoint = CrawlCheckpoint(MagicMock(), "run")
+
+    checkpoint.complete_page(1)
+    checkpoint.complete_page(3)
+    assert checkpoint.last_page == 1
+
+    checkpoint.complete_page(2)
+    assert checkpoint.last_page == 3
+
+
+def test_page_waits_for_its_unstored_books():
+    mock_r = MagicMock()
+    mock_pipe = mock_r.pipeline.return_value
+    checkpoint = CrawlCheckpoint(mock_r, "run")
+    checkpoint.visit("url1", stored=False)
+    checkpoint.complete_page(1)
+    checkpoint.visit("url2")
+    checkpoint.complete_page(2)
+    assert checkpoint.last_page == 0
+    assert checkpoint.collected == 2
+
+    checkpoint.save()
+    mock_pipe.sadd.assert_called_once_with("scrape:run:run:visited", "url2")
+    assert mock_pipe.hset.call_args.kwargs["mapping"]["collected"] == 1
+
+    checkpoint.store(["url1"])
+    assert checkpoint.last_page == 2
+    checkpoint.save()
+    mock_pipe.sadd.assert_called_with("scrape:run:run:visited", "url1")
+    assert mock_pipe.hset.call_args.kwargs["mapping"]["collected"] == 2
+
+
+def test_save_writes_only_new_visits():
+    mock_r = MagicMock()
+    mock_pipe = mock_r.pipeline.return_value
+    checkpoint = CrawlCheckpoint(mock_r, "run")
+    checkpoint.page_count = 50
+    checkpoint.visit("url1")
+    checkpoint.complete_page(1)
+
+    checkpoint.save()
+
+    mock_pipe.sadd.assert_called_once_with("scrape:run:run:visited", "url1")
+    mapping = mock_pipe.hset.call_args.kwargs["mapping"]
+    assert mapping["last_page"] == 1
+    assert mapping["page_count"] == 50
+    assert mapping["collected"] == 1
+    assert mapping["status"] == "running"
+    mock_pipe.expire.assert_any_call("scrape:run:run", CHECKPOINT_TTL)
+
+    mock_pipe.reset_mock()
+    checkpoint.visit("url1")
+    checkpoint.save("done")
+
+    mock_pipe.sadd.assert_not_called()
+    assert mock_pipe.hset.call_args.kwargs["mapping"]["status"] == "done"
+
+
+def test_exists():
+    mock_r = MagicMock()
+    mock_r.exists.return_value = 0
+    assert not CrawlCheckpoint.exists(mock_r, "run")
+    mock_r.exists.assert_called_once_with("scrape:run:run")
+
+
+def test_new_run_id_is_unique():
+    assert new_run_id() != new_run_id()
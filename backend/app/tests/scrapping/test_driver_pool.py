@@ -0,0 +1,138 @@
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from selenium.common.exceptions import WebDriverException
+from app.scraping import driver_pool
+from app.scraping.driver_pool import DriverPool
+
+
+def make_driver():
+    driver = MagicMock()
+    driver.execute_script.return_value = 1
+    return driver
+
+
+@pytest.fixture
+def factory():
+    return MagicMock(side_effect=lambda: make_driver())
+
+
+@pytest.fixture(autouse=True)
+def no_rss():
+    with patch("app.scraping.driver_pool.driver_rss", return_value=None):
+        yield
+
+
+def test_drivers_are_reused(factory):
+    pool = DriverPool(size=2, max_pages=10, max_rss_mb=100, factory=factory)
+
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+
+    assert first is second
+    factory.assert_called_once()
+
+
+def test_pool_is_bounded(factory):
+    pool = DriverPool(size=1, max_pages=10, max_rss_mb=100, factory=factory)
+    entry = pool.checkout()
+
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.01)
+
+    # A waiting caller gets the driver once it is checked in
+    threading.Timer(0.05, pool.checkin, [entry]).start()
+    assert pool.checkout(timeout=5) is entry
+    factory.assert_called_once()
+
+
+def test_warm_starts_every_driver(factory):
+    pool = DriverPool(size=3, max_pages=10, max_rss_mb=100, factory=factory)
+    pool.warm()
+    pool.warm()
+
+    assert factory.call_count == 3
+    entries = [pool.checkout() for _ in range(3)]
+    assert factory.call_count == 3
+    assert len({id(entry) for entry in entries}) == 3
+
+
+def test_unhealthy_driver_is_replaced(factory):
+    pool = DriverPool(size=1, max_pages=10, max_rss_mb=100, factory=factory)
+    with pool.driver() as broken:
+        broken.execute_script.side_effect = WebDriverException("gone")
+
+    with pool.driver() as driver:
+        assert driver is not broken
+    broken.quit.assert_called_once()
+    assert factory.call_count == 2
+
+
+def test_driver_recycled_after_max_pages(factory):
+    pool = DriverPool(size=1, max_pages=2, max_rss_mb=100, factory=factory)
+    drivers = []
+    for _ in range(3):
+        with pool.driver() as driver:
+            drivers.append(driver)
+
+    assert drivers[0] is drivers[1]
+    assert drivers[2] is not drivers[0]
+    drivers[0].quit.assert_called_once()
+
+
+def test_driver_recycled_above_rss(factory):
+    pool = DriverPool(size=1, max_pages=10, max_rss_mb=100, factory=factory)
+    with patch(
+        "app.scraping.driver_pool.driver_rss",
+        return_value=200 * 1024 * 1024
+    ):
+        with pool.driver() as driver:
+            pass
+
+    driver.quit.assert_called_once()
+    with pool.driver() as replacement:
+        assert replacement is not driver
+
+
+def test_failed_start_frees_its_slot():
+    factory = MagicMock(side_effect=[WebDriverException("no chrome"),
+                                     make_driver()])
+    pool = DriverPool(size=1, max_pages=10, max_rss_mb=100, factory=factory)
+
+    with pytest.raises(WebDriverException):
+        pool.checkout(timeout=0.01)
+    assert pool.checkout(timeout=0.01) is not None
+
+
+def test_close_quits_drivers(factory):
+    pool = DriverPool(size=2, max_pages=10, max_rss_mb=100, factory=factory)
+    idle = pool.checkout()
+    busy = pool.checkout()
+    pool.checkin(idle)
+
+    pool.close()
+    idle.driver.quit.assert_called_once()
+    busy.driver.quit.assert_not_called()
+
+    # Drivers checked out during close are quit when they come back
+    pool.checkin(busy)
+    busy.driver.quit.assert_called_once()
+    with pytest.raises(RuntimeError):
+        pool.checkout()
+
+
+def test_driver_rss_without_psutil():
+    with patch.object(driver_pool, "psutil", None):
+        assert driver_pool.driver_rss(MagicMock()) is None
+
+
+def test_pool_is_shared(factory):
+    with patch.object(driver_pool, "_pool", None), patch(
+        "app.scraping.driver_pool.atexit"
+    ):
+        pool = driver_pool.get_driver_pool()
+        assert driver_pool.get_driver_pool() is pool
+        driver_pool.close_driver_pool()
+        assert driver_pool._pool is None
@@ -0,0 +1,148 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import requests
+from app.scraping import fetchers
+from app.scraping.rate_limit import AdaptiveRateLimiter
+from app.scraping.fetchers import (
+    HttpFetcher,
+    PageNotFound,
+    SeleniumFetcher,
+    create_fetcher,
+    fetch_time_budget,
+    get_http_session,
+)
+
+
+def test_http_fetcher_returns_html():
+    session = MagicMock()
+    session.get.return_value.status_code = 200
+    session.get.return_value.text = "<html></html>"
+
+    limiter = AdaptiveRateLimiter()
+    html = HttpFetcher(session, limiter).get_html("https://example.com")
+
+    assert html == "<html></html>"
+    session.get.assert_called_once_with(
+        "https://example.com", headers={}, timeout=fetchers.REQUEST_TIMEOUT
+    )
+    # A fast response lets the host be fetched faster
+    assert limiter.rate("example.com") > limiter.initial_rate
+
+
+def test_http_fetcher_backs_off_on_429():
+    session = MagicMock()
+    session.get.return_value.status_code = 429
+    session.get.return_value.headers = {"Retry-After": "3"}
+    session.get.return_value.raise_for_status.side_effect = (
+        requests.HTTPError("429")
+    )
+    limiter = MagicMock()
+
+    with pytest.raises(requests.HTTPError):
+        HttpFetcher(session, limiter).get_html("https://example.com/a")
+
+    limiter.acquire.assert_called_once_with("example.com")
+    limiter.backoff.assert_called_once_with("example.com", 3.0)
+    limiter.success.assert_not_called()
+
+
+def test_http_fetcher_conditional_request():
+    session = MagicMock()
+    session.get.return_value.status_code = 304
+    session.get.return_value.headers = {"ETag": '"v1"'}
+
+    page = HttpFetcher(session, MagicMock()).get_page(
+        "https://example.com", etag='"v1"',
+        last_modified="Wed, 01 Jan 2025 00:00:00 GMT"
+    )
+
+    assert page.html is None
+    assert page.etag == '"v1"'
+    session.get.assert_called_once_with(
+        "https://example.com",
+        headers={
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+        },
+        timeout=fetchers.REQUEST_TIMEOUT
+    )
+
+
+def test_http_fetcher_not_found():
+    session = MagicMock()
+    session.get.return_value.status_code = 404
+
+    with pytest.raises(PageNotFound):
+        HttpFetcher(session, MagicMock()).get_html(
+            "https://example.com/page-51.html"
+        )
+
+
+def test_http_session_is_shared():
+    with patch.object(fetchers, "_session", None):
+        assert get_http_session() is get_http_session()
+
+
+def pool_of(mock_driver):
+    pool = MagicMock()
+    pool.driver.return_value.__enter__.return_value = mock_driver
+    return pool
+
+
+def test_selenium_fetcher_waits_for_selector():
+    mock_driver = MagicMock()
+    mock_driver.execute_script.return_value = "complete"
+    mock_driver.page_source = "<html></html>"
+    # The selector shows up on the second poll; no 404 heading
+    mock_driver.find_elements.side_effect = [[], [], [MagicMock()], []]
+
+    pool = pool_of(mock_driver)
+    fetcher = SeleniumFetcher(limiter=MagicMock(), pool=pool)
+    with patch("app.scraping.fetchers.WebDriverWait") as mock_wait:
+        mock_wait.return_value.until.side_effect = lambda ready: (
+            ready(mock_driver) or ready(mock_driver)
+        )
+        html = fetcher.get_html(
+            "https://example.com", ready_selector="article"
+        )
+
+    assert html == "<html></html>"
+    mock_wait.assert_called_once_with(
+        mock_driver, fetchers.SELENIUM_PAGE_TIMEOUT
+    )
+    # The driver goes back to the pool once the page is read
+    pool.driver.return_value.__exit__.assert_called_once()
+
+
+def test_selenium_fetcher_not_found():
+    mock_driver = MagicMock()
+    mock_driver.execute_script.return_value = "complete"
+    mock_driver.find_elements.return_value = [MagicMock()]
+    pool = pool_of(mock_driver)
+
+    fetcher = SeleniumFetcher(limiter=MagicMock(), pool=pool)
+    with pytest.raises(PageNotFound):
+        fetcher.get_html("https://example.com/page-51.html")
+    fetcher.close()
+
+    # Closing the fetcher keeps the browser warm
+    mock_driver.quit.assert_not_called()
+    pool.driver.return_value.__exit__.assert_called_once()
+
+
+@patch("app.scraping.fetchers.get_driver_pool")
+def test_create_fetcher_engines(mock_get_pool):
+    with patch.dict("os.environ", {}, clear=True):
+        assert isinstance(create_fetcher(), HttpFetcher)
+    with patch.dict("os.environ", {"SCRAPER_ENGINE": "selenium"}):
+        assert isinstance(create_fetcher(), SeleniumFetcher)
+    with patch.dict("os.environ", {"SCRAPER_ENGINE": "curl"}):
+        with pytest.raises(ValueError, match="Unknown SCRAPER_ENGINE"):
+            create_fetcher()
+
+
+def test_fetch_time_budget():
+    # Longest rate limiter pause, then the request
+    assert fetch_time_budget("http") == 2 + 10
+    # Or the browser checkout, page load and ready wait
+    assert fetch_time_budget("selenium") == 60 + 2 + 30 + 10
@@ -0,0 +1,132 @@
+import json
+from unittest.mock import MagicMock
+from app.redis_storage import book_id_from_url
+from app.scraping.fetchers import FetchedPage
+from app.scraping.page_history import (
+    PageHistory,
+    PageMeta,
+    content_hash,
+    fetch_if_changed,
+)
+from app.scraping.scrape_books import fetch_book_details
+
+
+URL = "https://books.toscrape.com/catalogue/book/1"
+HTML = "<html>book</html>"
+previous = PageMeta(
+    '"v1"', "Wed, 01 Jan 2025 00:00:00 GMT", content_hash(HTML)
+)
+
+
+# 1. Test A First Visit Fetches The Page Unconditionally
+def test_fetch_if_changed_first_visit():
+    fetcher = MagicMock()
+    fetcher.get_page.return_value = FetchedPage(HTML, '"v1"', None)
+
+    html, meta = fetch_if_changed(fetcher, URL, None)
+
+    assert html == HTML
+    assert meta == PageMeta('"v1"', None, content_hash(HTML))
+    fetcher.get_page.assert_called_once_with(URL, None)
+
+
+# 2. Test A 304 Keeps The Recorded Page
+def test_fetch_if_changed_not_modified():
+    fetcher = MagicMock()
+    fetcher.get_page.return_value = FetchedPage(None, None, None)
+
+    html, meta = fetch_if_changed(fetcher, URL, previous)
+
+    assert html is None
+    assert meta == previous
+    fetcher.get_page.assert_called_once_with(
+        URL, None, previous.etag, previous.last_modified
+    )
+
+
+# 3. Test An Identical Page Without Validators Is Detected By Its Hash
+def test_fetch_if_changed_same_content():
+    fetcher = MagicMock()
+    fetcher.get_page.return_value = FetchedPage(HTML, None, None)
+
+    html, meta = fetch_if_changed(fetcher, URL, previous)
+    assert html is None
+
+    fetcher.get_page.return_value = FetchedPage("<html>new</html>", None, None)
+    html, meta = fetch_if_changed(fetcher, URL, previous)
+    assert html == "<html>new</html>"
+
+
+# 4. Test Unchanged Detail Pages Reuse The Stored Book
+def test_fetch_book_details_unchanged():
+    fetcher = MagicMock()
+    fetcher.get_page.return_value = FetchedPage(None, '"v1"', None)
+    history = MagicMock()
+    history.known_book.return_value = {
+        "category": "Poetry", "image_url": "https://example.com/1.jpg"
+    }
+    history.get.return_value = previous
+
+    book = fetch_book_details(fetcher, "Book 1", "12.00", URL, history)
+
+    assert book.category == "Poetry"
+    assert book.price == "12.00"
+    history.save.assert_not_called()
+
+
+# 5. Test Only Books That Differ From Redis Are Changed
+def test_changed_books():
+    mock_r = MagicMock()
+    stored = {
+        "url": URL, "title": "Book 1", "price": "12.00",
+        "category": "Poetry", "image_url": None,
+    }
+    mock_r.mget.return_value = [json.dumps(stored).encode('utf-8'), None]
+    mock_r.pipeline.return_value.execute.return_value = [{}]
+    cheaper = dict(stored, url=URL + "/other", price="11.00")
+
+    changed = PageHistory(mock_r).changed_books([stored, cheaper])
+
+    assert changed == [cheaper]
+
+
+# 6. Test A Changed Page Is Only Recorded Once Its Book Is Stored
+def test_fetch_book_details_changed_page_deferred():
+    fetcher = MagicMock()
+    fetcher.get_page.return_value = FetchedPage(
+        '<ul class="breadcrumb"><li><a>Books</a></li><li><a>Poetry</a></li>'
+        '</ul><div class="item active"><img src="../../img/1.jpg"></div>',
+        '"v2"', None
+    )
+    history = MagicMock()
+    history.known_book.return_value = {"category": "Fiction"}
+    history.get.return_value = previous
+
+    book = fetch_book_details(fetcher, "Book 1", "12.00", URL, history)
+
+    assert book.category == "Poetry"
+    history.save.assert_not_called()
+    meta = history.defer.call_args[0][1]
+    history.defer.assert_called_once_with(URL, meta)
+    assert meta.etag == '"v2"'
+
+
+# 7. Test Deferred Metadata Is Saved On Commit Only
+def test_defer_and_commit():
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value
+    history = PageHistory(mock_r)
+    history.defer(URL, previous)
+    history.defer(URL + "/2", previous)
+
+    history.commit([URL, URL + "/unknown"])
+
+    pipe.hset.assert_called_once_with(
+        "scrape:page:" + book_id_from_url(URL), mapping=previous._asdict()
+    )
+    pipe.execute.assert_called_once()
+
+    # Committed metadata is not saved twice, nothing pending is no-op
+    pipe.reset_mock()
+    history.commit([URL])
+    pipe.execute.assert_not_called()
@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import patch
+from app.benchmarks.parsers import FIXTURES
+from app.scraping import parsers
+from app.scraping.parsers import (
+    BookDetail,
+    CATALOG_STRAINER,
+    ListedBook,
+    get_parser_backend,
+    parse_book_detail,
+    parse_catalog,
+)
+from bs4 import BeautifulSoup
+
+CATALOG_HTML = (FIXTURES / "catalog_page.html").read_text(encoding="utf-8")
+BOOK_HTML = (FIXTURES / "book_page.html").read_text(encoding="utf-8")
+
+BACKENDS = [
+    "soup",
+    "strainer",
+    pytest.param("selectolax", marks=pytest.mark.skipif(
+        parsers.HTMLParser is None, reason="selectolax is not installed"
+    )),
+]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_catalog(backend):
+    catalog = parse_catalog(CATALOG_HTML, backend)
+
+    assert catalog.page_count == 50
+    assert len(catalog.books) == 20
+    assert catalog.books[0] == ListedBook(
+        "A Light in the Attic", "51.77", "a-light-in-the-attic_1000/index.html"
+    )
+    # The full title, not the shortened link text
+    assert catalog.books[7].title.endswith("Feminist, Victoria Woodhull")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_catalog_skips_malformed_books(backend):
+    html = (
+        '<article class="product_pod"><h3><a href="book/1">No title</a>'
+        '</h3><p class="price_color">£15.99</p></article>'
+        '<article class="product_pod"><h3><a title="Book" href="book/2">'
+        'Book</a></h3><p class="price_color">£12.00</p></article>'
+    )
+    catalog = parse_catalog(html, backend)
+
+    assert catalog.books == [ListedBook("Book", "12.00", "book/2")]
+    # Without a pager there is a single page
+    assert catalog.page_count == 1
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_book_detail(backend):
+    assert parse_book_detail(BOOK_HTML, backend) == BookDetail(
+        "Poetry",
+        "../../media/cache/fe/72/fe72f0532301ec28892ae79a629a293c.jpg"
+    )
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_book_detail_not_a_book(backend):
+    with pytest.raises(ValueError, match="Not a book detail page"):
+        parse_book_detail("<html><body></body></html>", backend)
+
+
+def test_strainer_keeps_only_the_needed_nodes():
+    soup = BeautifulSoup(CATALOG_HTML, "html.parser",
+                         parse_only=CATALOG_STRAINER)
+    assert {tag.name for tag in soup.find_all(recursive=False)} == {
+        "article", "ul"
+    }
+    assert soup.find("aside") is None
+
+
+def test_parser_backend_from_env():
+    with patch.dict("os.environ", {"BOOKS_PARSER": "SOUP"}):
+        assert get_parser_backend() == "soup"
+    with patch.dict("os.environ", {"BOOKS_PARSER": "regex"}):
+        with pytest.raises(ValueError, match="Unknown BOOKS_PARSER"):
+            get_parser_backend()
+
+
+def test_parser_backend_without_selectolax():
+    with patch.object(parsers, "HTMLParser", None):
+        with patch.dict("os.environ", {}, clear=True):
+            assert get_parser_backend() == "strainer"
+        with patch.dict("os.environ", {"BOOKS_PARSER": "selectolax"}):
+            with pytest.raises(ValueError, match="not installed"):
+                get_parser_backend()
@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import patch
+from app.scraping.rate_limit import AdaptiveRateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with patch.multiple(
+        "app.scraping.rate_limit.time",
+        monotonic=clock.monotonic, sleep=clock.sleep
+    ):
+        yield clock
+
+
+# 1. Test Requests Beyond The Burst Are Paced At The Rate
+def test_rate_limiter_paces_requests(clock):
+    limiter = AdaptiveRateLimiter(rate=4, burst=2)
+    for _ in range(6):
+        limiter.acquire("example.com")
+    # Two at once, then one every quarter second
+    assert clock.now == 1.0
+    # Hosts are limited separately
+    limiter.acquire("other.com")
+    assert clock.now == 1.0
+
+
+# 2. Test The Rate Grows With Fast Responses Up To The Maximum
+def test_rate_limiter_speeds_up(clock):
+    limiter = AdaptiveRateLimiter(rate=4, max_rate=5)
+    limiter.success("example.com", 0.1)
+    assert limiter.rate("example.com") == 4.5
+    limiter.success("example.com", 3.0)
+    assert limiter.rate("example.com") == 4.5
+    for _ in range(5):
+        limiter.success("example.com", 0.1)
+    assert limiter.rate("example.com") == 5
+
+
+# 3. Test Errors Halve The Rate And Retry-After Pauses The Host
+def test_rate_limiter_backs_off(clock):
+    limiter = AdaptiveRateLimiter(rate=4, min_rate=1)
+    limiter.backoff("example.com", retry_after=3)
+    assert limiter.rate("example.com") == 2
+    limiter.acquire("example.com")
+    assert clock.now == 3.5
+    limiter.backoff("example.com")
+    limiter.backoff("example.com")
+    assert limiter.rate("example.com") == 1
@@ -1,58 +1,88 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from app.scraping.scrape_hn import get_hackernews_top_stories
+from app.scraping.scrape_hn import (
+    get_hackernews_top_stories,
+    scrape_time_budget,
+)
+
+
+HN_PAGE_HTML = """
+<html><body><table>
+    <tr class="athing">
+        <td><span class="titleline">
+            <a href="http://example.com">Test Story</a>
+        </span></td>
+    </tr>
+    <tr><td class="subtext"><span class="score">100 points</span></td></tr>
+    <tr class="athing">
+        <td><span class="titleline">
+            <a href="item?id=1">Ask HN: Test</a>
+        </span></td>
+    </tr>
+    <tr><td class="subtext"><span class="score">7 points</span></td></tr>
+    <tr class="athing">
+        <td><span class="titleline">
+            <a href="https://example.com/jobs">We are hiring</a>
+        </span></td>
+    </tr>
+    <tr><td class="subtext">2 hours ago</td></tr>
+</table></body></html>
+"""
 
 
 @pytest.fixture
-def mock_webdriver():
-    with patch("app.scraping.scrape_hn.webdriver.Chrome") as mock_driver:
+def mock_fetcher():
+    with patch("app.scraping.scrape_hn.create_fetcher") as mock_create:
         mock_instance = MagicMock()
-        mock_driver.return_value = mock_instance
+        mock_create.return_value = mock_instance
         yield mock_instance
 
 
-def test_get_hackernews_top_stories_success(mock_webdriver):
-    # Mock the elements returned by Selenium
-    mock_item = MagicMock()
-    mock_item.find_element.return_value.text = "Test Story"
-    mock_item.find_element.return_value.get_attribute.return_value = (
-        "http://example.com"
-    )
+@pytest.fixture(autouse=True)
+def no_retry_delay():
+    with patch("app.utils.time.sleep", return_value=None):
+        yield
 
-    mock_subtext = MagicMock()
-    mock_subtext.find_element.return_value.text = "100 points"
 
-    mock_webdriver.find_elements.side_effect = [[mock_item], [mock_subtext]]
+def test_get_hackernews_top_stories_success(mock_fetcher):
+    mock_fetcher.get_html.return_value = HN_PAGE_HTML
 
     stories = get_hackernews_top_stories(page=1)
 
-    assert len(stories) == 1
+    # The job post has no score and is skipped
+    assert len(stories) == 2
     assert stories[0]["title"] == "Test Story"
     assert stories[0]["url"] == "http://example.com"
     assert stories[0]["score"] == 100
+    assert stories[1]["url"] == "https://news.ycombinator.com/item?id=1"
+    mock_fetcher.get_html.assert_called_once_with(
+        "https://news.ycombinator.com/?p=1", ready_selector="#hnmain"
+    )
+    mock_fetcher.close.assert_called_once()
 
 
-def test_get_hackernews_top_stories_no_items(mock_webdriver):
-    # Mock no items found
-    mock_webdriver.find_elements.side_effect = [[], []]
+def test_get_hackernews_top_stories_no_items(mock_fetcher):
+    mock_fetcher.get_html.return_value = "<html><body></body></html>"
 
     stories = get_hackernews_top_stories(page=1)
 
     assert len(stories) == 0
 
 
-def test_get_hackernews_top_stories_connection_error(mock_webdriver):
-    # Simulate a connection error
-    mock_webdriver.get.side_effect = Exception(
-        "Connection Error: Error reaching https://news.ycombinator.com/?p=1. "
-        "Check the internet connection"
-    )
+def test_get_hackernews_top_stories_connection_error(mock_fetcher):
+    mock_fetcher.get_html.side_effect = Exception("unreachable")
 
     with pytest.raises(
-        Exception,
+        ConnectionError,
         match=(
             r"Connection Error: Error reaching https://news\.ycombinator\.com/"
             r"\?p=1\. Check the internet connection"
         )
     ):
         get_hackernews_top_stories(page=1)
+    assert mock_fetcher.close.call_count == 3
+
+
+def test_scrape_time_budget():
+    # Three attempts timing out and the two delays between them
+    assert scrape_time_budget("http") == 3 * 12 + 2 * 2
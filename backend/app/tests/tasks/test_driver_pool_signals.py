@@ -0,0 +1,22 @@
+from unittest.mock import patch
+from app.tasks import shutdown_driver_pool, warm_driver_pool
+
+
+@patch("app.tasks.get_driver_pool")
+def test_worker_warms_browsers_for_selenium(mock_get_pool):
+    with patch.dict("os.environ", {"SCRAPER_ENGINE": "selenium"}):
+        warm_driver_pool()
+    mock_get_pool.return_value.warm.assert_called_once()
+
+
+@patch("app.tasks.get_driver_pool")
+def test_worker_starts_no_browser_for_http(mock_get_pool):
+    with patch.dict("os.environ", {"SCRAPER_ENGINE": "http"}):
+        warm_driver_pool()
+    mock_get_pool.assert_not_called()
+
+
+@patch("app.tasks.close_driver_pool")
+def test_worker_closes_browsers_on_shutdown(mock_close):
+    shutdown_driver_pool()
+    mock_close.assert_called_once()
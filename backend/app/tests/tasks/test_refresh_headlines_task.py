@@ -0,0 +1,37 @@
+import json
+from app.tasks import refresh_headlines_task
+from unittest.mock import patch, MagicMock
+
+
+@patch.dict("os.environ", {"HN_REFRESH_PAGES": "2"})
+@patch("app.tasks.get_redis")
+@patch("app.tasks.get_hackernews_top_stories")
+def test_refresh_headlines_task_success(mock_get_hn, mock_redis):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+    mock_get_hn.side_effect = lambda page: [
+        {"title": f"Story {page}", "url": "https://example.com", "score": 1}
+    ]
+
+    assert refresh_headlines_task() == [1, 2]
+
+    stored = {
+        call[0][0]: json.loads(call[0][1])
+        for call in mock_r.set.call_args_list
+    }
+    assert stored["hn:page:2"]["stories"][0]["title"] == "Story 2"
+    assert "fetched_at" in stored["hn:page:1"]
+    mock_r.delete.assert_any_call("hn:refreshing:1")
+
+
+@patch("app.tasks.get_redis")
+@patch("app.tasks.get_hackernews_top_stories", side_effect=Exception("boom"))
+def test_refresh_headlines_task_failure_keeps_snapshot(
+    mock_get_hn, mock_redis
+):
+    mock_r = MagicMock()
+    mock_redis.return_value = mock_r
+
+    assert refresh_headlines_task([3]) == []
+    mock_r.set.assert_not_called()
+    mock_r.delete.assert_called_once_with("hn:refreshing:3")
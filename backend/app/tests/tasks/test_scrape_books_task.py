@@ -13,3 +13,9 @@ def test_scrape_books_task_success(mock_scrape_books):
 def test_scrape_books_task_failure(mock_scrape_books):
     result = scrape_books_task()
     assert result == "Error in the task"
+
+
+@patch("app.tasks.scrape_books")
+def test_scrape_books_task_resume(mock_scrape_books):
+    scrape_books_task(run_id="run")
+    mock_scrape_books.assert_called_once_with(run_id="run")
@@ -0,0 +1,84 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from app.redis_storage import (
+    decode_book,
+    encode_book,
+    get_book_encoding,
+    get_books_map,
+    save_books_into_redis_database,
+)
+
+
+book = {
+    "url": "https://books.toscrape.com/catalogue/book/1",
+    "title": "Book 1",
+    "price": "19.99",
+    "category": "Poetry",
+    "image_url": None,
+}
+
+
+# 1. Test Every String Encoding Round Trips Through decode_book
+@pytest.mark.parametrize("encoding", ["json", "msgpack", "msgpack+zstd"])
+def test_encode_decode_round_trip(encoding):
+    pytest.importorskip("msgpack")
+    if encoding == "msgpack+zstd":
+        pytest.importorskip("zstandard")
+
+    data = encode_book(book, encoding)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    assert decode_book(data) == book
+
+
+# 2. Test Unknown Encodings Are Rejected
+@patch.dict("os.environ", {"BOOKS_STORAGE_ENCODING": "xml"})
+def test_get_book_encoding_unknown():
+    with pytest.raises(ValueError, match="Unknown BOOKS_STORAGE_ENCODING"):
+        get_book_encoding()
+
+
+# 3. Test Books Are Written As Hashes When Selected
+@patch.dict("os.environ", {"BOOKS_STORAGE_ENCODING": "hash"})
+@patch("redis.Redis")
+def test_save_books_as_hash(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+
+    save_books_into_redis_database([book])
+
+    mock_pipe = mock_redis_instance.pipeline.return_value
+    mock_pipe.set.assert_not_called()
+    key = mock_pipe.delete.call_args[0][0]
+    mock_pipe.hset.assert_any_call(key, mapping={
+        "url": book["url"],
+        "title": "Book 1",
+        "price": "19.99",
+        "category": "Poetry",
+    })
+
+
+# 4. Test The Reader Handles Mixed Encodings
+def test_get_books_map_mixed_encodings():
+    msgpack = pytest.importorskip("msgpack")
+    mock_r = MagicMock()
+    mock_r.mget.return_value = [
+        json.dumps({"title": "as json"}).encode("utf-8"),
+        msgpack.packb({"title": "as msgpack"}),
+        None,
+        None,
+    ]
+    mock_pipe = mock_r.pipeline.return_value
+    mock_pipe.execute.return_value = [{b"title": b"as hash"}, {}]
+
+    books = get_books_map(mock_r, ["1", "2", "3", "4"])
+
+    assert books == {
+        "1": {"title": "as json", "id": "1"},
+        "2": {"title": "as msgpack", "id": "2"},
+        "3": {"title": "as hash", "id": "3"},
+    }
+    mock_pipe.hgetall.assert_any_call("book:3")
+    mock_pipe.hgetall.assert_any_call("book:4")
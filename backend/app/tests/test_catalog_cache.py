@@ -0,0 +1,94 @@
+import json
+from unittest.mock import patch, MagicMock
+from app.catalog_cache import CatalogCache, get_catalog_cache
+
+
+def book(book_id):
+    return json.dumps({
+        "url": f"https://example.com/{book_id}",
+        "title": f"Book {book_id}",
+        "price": "9.99",
+        "category": "fiction",
+    }).encode('utf-8')
+
+
+# 1. Test Books Are Read Through The Cache
+def test_catalog_cache_reads_books_through():
+    mock_r = MagicMock()
+    mock_r.mget.side_effect = lambda keys: [
+        book(key.split(":")[1]) for key in keys
+    ]
+    cache = CatalogCache()
+
+    first = cache.get_books_by_ids(mock_r, ["1", "2"])
+    second = cache.get_books_by_ids(mock_r, ["2", "3"])
+
+    assert [b["title"] for b in first] == ["Book 1", "Book 2"]
+    assert [b["title"] for b in second] == ["Book 2", "Book 3"]
+    # Only the book missing from the cache is fetched the second time
+    mock_r.mget.assert_called_with(["book:3"])
+    assert mock_r.mget.call_count == 2
+
+
+# 2. Test Query Results Are Cached Per Parameters
+@patch("app.catalog_cache.query_book_ids")
+def test_catalog_cache_caches_queries(mock_query):
+    mock_r = MagicMock()
+    cache = CatalogCache()
+
+    cache.query_book_ids(mock_r, search="", category="art", start=0)
+    cache.query_book_ids(mock_r, category="art", start=0, search="")
+    cache.query_book_ids(mock_r, search="", category="art", start=10)
+
+    assert mock_query.call_count == 2
+
+
+# 3. Test Invalidation Drops Everything And Records The Version
+@patch("app.catalog_cache.query_book_ids")
+def test_catalog_cache_invalidate(mock_query):
+    mock_r = MagicMock()
+    mock_r.mget.return_value = [book("1")]
+    cache = CatalogCache()
+    cache.get_books_by_ids(mock_r, ["1"])
+    cache.query_book_ids(mock_r, search="")
+
+    cache.invalidate(7)
+    cache.get_books_by_ids(mock_r, ["1"])
+    cache.query_book_ids(mock_r, search="")
+
+    assert cache.version == 7
+    assert mock_r.mget.call_count == 2
+    assert mock_query.call_count == 2
+
+
+# 4. Test A Load Racing An Invalidation Is Not Stored
+def test_catalog_cache_skips_stale_loads():
+    mock_r = MagicMock()
+    cache = CatalogCache()
+
+    def mget_during_invalidation(keys):
+        cache.invalidate(2)
+        return [book("1")]
+    mock_r.mget.side_effect = mget_during_invalidation
+
+    books = cache.get_books_by_ids(mock_r, ["1"])
+
+    assert books[0]["title"] == "Book 1"
+    assert cache._books == {}
+
+
+# 5. Test The Cache Is Opt-In
+@patch.dict("os.environ", {"CATALOG_CACHE_ENABLED": "false"})
+def test_get_catalog_cache_disabled():
+    assert get_catalog_cache() is None
+
+
+@patch.dict("os.environ", {"CATALOG_CACHE_ENABLED": "true"})
+@patch("app.catalog_cache._catalog_cache", None)
+@patch("app.catalog_cache.CatalogCache.start_listener")
+def test_get_catalog_cache_enabled(mock_start_listener):
+    cache = get_catalog_cache()
+
+    assert isinstance(cache, CatalogCache)
+    assert get_catalog_cache() is cache
+    mock_start_listener.assert_called_once()
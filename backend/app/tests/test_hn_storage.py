@@ -0,0 +1,97 @@
+import json
+from unittest.mock import patch, MagicMock
+from app.hn_storage import (
+    get_trending,
+    record_scores,
+    score_velocity,
+    scores_key,
+    story_id_from_url,
+)
+
+
+story = {"title": "Rising", "url": "https://example.com/1", "score": 130}
+
+
+# 1. Test The Velocity Is Points Per Hour Over The Samples
+def test_score_velocity():
+    assert score_velocity([(b"0:100", 0.0), (b"1800:130", 1800.0)]) == 60
+    # Too few or too close samples are not ranked
+    assert score_velocity([(b"0:100", 0.0)]) is None
+    assert score_velocity([(b"0:100", 0.0), (b"30:130", 30.0)]) is None
+
+
+# 2. Test Scores Are Sampled, Trimmed And Ranked
+@patch.dict("os.environ", {
+    "HN_SCORES_RETENTION": "86400", "HN_TRENDING_WINDOW": "3600"
+})
+def test_record_scores():
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value
+    pipe.execute.return_value = [
+        1, 0, True, 1, 1, [(b"98200:100", 98200.0), (b"100000:130", 1e5)]
+    ]
+    mock_r.zrangebyscore.return_value = [(b"gone", 1000.0)]
+    story_id = story_id_from_url(story["url"])
+
+    record_scores(mock_r, [story], 100000.0)
+
+    pipe.zadd.assert_any_call(scores_key(story_id), {"100000.0:130": 1e5})
+    pipe.zremrangebyscore.assert_any_call(
+        scores_key(story_id), "-inf", 100000.0 - 86400
+    )
+    pipe.zrangebyscore.assert_any_call(
+        scores_key(story_id), 100000.0 - 3600, "+inf", withscores=True
+    )
+    pipe.zadd.assert_any_call("hn:trending", {story_id: 60.0})
+    pipe.zrem.assert_any_call("hn:trending", b"gone")
+    pipe.hdel.assert_any_call("hn:stories", b"gone")
+
+
+# 3. Test A Story That Stops Appearing Falls Out Of The Ranking
+@patch.dict("os.environ", {
+    "HN_SCORES_RETENTION": "86400", "HN_TRENDING_WINDOW": "3600"
+})
+def test_record_scores_drops_unseen_stories():
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value
+    # The story on the page is rising; "old" was last seen 10 hours ago
+    pipe.execute.return_value = [
+        1, 0, True, 1, 1, [(b"98200:100", 98200.0), (b"100000:130", 1e5)]
+    ]
+    mock_r.zrangebyscore.return_value = [(b"old", 100000.0 - 36000)]
+    story_id = story_id_from_url(story["url"])
+
+    record_scores(mock_r, [story], 100000.0)
+
+    mock_r.zrangebyscore.assert_called_once_with(
+        "hn:last_seen", "-inf", 100000.0 - 3600, withscores=True
+    )
+    pipe.zadd.assert_any_call("hn:trending", {story_id: 60.0})
+    pipe.zrem.assert_called_once_with("hn:trending", b"old")
+    # Still within the retention, so its samples are kept
+    pipe.hdel.assert_not_called()
+
+
+# 4. Test A Story Without Enough Recent Samples Is Not Ranked
+def test_record_scores_unranks_without_velocity():
+    mock_r = MagicMock()
+    pipe = mock_r.pipeline.return_value
+    pipe.execute.return_value = [1, 0, True, 1, 1, [(b"100000:130", 1e5)]]
+    mock_r.zrangebyscore.return_value = []
+    story_id = story_id_from_url(story["url"])
+
+    record_scores(mock_r, [story], 100000.0)
+
+    pipe.zrem.assert_called_once_with("hn:trending", story_id)
+
+
+# 5. Test Trending Stories Are Read From The Ranking
+def test_get_trending():
+    mock_r = MagicMock()
+    mock_r.zrevrange.return_value = [(b"a", 60.0), (b"b", 12.345)]
+    mock_r.hmget.return_value = [json.dumps(story), None]
+
+    assert get_trending(mock_r, 5) == [dict(story, velocity=60.0)]
+    mock_r.zrevrange.assert_called_once_with(
+        "hn:trending", 0, 4, withscores=True
+    )
@@ -3,7 +3,7 @@ from unittest.mock import patch, MagicMock
 import redis
 import json
 import hashlib
-from app.redis_storage import save_books_into_redis_database
+from app.redis_storage import BookSink, save_books_into_redis_database
 
 
 # Sample book data for testing
@@ -32,11 +32,12 @@ def test_save_books_into_redis_database_success(mock_logging_info, mock_redis):
     # Call the function with sample data
     save_books_into_redis_database(books_data)
 
-    # Ensure Redis set is called for each book
+    # Ensure Redis set is queued on the pipeline for each book
+    mock_pipe = mock_redis_instance.pipeline.return_value
     for book in books_data:
         book_id = hashlib.md5(book['url'].encode('utf-8')).hexdigest()
         redis_key = f"book:{book_id}"
-        mock_redis_instance.set.assert_any_call(
+        mock_pipe.set.assert_any_call(
             redis_key, json.dumps(book, ensure_ascii=False)
         )
 
@@ -74,9 +75,8 @@ def test_save_books_into_redis_database_empty_books(
     # Call the function with an empty list
     save_books_into_redis_database([])
 
-    # Ensure Redis set is never called
-    mock_redis_instance = MagicMock()
-    mock_redis_instance.assert_not_called()
+    # Ensure no pipeline is ever flushed
+    mock_redis.return_value.pipeline.assert_not_called()
 
     # Check if the success logging is done (no books to store)
     mock_logging_info.assert_called_once_with("Stored 0 books into Redis.")
@@ -93,10 +93,11 @@ def test_save_books_into_redis_database_data_format(mock_redis):
     save_books_into_redis_database(books_data)
 
     # Ensure the data is stored as a JSON string
+    mock_pipe = mock_redis_instance.pipeline.return_value
     for book in books_data:
         book_id = hashlib.md5(book['url'].encode('utf-8')).hexdigest()
         redis_key = f"book:{book_id}"
-        mock_redis_instance.set.assert_any_call(
+        mock_pipe.set.assert_any_call(
             redis_key, json.dumps(book, ensure_ascii=False)
         )
 
@@ -133,3 +134,259 @@ def test_save_books_into_redis_database_logging_failure(
     mock_logging_error.assert_called_once_with(
         "Failed to store data in Redis: Connection failed"
     )
+
+
+# 7. Test Secondary Indexes Are Maintained
+@patch("redis.Redis")
+def test_save_books_into_redis_database_indexes(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    mock_redis_instance.zcard.return_value = 1
+    book = {
+        "url": "https://books.toscrape.com/catalogue/book/3",
+        "title": "Book 3",
+        "price": "12.50",
+        "category": "Poetry "
+    }
+
+    save_books_into_redis_database([book])
+
+    book_id = hashlib.md5(book['url'].encode('utf-8')).hexdigest()
+    mock_pipe = mock_redis_instance.pipeline.return_value
+    mock_pipe.sadd.assert_any_call(
+        "books:category:poetry", book_id
+    )
+    mock_pipe.zadd.assert_any_call(
+        "books:by_price", {book_id: 12.5}
+    )
+    mock_redis_instance.set.assert_any_call("books:total", 1)
+
+
+# 8. Test Writes Are Flushed In Pipelined Batches
+@patch("app.redis_storage.WRITE_BATCH_SIZE", 1)
+@patch("redis.Redis")
+def test_save_books_into_redis_database_batches(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+
+    save_books_into_redis_database(books_data)
+
+    mock_redis_instance.pipeline.assert_called_with(transaction=False)
+    mock_pipe = mock_redis_instance.pipeline.return_value
+    assert mock_pipe.execute.call_count == len(books_data)
+    mock_redis_instance.set.assert_any_call(
+        "books:total", mock_redis_instance.zcard.return_value
+    )
+
+
+# 9. Test Title N-gram Index Is Built At Ingestion
+@patch("redis.Redis")
+def test_save_books_into_redis_database_title_ngrams(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    book = {
+        "url": "https://books.toscrape.com/catalogue/book/4",
+        "title": "Dune",
+        "price": "9.00",
+    }
+
+    save_books_into_redis_database([book])
+
+    book_id = hashlib.md5(book['url'].encode('utf-8')).hexdigest()
+    mock_pipe = mock_redis_instance.pipeline.return_value
+    mock_pipe.hset.assert_called_once_with("books:titles", book_id, "dune")
+    mock_pipe.sadd.assert_any_call("books:trigram:dun", book_id)
+    mock_pipe.sadd.assert_any_call("books:trigram:une", book_id)
+    assert mock_pipe.sadd.call_count == 2
+
+
+# 10. Test New Books Get A Stable Catalog Position
+@patch("redis.Redis")
+def test_save_books_into_redis_database_catalog_order(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    mock_redis_instance.incrby.return_value = 12
+
+    save_books_into_redis_database(books_data)
+
+    mock_redis_instance.incrby.assert_called_once_with("books:order:seq", 2)
+    mock_pipe = mock_redis_instance.pipeline.return_value
+    for seq, book in enumerate(books_data, start=11):
+        book_id = hashlib.md5(book['url'].encode('utf-8')).hexdigest()
+        mock_pipe.zadd.assert_any_call(
+            "books:order", {book_id: seq}, nx=True
+        )
+
+
+# 11. Test A New Catalog Version Is Announced
+@patch("redis.Redis")
+def test_save_books_into_redis_database_publishes_version(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    mock_redis_instance.incr.return_value = 4
+
+    save_books_into_redis_database(books_data)
+
+    mock_redis_instance.incr.assert_called_once_with("books:version")
+    mock_redis_instance.publish.assert_called_once_with("books:updates", 4)
+
+
+# 12. Test Title Ranks Are Rebuilt For sort=title
+@patch("redis.Redis")
+def test_save_books_into_redis_database_title_order(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    mock_redis_instance.hgetall.return_value = {
+        b"id-b": b"zen", b"id-a": b"art", b"id-c": b"music",
+    }
+
+    save_books_into_redis_database(books_data)
+
+    mock_redis_instance.hgetall.assert_called_once_with("books:titles")
+    mock_redis_instance.zadd.assert_called_once_with(
+        "books:by_title", {"id-a": 0, "id-c": 1, "id-b": 2}
+    )
+
+
+# 13. Test Facets Are Computed Once The Books Are Stored
+@patch("redis.Redis")
+def test_save_books_into_redis_database_facets(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    mock_redis_instance.zrange.return_value = [b"1", b"2", b"3"]
+    mock_redis_instance.mget.return_value = [
+        json.dumps({"price": "10.00", "category": "Poetry"}).encode(),
+        json.dumps({"price": "20.00", "category": "Poetry"}).encode(),
+        json.dumps({"price": "15.00", "category": "Travel"}).encode(),
+    ]
+
+    save_books_into_redis_database(books_data)
+
+    stored = [
+        c for c in mock_redis_instance.set.call_args_list
+        if c[0][0] == "books:facets"
+    ]
+    assert len(stored) == 1
+    facets = json.loads(stored[0][0][1])
+    assert facets["total_books"] == 3
+    assert facets["price"]["min"] == 10.0
+    assert facets["price"]["max"] == 20.0
+    assert facets["price"]["p50"] == 15.0
+    assert facets["categories"][0] == {
+        "name": "Poetry",
+        "count": 2,
+        "price": {
+            "min": 10.0, "max": 20.0, "mean": 15.0,
+            "p25": 12.5, "p50": 15.0, "p75": 17.5, "p90": 19.0,
+        },
+    }
+    assert facets["categories"][1]["name"] == "Travel"
+
+
+# 14. Test The Sink Flushes Every Batch And Publishes Progress
+@patch("redis.Redis")
+def test_book_sink_flushes_in_batches(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    mock_pipe = mock_redis_instance.pipeline.return_value
+
+    with BookSink(batch_size=2) as sink:
+        for book in books_data + books_data[:1]:
+            sink.add(book)
+        # The first two books are stored and visible before the end
+        assert mock_pipe.execute.call_count == 1
+        mock_redis_instance.incr.assert_called_once_with("books:version")
+        # Ranking the titles reads the whole catalog, so only once
+        mock_redis_instance.hgetall.assert_not_called()
+
+    assert sink.written == 3
+    assert mock_pipe.execute.call_count == 2
+    assert mock_redis_instance.incr.call_count == 2
+    mock_redis_instance.hgetall.assert_called_once_with("books:titles")
+    # Until then new books sort after the ranked titles
+    mock_pipe.zadd.assert_any_call(
+        "books:by_title",
+        {hashlib.md5(books_data[0]['url'].encode('utf-8')).hexdigest():
+         float("inf")},
+        nx=True
+    )
+
+
+# 15. Test Books Added Before A Failure Are Stored
+@patch("redis.Redis")
+def test_book_sink_stores_on_error(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+
+    with pytest.raises(RuntimeError):
+        with BookSink(batch_size=10) as sink:
+            sink.add(books_data[0])
+            raise RuntimeError("crawl failed")
+
+    assert sink.written == 1
+    mock_redis_instance.pipeline.return_value.execute.assert_called_once()
+
+
+# 16. Test Closing An Empty Sink Announces Nothing
+@patch("redis.Redis")
+def test_book_sink_empty(mock_redis):
+    with BookSink():
+        pass
+    mock_redis.return_value.incr.assert_not_called()
+
+
+# 17. Test The Sink Reports Each Batch Once It Is Stored
+@patch("redis.Redis")
+def test_book_sink_on_write(mock_redis):
+    written = []
+    with BookSink(batch_size=2, on_write=written.append) as sink:
+        for book in books_data + books_data[:1]:
+            sink.add(book)
+        assert written == [books_data]
+
+    assert written == [books_data, books_data[:1]]
+
+
+# 18. Test A Book Stored Again Leaves Its Old Category And Title
+@patch("redis.Redis")
+def test_book_sink_drops_stale_postings(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    url = "https://books.toscrape.com/catalogue/book/5"
+    book_id = hashlib.md5(url.encode('utf-8')).hexdigest()
+    mock_redis_instance.mget.return_value = [json.dumps({
+        "url": url, "title": "Dune", "price": "9.00", "category": "Poetry"
+    }).encode()]
+
+    save_books_into_redis_database([{
+        "url": url, "title": "Dunes", "price": "9.00", "category": "Travel"
+    }])
+
+    mock_redis_instance.mget.assert_called_once_with([f"book:{book_id}"])
+    mock_pipe = mock_redis_instance.pipeline.return_value
+    mock_pipe.srem.assert_called_once_with("books:category:poetry", book_id)
+    mock_pipe.sadd.assert_any_call("books:category:travel", book_id)
+    # "dun" and "une" are still in the title, "nes" is new
+    mock_pipe.sadd.assert_any_call("books:trigram:nes", book_id)
+
+
+# 19. Test A Changed Title Drops Its Old N-grams
+@patch("redis.Redis")
+def test_book_sink_drops_stale_ngrams(mock_redis):
+    mock_redis_instance = MagicMock()
+    mock_redis.return_value = mock_redis_instance
+    url = "https://books.toscrape.com/catalogue/book/6"
+    book_id = hashlib.md5(url.encode('utf-8')).hexdigest()
+    mock_redis_instance.mget.return_value = [json.dumps({
+        "url": url, "title": "Dune", "price": "9.00", "category": "Poetry"
+    }).encode()]
+
+    save_books_into_redis_database([{
+        "url": url, "title": "Emma", "price": "9.00", "category": "poetry "
+    }])
+
+    mock_pipe = mock_redis_instance.pipeline.return_value
+    # Same category set, so only the title postings change
+    assert sorted(c[0] for c in mock_pipe.srem.call_args_list) == [
+        ("books:trigram:dun", book_id), ("books:trigram:une", book_id)
+    ]
@@ -0,0 +1,92 @@
+import json
+import threading
+import pytest
+from unittest.mock import MagicMock
+from app.singleflight import SingleFlight
+
+
+# 1. Test Concurrent Calls In One Process Share A Single Call
+def test_single_flight_in_process():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["story"]
+
+    results = []
+    leader = threading.Thread(
+        target=lambda: results.append(flight.do("page:1", fetch))
+    )
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(
+            target=lambda: results.append(flight.do("page:1", fetch))
+        )
+        for _ in range(3)
+    ]
+    for follower in followers:
+        follower.start()
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == [["story"]] * 4
+    # The next call after the flight landed runs again
+    assert flight.do("page:1", lambda: ["fresh"]) == ["fresh"]
+
+
+# 2. Test Errors Reach Every Waiting Caller
+def test_single_flight_error():
+    flight = SingleFlight()
+
+    with pytest.raises(RuntimeError):
+        flight.do("page:1", MagicMock(side_effect=RuntimeError("boom")))
+    assert flight.do("page:1", lambda: "ok") == "ok"
+
+
+# 3. Test The Lock Holder Stores Its Result For Other Processes
+def test_single_flight_shared_leader():
+    mock_r = MagicMock()
+    mock_r.get.return_value = None
+    lock = mock_r.lock.return_value
+    lock.acquire.return_value = True
+
+    assert SingleFlight().do("page:1", lambda: [1, 2], mock_r) == [1, 2]
+
+    mock_r.lock.assert_called_once_with("singleflight:lock:page:1", timeout=30)
+    mock_r.set.assert_called_once_with(
+        "singleflight:result:page:1", json.dumps([1, 2]), ex=10
+    )
+    lock.release.assert_called_once()
+
+
+# 4. Test Other Processes Wait For The Shared Result
+def test_single_flight_shared_follower():
+    mock_r = MagicMock()
+    mock_r.get.side_effect = [None, json.dumps([1, 2]).encode("utf-8")]
+    mock_r.lock.return_value.acquire.return_value = False
+    fetch = MagicMock()
+
+    flight = SingleFlight(poll_interval=0)
+    assert flight.do("page:1", fetch, mock_r) == [1, 2]
+    fetch.assert_not_called()
+
+
+# 5. Test A Caller Gives Up After Waiting Too Long, Without Calling
+def test_single_flight_shared_timeout():
+    mock_r = MagicMock()
+    mock_r.get.return_value = None
+    mock_r.lock.return_value.acquire.return_value = False
+    fetch = MagicMock()
+
+    flight = SingleFlight(wait_timeout=0)
+    with pytest.raises(TimeoutError):
+        flight.do("page:1", fetch, mock_r)
+    fetch.assert_not_called()